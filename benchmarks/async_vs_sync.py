@@ -0,0 +1,113 @@
+"""
+Compare request throughput with the threadpool (sync) and aiosqlite (async) database modes.
+
+Each mode runs in its own process against a copy of the same database, sending read
+requests through the ASGI app in-process so only the server side is measured:
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stats import summarize
+
+PATHS = [
+    "/webbing/?limit=50",
+    "/webbing/?limit=20&sort=weight&descending=true",
+    "/roller/?limit=20",
+    "/brand/?limit=20",
+    "/webbing/{id}",
+    "/search/?q=static",
+]
+
+
+async def run_requests(total: int, concurrency: int, threads: int) -> dict:
+    import anyio.to_thread
+    import httpx
+
+    from slack_data.api.response_cache import RESPONSE_CACHE
+    from slack_data.main import app
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    RESPONSE_CACHE.max_entries = 0 # Measure the database path, not cache hits
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies = []
+
+            async def request(i: int):
+                path = PATHS[i % len(PATHS)].format(id=i % 40 + 1)
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code not in (200, 404):
+                        raise RuntimeError(f"{path} returned {response.status_code}")
+
+            await asyncio.gather(*(request(i) for i in range(min(total, 50)))) # Warm up
+            latencies.clear()
+            start = time.perf_counter()
+            await asyncio.gather(*(request(i) for i in range(total)))
+            elapsed = time.perf_counter() - start
+
+    return {"concurrency": concurrency, "threads": threads, **summarize(latencies, elapsed)}
+
+
+def run_mode(mode: str, database_path: Path, args: argparse.Namespace) -> dict:
+    env = {
+        **os.environ,
+        "SLACKDATA_ASYNC_DB": "true" if mode == "async" else "false",
+        "SLACKDATA_DATABASE_PATH": str(database_path),
+    }
+    command = [
+        sys.executable, "-m", "benchmarks.async_vs_sync", "--worker",
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--threads", str(args.threads),
+    ]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return {"mode": mode, **json.loads(output.strip().splitlines()[-1])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=40, help="Size of the threadpool for sync handlers")
+    parser.add_argument("--database", type=Path, default=None, help="Database to copy, loaded from the JSON files if missing")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = asyncio.run(run_requests(args.requests, args.concurrency, args.threads))
+        print(json.dumps(result))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("sync", "async"):
+            database_path = Path(directory) / f"{mode}.db"
+            if args.database is not None:
+                shutil.copyfile(args.database, database_path)
+            results.append(run_mode(mode, database_path, args))
+
+    for result in results:
+        print(
+            f"{result['mode']:>5}: {result['requests_per_second']:>8} req/s  "
+            f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
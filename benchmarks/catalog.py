@@ -0,0 +1,288 @@
+"""
+Generate synthetic catalogs shaped like `webbings.json` and `rollers.json`, and load them.
+
+Entries are drawn from a seeded random generator, so the same size and seed always give the
+same catalog. Webbings and rollers are written as seed JSON files and loaded through the same
+sync as the real files. Weblocks have no seed file and are bulk loaded directly.
+
+    python -m benchmarks.catalog --size 100k --output catalog/
+"""
+import argparse
+import json
+import random
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from sqlmodel import Session
+
+from slack_data.load_data.bulk_load import bulk_load
+from slack_data.load_data.stream_json import iter_json_array
+from slack_data.load_data.sync import SEED_SOURCES, sync_source
+from slack_data.models.exchange_rates import update_normalized_prices
+from slack_data.models.weblocks import AttachmentPoint, FrontPin, Weblock, WeblockCreate
+from slack_data.utilities.materials import MetalMaterial
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Share of the catalog rows in each table
+SHARES = {"webbing": 0.6, "roller": 0.2, "weblock": 0.2}
+ROWS_PER_BRAND = 500
+
+# Raw values as they appear in the seed files, so the loaders' mapping to enums is exercised
+WEBBING_MATERIALS = {
+    "pes": (0.9, 1.6),
+    "polyamid/nylon": (1.6, 3.0),
+    "pes/polyamid/nylon": (1.2, 2.2),
+    "50mm pes": (0.8, 1.4),
+    "hybrid": (1.0, 2.0),
+    "dyneema": (0.3, 0.6),
+    "vectran": (0.3, 0.7),
+    "static rope": (2.0, 3.5),
+    "climbing rope": (4.0, 6.0),
+}
+WEBBING_WIDTHS = (19, 25, 25, 25, 35, 50)
+STRETCH_LOADS_KN = (0.15, 0.25, 0.5, 0.75, 1, 1.5, 2, 2.5, 3, 4, 5, 7.5, 10, 12.5, 15, 20, 25, 30)
+
+ROLLER_SLIDERS = ("Moving plates", "Carabiner", "Locking Carabiner")
+ROLLER_LOCKS = ("Non-locking", "non-locking", "screw lock", "screw locking", "twist lock", "auto lock")
+ROLLER_MATERIALS = (None, "Aluminum", "Steel", "Stainless Steel", "Nylon (Polyamide)")
+CURRENCIES = (None, "USD", "EUR", "GBP", "CHF")
+
+NAME_SYLLABLES = ("sla", "ck", "tri", "ba", "lo", "ra", "ven", "tu", "mo", "ze", "qui", "don", "fy", "pe")
+
+
+@dataclass
+class Catalog:
+    """
+    Paths and row counts of a generated catalog.
+    """
+    directory: Path
+    seed: int
+    brands: int
+    webbings: int
+    rollers: int
+    weblocks: int
+
+    @property
+    def webbing_file(self) -> Path:
+        return self.directory / "webbings.json"
+
+    @property
+    def roller_file(self) -> Path:
+        return self.directory / "rollers.json"
+
+    @property
+    def weblock_file(self) -> Path:
+        return self.directory / "weblocks.json"
+
+    @property
+    def rows(self) -> int:
+        return self.webbings + self.rollers + self.weblocks
+
+
+def brand_names(count: int, seed: int) -> list[str]:
+    rng = random.Random(f"{seed}-brands")
+    names = []
+    for index in range(count):
+        word = "".join(rng.choice(NAME_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.append(f"{word} {rng.choice(('Slacklines', 'Lines', 'Gear', 'Highlines'))} {index}")
+    return names
+
+
+def stretch_curve(rng: random.Random, material: str) -> list[dict]:
+    """
+    A monotonic stretch curve that flattens at high loads, like a measured webbing.
+    """
+    low, high = WEBBING_MATERIALS[material]
+    factor = rng.uniform(low, high)
+    exponent = rng.uniform(0.55, 0.8)
+    max_load = rng.choice((10, 12.5, 15, 20, 25, 30))
+    loads = [load for load in STRETCH_LOADS_KN if load <= max_load and rng.random() < 0.7]
+    return [{"kn": 0, "percent": 0}] + [
+        {"kn": load, "percent": round(factor * 3 * load ** exponent, 2)} for load in sorted(set(loads))
+    ]
+
+
+def generate_webbings(count: int, brands: list[str], seed: int) -> Iterator[dict]:
+    """
+    Yield `webbings.json` entries, with empty strings for missing values like the real file.
+    """
+    rng = random.Random(f"{seed}-webbing")
+    for index in range(count):
+        material = rng.choice(tuple(WEBBING_MATERIALS))
+        width = rng.choice(WEBBING_WIDTHS)
+        measured = rng.random() < 0.8
+        yield {
+            "name": f"{rng.choice(NAME_SYLLABLES).capitalize()}line {width} #{index}",
+            "brand": rng.choice(brands),
+            "stretch": stretch_curve(rng, material) if rng.random() < 0.9 else [],
+            "materialType": material,
+            "width": width,
+            "weight": round(rng.uniform(25, 95), 1) if measured else "",
+            "breakingStrength": round(rng.uniform(18, 70), 1) if measured else "",
+        }
+
+
+def generate_rollers(count: int, brands: list[str], seed: int) -> Iterator[dict]:
+    """
+    Yield `rollers.json` entries.
+    """
+    rng = random.Random(f"{seed}-roller")
+    for index in range(count):
+        width = rng.choice((25, 35, 50))
+        price = round(rng.uniform(30, 250), 2) if rng.random() < 0.6 else None
+        yield {
+            "name": f"Roller {width} #{index}",
+            "material": None,
+            "weight": round(rng.uniform(60, 450)),
+            "wll": rng.choice((2, 3, 4, 5)),
+            "mbs": rng.choice((12, 15, 20, 24, 30)),
+            "compatible_webbing_width": [width - 1, width + 1] if rng.random() < 0.7 else None,
+            "slider_type": rng.choice(ROLLER_SLIDERS),
+            "inner_width": round(width + rng.uniform(1, 4), 1),
+            "outer_bearing_diameter": None,
+            "isa_approved": rng.choice((None, True, False)),
+            "manufacturer": rng.choice(brands),
+            "price": price,
+            "price_unit": rng.choice(CURRENCIES[1:]) if price is not None else None,
+            "roller_material": rng.choice(ROLLER_MATERIALS),
+            "locking_type": rng.choice(ROLLER_LOCKS),
+            "bearing_material": rng.choice(("Stainless Steel", "steel")),
+        }
+
+
+def generate_weblocks(count: int, brands: list[str], seed: int) -> Iterator[dict]:
+    """
+    Yield weblock entries shaped like `WeblockCreate`, with a brand name instead of an id.
+    """
+    rng = random.Random(f"{seed}-weblock")
+    for index in range(count):
+        price = round(rng.uniform(40, 400), 2) if rng.random() < 0.6 else None
+        yield {
+            "name": f"Weblock #{index}",
+            "brand": rng.choice(brands),
+            "material": rng.choice(list(MetalMaterial)).value,
+            "width": rng.choice((25, 35, 50)),
+            "weight": round(rng.uniform(80, 600), 1),
+            "breaking_strength": round(rng.uniform(15, 60), 1),
+            "front_pin": rng.choice(list(FrontPin)).value,
+            "attachment_point": rng.choice(list(AttachmentPoint)).value,
+            "isa_certified": rng.random() < 0.3,
+            "price": price,
+            "currency": rng.choice(CURRENCIES[1:]) if price is not None else None,
+        }
+
+
+def write_json_array(path: Path, items: Iterable[dict]) -> None:
+    """
+    Write items as a JSON array one entry per line, without holding them in memory.
+    """
+    with open(path, "w") as file:
+        file.write("[")
+        for index, item in enumerate(items):
+            file.write(",\n" if index else "\n")
+            file.write(json.dumps(item))
+        file.write("\n]\n")
+
+
+def generate_catalog(directory: Path, rows: int, seed: int = 0) -> Catalog:
+    """
+    Write a catalog of about `rows` entries split across webbings, rollers and weblocks.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    counts = {table: max(1, round(rows * share)) for table, share in SHARES.items()}
+    catalog = Catalog(
+        directory=directory,
+        seed=seed,
+        brands=max(10, rows // ROWS_PER_BRAND),
+        webbings=counts["webbing"],
+        rollers=counts["roller"],
+        weblocks=counts["weblock"],
+    )
+    brands = brand_names(catalog.brands, seed)
+    write_json_array(catalog.webbing_file, generate_webbings(catalog.webbings, brands, seed))
+    write_json_array(catalog.roller_file, generate_rollers(catalog.rollers, brands, seed))
+    write_json_array(catalog.weblock_file, generate_weblocks(catalog.weblocks, brands, seed))
+    return catalog
+
+
+def build_weblock_row(weblock: dict, brand_id: int) -> dict:
+    fields = {key: value for key, value in weblock.items() if key != "brand"}
+    return WeblockCreate(brand_id=brand_id, **fields).model_dump()
+
+
+def load_catalog(session: Session, catalog: Catalog) -> list[dict]:
+    """
+    Load a catalog into an empty database and re-sync it unchanged, timing each loader.
+    """
+    files = {"webbing": catalog.webbing_file, "roller": catalog.roller_file}
+    sources = [
+        replace(source, path=path, iter_items=lambda path=path: iter_json_array(path))
+        for source in SEED_SOURCES
+        for table, path in files.items()
+        if source.model.__tablename__ == table
+    ]
+
+    results = []
+
+    def timed(loader: str, table: str, rows: int, load) -> None:
+        start = time.perf_counter()
+        load()
+        seconds = time.perf_counter() - start
+        results.append({
+            "loader": loader,
+            "table": table,
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds, 1) if seconds else None,
+        })
+
+    for source in sources:
+        table = source.model.__tablename__
+        rows = catalog.webbings if table == "webbing" else catalog.rollers
+        timed("sync", table, rows, lambda source=source: sync_source(session, source))
+    timed(
+        "bulk_load", "weblock", catalog.weblocks,
+        lambda: bulk_load(
+            session, Weblock, iter_json_array(catalog.weblock_file),
+            lambda weblock: weblock["brand"], build_weblock_row,
+        ),
+    )
+    session.commit()
+
+    def normalize_prices():
+        update_normalized_prices(session)
+        session.commit()
+
+    # The rates are loaded on startup, so every price is renormalized as if every rate changed
+    timed(
+        "exchange_rates", "webbing, roller, weblock", catalog.webbings + catalog.rollers + catalog.weblocks,
+        normalize_prices,
+    )
+    # Every entry is hashed and compared, but nothing is written
+    for source in sources:
+        table = source.model.__tablename__
+        rows = catalog.webbings if table == "webbing" else catalog.rollers
+        timed("sync_unchanged", table, rows, lambda source=source: sync_source(session, source, force=True))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--rows", type=int, default=None, help="Number of rows, instead of a preset size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True, help="Directory to write the JSON files to")
+    args = parser.parse_args()
+
+    catalog = generate_catalog(args.output, args.rows or SIZES[args.size], args.seed)
+    print(
+        f"Wrote {catalog.webbings} webbings, {catalog.rollers} rollers and {catalog.weblocks} "
+        f"weblocks from {catalog.brands} brands to {catalog.directory}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Load test every route of the API against a synthetic catalog in a temporary SQLite file.
+
+A catalog is generated (see `benchmarks.catalog`) and loaded through the loaders, then
+every route of the brand, webbing, roller, weblock, search, export and stats routers gets
+`--requests` requests through the ASGI app in-process, with no network involved. Loader
+throughput and per-route throughput and p50/p95/p99 latency are written as JSON, to compare
+releases:
+
+    python -m benchmarks.load_test --size 100k --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from benchmarks.catalog import SIZES
+from benchmarks.stats import summarize
+
+DISPOSABLE_BATCH_SIZE = 500
+
+
+@dataclass
+class Context:
+    """
+    Row counts of the loaded catalog, and rows created for the routes that delete.
+    """
+    brands: int
+    webbings: int
+    rollers: int
+    weblocks: int
+    disposable: list[int] = field(default_factory=list)
+
+    def count(self, entity: str) -> int:
+        return {"brand": self.brands, "webbing": self.webbings, "roller": self.rollers, "weblock": self.weblocks}[entity]
+
+    def row_id(self, entity: str, i: int) -> int:
+        # Spread over the table with a stride coprime to most sizes, rather than walking it in order
+        return i * 7919 % self.count(entity) + 1
+
+
+@dataclass
+class Scenario:
+    """
+    How to build the `i`th request to a route.
+
+    With `disposable`, that many rows of the entity are created through its batch route first,
+    without being timed, and their ids are in `Context.disposable`. `max_concurrency` caps
+    the requests in flight below `--concurrency`.
+    """
+    method: str
+    path: Callable[[int, Context], str]
+    body: Callable[[int, Context], Any] | None = None
+    disposable: str | None = None
+    max_requests: int | None = None
+    max_concurrency: int | None = None
+
+
+def brand_body(i: int, ctx: Context) -> dict:
+    return {"name": f"Load test brand {i}", "country": None, "description": "Created by the load test"}
+
+
+def webbing_body(i: int, ctx: Context) -> dict:
+    return {
+        "name": f"Load test webbing {i}",
+        "brand_id": ctx.row_id("brand", i),
+        "material": "Polyester",
+        "width": 25,
+        "weight": 55.0,
+        "breaking_strength": 32.0,
+        "stretch": [{"kn": 0, "percent": 0}, {"kn": 2, "percent": 3.1}, {"kn": 10, "percent": 9.4}],
+    }
+
+
+def roller_body(i: int, ctx: Context) -> dict:
+    return {
+        "name": f"Load test roller {i}",
+        "brand_id": ctx.row_id("brand", i),
+        "material": "Aluminum",
+        "roller_material": "Steel",
+        "slider_type": "Moving plates",
+        "lock_type": "Screw Lock",
+        "bearing_material": "Steel",
+        "weight": 250.0,
+    }
+
+
+def weblock_body(i: int, ctx: Context) -> dict:
+    return {
+        "name": f"Load test weblock {i}",
+        "brand_id": ctx.row_id("brand", i),
+        "material": "Aluminum",
+        "width": 25,
+        "weight": 320.0,
+    }
+
+
+BODIES = {"brand": brand_body, "webbing": webbing_body, "roller": roller_body, "weblock": weblock_body}
+LIST_QUERIES = {
+    "brand": ("limit=20", "limit=20&sort=name&descending=true"),
+    "webbing": ("limit=50", "limit=20&sort=weight&descending=true", "limit=20&material=Polyester&min_width=25"),
+    "roller": ("limit=50", "limit=20&sort=breaking_strength", "limit=20&lock_type=Screw Lock"),
+    "weblock": ("limit=50", "limit=20&sort=weight", "limit=20&min_breaking_strength=30"),
+}
+
+
+def crud_scenarios(entity: str) -> dict[str, Scenario]:
+    """
+    Scenarios for the routes every entity router has, keyed by route name.
+    """
+    plural = f"{entity}s"
+    body = BODIES[entity]
+    queries = LIST_QUERIES[entity]
+    return {
+        f"read_{plural}": Scenario(
+            "GET", lambda i, ctx: f"/{entity}/?{queries[i % len(queries)]}&offset={i * 37 % max(1, ctx.count(entity) - 50)}"
+        ),
+        f"read_{entity}": Scenario("GET", lambda i, ctx: f"/{entity}/{ctx.row_id(entity, i)}"),
+        f"create_{entity}": Scenario("POST", lambda i, ctx: f"/{entity}/", body),
+        f"create_{plural}": Scenario(
+            "POST", lambda i, ctx: f"/{entity}/batch", lambda i, ctx: [body(i * 10 + j, ctx) for j in range(10)]
+        ),
+        f"update_{entity}": Scenario(
+            "PATCH", lambda i, ctx: f"/{entity}/{ctx.row_id(entity, i)}", body
+        ),
+        f"update_{plural}": Scenario(
+            "PATCH",
+            lambda i, ctx: f"/{entity}/batch",
+            lambda i, ctx: [{"id": ctx.row_id(entity, i * 10 + j), **body(i * 10 + j, ctx)} for j in range(10)],
+        ),
+        f"delete_{entity}": Scenario(
+            "DELETE", lambda i, ctx: f"/{entity}/{ctx.disposable[i]}", disposable=entity
+        ),
+    }
+
+
+STATS_QUERIES = (
+    "/stats/webbing?group_by=material&field=breaking_strength",
+    "/stats/webbing?group_by=width&field=weight",
+    "/stats/webbing?group_by=brand&field=breaking_strength",
+    "/stats/roller?group_by=lock_type&field=weight",
+    "/stats/weblock?group_by=material&field=breaking_strength&buckets=20",
+)
+SIMULATED_WEBBINGS = 100
+SIMILAR_CURVE = [{"kn": 0, "percent": 0}, {"kn": 1, "percent": 2.5}, {"kn": 5, "percent": 8}, {"kn": 10, "percent": 12}]
+
+ROUTE_SCENARIOS: dict[str, Scenario] = {
+    **crud_scenarios("brand"),
+    **crud_scenarios("webbing"),
+    **crud_scenarios("roller"),
+    **crud_scenarios("weblock"),
+    "read_stretch_at_load": Scenario("GET", lambda i, ctx: f"/webbing/stretch?kn={i % 20 + 0.5}"),
+    # 100 webbings at 46 lengths, the whole catalog would pass `MAX_SIMULATION_CELLS` from the 10k size
+    "simulate_lines": Scenario(
+        "GET",
+        lambda i, ctx: (
+            f"/webbing/simulate?pretension={1 + i % 4 * 0.5}&min_length=50&max_length=500&length_step=10&"
+            + "&".join(f"ids={ctx.row_id('webbing', i * SIMULATED_WEBBINGS + j)}" for j in range(SIMULATED_WEBBINGS))
+        ),
+    ),
+    "read_similar_to_curve": Scenario("POST", lambda i, ctx: "/webbing/similar?k=5", lambda i, ctx: SIMILAR_CURVE),
+    "read_similar_webbings": Scenario("GET", lambda i, ctx: f"/webbing/{ctx.row_id('webbing', i)}/similar?k=5"),
+    "read_compatible_gear": Scenario("GET", lambda i, ctx: f"/webbing/{ctx.row_id('webbing', i)}/compatible?limit=20"),
+    "search": Scenario("GET", lambda i, ctx: f"/search/?q={('line', 'roller', 'weblock', 'slack', 'gear')[i % 5]}"),
+    "read_stats": Scenario("GET", lambda i, ctx: STATS_QUERIES[i % len(STATS_QUERIES)]),
+    "export": Scenario(
+        "GET", lambda i, ctx: f"/export/{('roller', 'weblock', 'webbing')[i % 3]}?format={('ndjson', 'csv')[i % 2]}",
+        max_requests=3,
+        max_concurrency=1, # More exports at once than `SLACKDATA_EXPORT_POOL_SIZE` are refused with 503
+    ),
+}
+
+# Reads run before writes, and deletes last, so every route sees the catalog as it was loaded
+ORDER = ("GET", "POST", "PATCH", "DELETE")
+
+
+def check_coverage() -> list:
+    """
+    Get the routes to benchmark, failing if one of them has no scenario.
+    """
+    from slack_data.api.routers.brand_router import brand_router
+    from slack_data.api.routers.export_router import export_router
+    from slack_data.api.routers.roller_router import roller_router
+    from slack_data.api.routers.search_router import search_router
+    from slack_data.api.routers.stats_router import stats_router
+    from slack_data.api.routers.webbing_router import webbing_router
+    from slack_data.api.routers.weblock_router import weblock_router
+
+    routers = (brand_router, webbing_router, roller_router, weblock_router, search_router, export_router, stats_router)
+    routes = [route for router in routers for route in router.routes]
+    missing = [route.name for route in routes if route.name not in ROUTE_SCENARIOS]
+    if missing:
+        raise RuntimeError(f"No load test scenario for the routes: {', '.join(missing)}")
+    return sorted(routes, key=lambda route: ORDER.index(ROUTE_SCENARIOS[route.name].method))
+
+
+async def create_disposable(client, entity: str, count: int, ctx: Context) -> list[int]:
+    ids = []
+    for start in range(0, count, DISPOSABLE_BATCH_SIZE):
+        items = [
+            {**BODIES[entity](i, ctx), "name": f"Disposable {entity} {i}"}
+            for i in range(start, min(count, start + DISPOSABLE_BATCH_SIZE))
+        ]
+        response = await client.post(f"/{entity}/batch", json=items)
+        response.raise_for_status()
+        ids += [item["id"] for item in response.json()["items"]]
+    return ids
+
+
+async def run_route(client, route, ctx: Context, requests: int, concurrency: int) -> dict:
+    scenario = ROUTE_SCENARIOS[route.name]
+    total = min(requests, scenario.max_requests or requests)
+    if scenario.disposable is not None:
+        ctx.disposable = await create_disposable(client, scenario.disposable, total, ctx)
+
+    semaphore = asyncio.Semaphore(min(concurrency, scenario.max_concurrency or concurrency))
+    latencies = []
+    statuses: dict[int, int] = {}
+
+    async def request(i: int):
+        body = scenario.body(i, ctx) if scenario.body is not None else None
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path(i, ctx), json=body)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    if scenario.method == "GET":
+        await asyncio.gather(*(request(i) for i in range(min(total, 10)))) # Warm up
+        latencies.clear()
+        statuses.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "route": route.name,
+        "method": scenario.method,
+        "path": route.path,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        **summarize(latencies, elapsed),
+    }
+
+
+async def run_load_test(catalog_directory: Path, args: argparse.Namespace) -> dict:
+    import httpx
+    from sqlmodel import Session, func, select
+
+    from benchmarks.catalog import generate_catalog, load_catalog
+    from slack_data import database
+    from slack_data.api.response_cache import RESPONSE_CACHE
+    from slack_data.main import app
+    from slack_data.models.brands import Brand
+
+    routes = check_coverage()
+    if not args.cache:
+        RESPONSE_CACHE.max_entries = 0 # Measure the database path, not cache hits
+
+    start = time.perf_counter()
+    catalog = generate_catalog(catalog_directory, args.rows or SIZES[args.size], args.seed)
+    generate_seconds = time.perf_counter() - start
+
+    async with app.router.lifespan_context(app):
+        with Session(database.DATABASE_ENGINE) as session:
+            loaders = load_catalog(session, catalog)
+            brands = session.exec(select(func.count(Brand.id))).one()
+        ctx = Context(brands, catalog.webbings, catalog.rollers, catalog.weblocks)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            results = []
+            for route in routes:
+                result = await run_route(client, route, ctx, args.requests, args.concurrency)
+                results.append(result)
+                print(
+                    f"{result['method']:>6} {result['path']:<28} {result['requests_per_second']:>9} req/s  "
+                    f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                    f"errors {result['errors']}",
+                    file=sys.stderr,
+                )
+
+    return {
+        "environment": environment(),
+        "catalog": {
+            "seed": catalog.seed,
+            "rows": catalog.rows,
+            "brands": brands,
+            "webbings": catalog.webbings,
+            "rollers": catalog.rollers,
+            "weblocks": catalog.weblocks,
+            "generate_seconds": round(generate_seconds, 3),
+        },
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "response_cache": args.cache,
+            "async_db": database.ASYNC_DATABASE_ENGINE is not None,
+        },
+        "loaders": loaders,
+        "routes": results,
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        version = metadata.version("slackdata")
+    except metadata.PackageNotFoundError:
+        version = None
+    return {
+        "version": version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--rows", type=int, default=None, help="Number of catalog rows, instead of a preset size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--output", type=Path, default=None, help="File to write the JSON results to, instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The settings are read when `slack_data` is first imported
+        os.environ["SLACKDATA_DATABASE_PATH"] = str(Path(directory) / "load_test.db")
+        os.environ["SLACKDATA_SYNC_SEED_FILES"] = "false"
+        results = asyncio.run(run_load_test(Path(directory) / "catalog", args))
+
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
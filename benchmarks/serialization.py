@@ -0,0 +1,147 @@
+"""
+Compare the ORM and column-based serialization of list pages.
+
+Pages of webbings, rollers and weblocks are fetched and serialized three ways, and the
+bodies are checked to be byte for byte identical:
+
+- `fastapi`: ORM objects validated and encoded the way FastAPI handles a `response_model`
+- `orm`: ORM objects serialized with a prebuilt type adapter (the cached list path before)
+- `columns`: selected columns serialized as dicts against a prebuilt `TypedDict` adapter (the list path now)
+
+    python -m benchmarks.serialization --rows 5000 --page-size 100
+"""
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select
+
+import slack_data.main  # noqa: F401, registers every model before the mappers are configured
+from slack_data import database
+from slack_data.api.pagination import paginate
+from slack_data.api.response_cache import get_type_adapter, serialize
+from slack_data.api.routers.webbing_router import WEBBING_LOAD_OPTIONS
+from slack_data.api.serialization import public_rows, select_public, serialize_rows
+from slack_data.api.stretch_curves import get_stretch_curves
+from slack_data.load_data.bulk_load import bulk_load
+from slack_data.load_data.load_webbings import (
+    build_webbing_row,
+    clean_webbing_data,
+    get_brand_name,
+    insert_webbing_batch,
+    iter_webbings_json,
+)
+from slack_data.load_data.sync import sync_seed_files
+from slack_data.models.filters import GearFilters
+from slack_data.models.rollers import Roller, RollerPublic
+from slack_data.models.webbing import Webbing, WebbingPublic
+from slack_data.models.weblocks import Weblock, WeblockPublic
+
+
+def fill_webbings(session: Session, rows: int) -> None:
+    """
+    Copy the seed webbings under new names until the table has `rows` rows.
+    """
+    seed = [clean_webbing_data(webbing) for webbing in iter_webbings_json()]
+    existing = len(session.exec(select(Webbing.id)).all())
+    copies = (
+        {**seed[i % len(seed)], "name": f"{seed[i % len(seed)]['name']} #{i}"}
+        for i in range(max(0, rows - existing))
+    )
+    bulk_load(session, Webbing, copies, get_brand_name, build_webbing_row, insert_batch=insert_webbing_batch)
+
+
+def fastapi_body(public_model, objects) -> bytes:
+    adapter = get_type_adapter(list[public_model])
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+def orm_rows(session: Session, model, page: GearFilters):
+    options = WEBBING_LOAD_OPTIONS if model is Webbing else [joinedload(model.brand)]
+    return session.exec(paginate(select(model).options(*options), model, page)).all()
+
+
+def columns_body(session: Session, model, public_model, page: GearFilters) -> bytes:
+    rows = session.exec(paginate(select_public(model, public_model), model, page)).all()
+    extra = {}
+    if model is Webbing:
+        extra["stretch"] = get_stretch_curves(session, [row.id for row in rows])
+    return serialize_rows(public_model, public_rows(public_model, rows, **extra))
+
+
+def time_per_row(session: Session, function, iterations: int, page_size: int) -> float:
+    elapsed = 0.0
+    for _ in range(iterations):
+        session.expunge_all() # Measure loading the rows, not hits in the identity map
+        start = time.perf_counter()
+        function()
+        elapsed += time.perf_counter() - start
+    return elapsed / iterations / page_size * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Number of webbings to generate")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        settings = replace(database.SETTINGS, database_path=str(Path(directory) / "bench.db"))
+        database.create_db_and_tables(settings)
+        with Session(database.DATABASE_ENGINE) as session:
+            sync_seed_files(session)
+            fill_webbings(session, args.rows)
+
+        page = GearFilters(limit=args.page_size)
+        entities = ((Webbing, WebbingPublic), (Roller, RollerPublic), (Weblock, WeblockPublic))
+        with Session(database.READ_ENGINE) as session:
+            for model, public_model in entities:
+                objects = orm_rows(session, model, page)
+                bodies = {
+                    "fastapi": fastapi_body(public_model, objects),
+                    "orm": serialize(list[public_model], objects),
+                    "columns": columns_body(session, model, public_model, page),
+                }
+                if len(set(bodies.values())) != 1:
+                    raise AssertionError(f"Serialized `{model.__tablename__}` bodies differ")
+
+                page_size = max(1, len(objects))
+                paths = {
+                    "fastapi": lambda model=model, public_model=public_model: fastapi_body(
+                        public_model, orm_rows(session, model, page)
+                    ),
+                    "orm": lambda model=model, public_model=public_model: serialize(
+                        list[public_model], orm_rows(session, model, page)
+                    ),
+                    "columns": lambda model=model, public_model=public_model: columns_body(
+                        session, model, public_model, page
+                    ),
+                }
+                result = {"table": model.__tablename__, "page_rows": len(objects), "identical": True}
+                for name, function in paths.items():
+                    result[f"{name}_us_per_row"] = round(
+                        time_per_row(session, function, args.iterations, page_size), 2
+                    )
+                results.append(result)
+        database.DATABASE_ENGINE.dispose()
+        database.READ_ENGINE.dispose()
+
+    for result in results:
+        print(
+            f"{result['table']:>8} ({result['page_rows']} rows, identical bytes): "
+            f"fastapi {result['fastapi_us_per_row']} us/row, orm {result['orm_us_per_row']} us/row, "
+            f"columns {result['columns_us_per_row']} us/row"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import statistics
+
+
+def percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summarize(latencies: list[float], seconds: float) -> dict:
+    """
+    Summarize request latencies in seconds as throughput and p50/p95/p99 in milliseconds.
+    """
+    return {
+        "requests": len(latencies),
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 1) if seconds else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
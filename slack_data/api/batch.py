@@ -0,0 +1,179 @@
+import json
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, SQLModel, select
+
+from slack_data.models.batch import BatchItemResult, BatchResult
+from slack_data.models.brands import Brand
+
+
+def _validation_errors(error: ValidationError) -> list[dict[str, Any]]:
+    return json.loads(error.json(include_url=False))
+
+
+def _error(error_type: str, loc: list[str | int], msg: str) -> list[dict[str, Any]]:
+    return [{"type": error_type, "loc": loc, "msg": msg}]
+
+
+def _missing_brands(session: Session, brand_ids: set[int]) -> set[int]:
+    if not brand_ids:
+        return set()
+    existing = session.exec(select(Brand.id).where(Brand.id.in_(brand_ids))).all()
+    return brand_ids - set(existing)
+
+
+def _write(
+    session: Session,
+    results: list[BatchItemResult],
+    pending: list[tuple[BatchItemResult, Callable[[], SQLModel]]],
+    atomic: bool,
+) -> tuple[BatchResult, list[SQLModel]]:
+    """
+    Write every pending item in its own savepoint, then commit them in one transaction.
+    """
+    rows = []
+    for result, write in pending:
+        try:
+            with session.begin_nested():
+                row = write()
+                session.flush()
+        except SQLAlchemyError as error:
+            result.errors = _error("database_error", [], str(getattr(error, "orig", error)))
+            continue
+        result.id = row.id
+        rows.append((result, row))
+
+    failed = sum(result.errors is not None for result in results)
+    if atomic and failed:
+        session.rollback()
+        for result, _ in rows:
+            result.id = None
+        rows = []
+    else:
+        # Keep the written rows loaded, they're used to update the caches after the commit
+        expire_on_commit = session.expire_on_commit
+        session.expire_on_commit = False
+        try:
+            session.commit()
+        finally:
+            session.expire_on_commit = expire_on_commit
+
+    batch = BatchResult(succeeded=len(rows), failed=failed, items=results)
+    return batch, [row for _, row in rows]
+
+
+def create_batch(
+    session: Session,
+    model: type[SQLModel],
+    create_model: type[SQLModel],
+    items: list[dict[str, Any]],
+    atomic: bool = False,
+    build: Callable[[SQLModel], SQLModel] | None = None,
+) -> tuple[BatchResult, list[SQLModel]]:
+    """
+    Validate and insert many items in one transaction, reporting errors per item.
+
+    Items that fail validation, reference a missing brand or fail to insert are
+    reported and skipped, unless `atomic` is set, in which case nothing is written
+    if any item fails. `build` turns a validated item into a row, by default with
+    `model.model_validate`. Returns the result and the inserted rows.
+    """
+    build = build or model.model_validate
+    results = [BatchItemResult(index=index) for index in range(len(items))]
+    validated = []
+    for result, item in zip(results, items):
+        try:
+            validated.append((result, create_model.model_validate(item)))
+        except ValidationError as error:
+            result.errors = _validation_errors(error)
+
+    missing_brands = set()
+    if "brand_id" in create_model.model_fields:
+        missing_brands = _missing_brands(session, {item.brand_id for _, item in validated})
+
+    pending = []
+    for result, item in validated:
+        if getattr(item, "brand_id", None) in missing_brands:
+            result.errors = _error("not_found", ["brand_id"], f"brand {item.brand_id} not found")
+            continue
+
+        def write(item=item):
+            row = build(item)
+            session.add(row)
+            return row
+
+        pending.append((result, write))
+
+    return _write(session, results, pending, atomic)
+
+
+def update_batch(
+    session: Session,
+    model: type[SQLModel],
+    update_model: type[SQLModel],
+    items: list[dict[str, Any]],
+    atomic: bool = False,
+    apply: Callable[[SQLModel, SQLModel], None] | None = None,
+    options: list | None = None,
+) -> tuple[BatchResult, list[tuple[SQLModel, int | None]]]:
+    """
+    Validate and apply many partial updates in one transaction, reporting errors per item.
+
+    Every item is an update with the `id` of the row to change. The rows are loaded
+    with a single `IN` query, using the loader `options`. `apply` sets the validated update on a row, by default
+    every field that was set. Returns the result and the updated rows, each with its
+    brand id from before the update (or None if it has no brand).
+    """
+    def apply_fields(row: SQLModel, update: SQLModel) -> None:
+        for key, value in update.model_dump(exclude_unset=True).items():
+            setattr(row, key, value)
+
+    apply = apply or apply_fields
+    results = [BatchItemResult(index=index) for index in range(len(items))]
+    validated = []
+    for result, item in zip(results, items):
+        item = dict(item)
+        row_id = item.pop("id", None)
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            result.errors = _error("missing", ["id"], "every item needs the integer id of the row to update")
+            continue
+        try:
+            validated.append((result, row_id, update_model.model_validate(item)))
+        except ValidationError as error:
+            result.errors = _validation_errors(error)
+
+    ids = {row_id for _, row_id, _ in validated}
+    rows = {}
+    if ids:
+        statement = select(model).where(model.id.in_(ids)).options(*(options or []))
+        rows = {row.id: row for row in session.exec(statement)}
+    new_brands = {
+        update.brand_id for _, _, update in validated
+        if "brand_id" in update.model_fields_set and update.brand_id is not None
+    }
+    missing_brands = _missing_brands(session, new_brands)
+
+    old_brand_ids = {}
+    pending = []
+    for result, row_id, update in validated:
+        row = rows.get(row_id)
+        if row is None:
+            result.errors = _error("not_found", ["id"], f"{model.__tablename__} {row_id} not found")
+            continue
+        if "brand_id" in update.model_fields_set and update.brand_id in missing_brands:
+            result.errors = _error("not_found", ["brand_id"], f"brand {update.brand_id} not found")
+            continue
+        old_brand_ids[row_id] = getattr(row, "brand_id", None)
+
+        def write(row=row, update=update):
+            apply(row, update)
+            session.add(row)
+            return row
+
+        pending.append((result, write))
+
+    batch, updated = _write(session, results, pending, atomic)
+    return batch, [(row, old_brand_ids[row.id]) for row in updated]
@@ -0,0 +1,29 @@
+from sqlmodel import SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+from slack_data.models.filters import PAGE_FIELDS, ListFilters
+
+
+def apply_filters(
+    statement: SelectOfScalar, model: type[SQLModel], filters: ListFilters
+) -> SelectOfScalar:
+    """
+    Add a WHERE clause for every filter that was set.
+
+    `min_<field>` and `max_<field>` become inclusive range conditions on `<field>`,
+    lists become `IN` conditions and other values become equality conditions.
+    """
+    for key, value in filters.model_dump(exclude=PAGE_FIELDS, exclude_none=True).items():
+        if key == "ids":
+            if value:
+                statement = statement.where(model.id.in_(value))
+        elif key.startswith("min_"):
+            statement = statement.where(getattr(model, key[4:]) >= value)
+        elif key.startswith("max_"):
+            statement = statement.where(getattr(model, key[4:]) <= value)
+        elif isinstance(value, list):
+            if value:
+                statement = statement.where(getattr(model, key).in_(value))
+        else:
+            statement = statement.where(getattr(model, key) == value)
+    return statement
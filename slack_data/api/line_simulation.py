@@ -0,0 +1,119 @@
+"""
+Static sag and tension of slacklines, for many webbings and gap lengths at once.
+
+A line of length `L` is tensioned to the pretension `T0` while straight, which fixes its
+unloaded length `L0 = L / (1 + stretch(T0))`. A slackliner standing in the middle pulls it
+into a V with sag `s`. Treating both halves as straight, with the webbing's own weight `w`
+(N/m) spread along them, balancing the moments about an anchor gives the horizontal force
+
+    H = (P * L / 4 + w * L² / 8) / s
+
+and the vertical force at each anchor is `V = P / 2 + w * L / 2`, for a slackliner weight `P`.
+The peak tension, at the anchors, is `T = sqrt(H² + V²)`. The sag is the one where the two
+halves have exactly the stretched length of the webbing at that tension:
+
+    2 * sqrt((L / 2)² + s²) = L0 * (1 + stretch(T))
+
+The left side grows with `s` while the right side shrinks (less sag means more tension and
+stretch), so the sag is found by bisection, on a matrix of every webbing and length at once.
+"""
+import math
+
+import numpy as np
+
+GRAVITY = 9.81 # m/s²
+SAG_TOLERANCE_M = 0.001
+MAX_SIMULATION_CELLS = 500_000 # webbing and length pairs simulated by one request
+
+
+def fill_curves(curves: np.ndarray, grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fill the NaN ends of stretch curves resampled on `grid`, so they can be read at any load.
+
+    Below its first measured load a curve runs linearly from no stretch at 0 kN, above its
+    last one it continues with the slope of its last grid step. Returns the filled curves
+    and the highest measured load (kN) of each, beyond which results are extrapolated.
+    Every curve needs at least one measured point.
+    """
+    measured = ~np.isnan(curves)
+    columns = np.arange(len(grid))
+    first = measured.argmax(axis=1)
+    last = len(grid) - 1 - measured[:, ::-1].argmax(axis=1)
+    rows = np.arange(len(curves))
+
+    first_kn, first_percent = grid[first], curves[rows, first]
+    last_percent = curves[rows, last]
+    previous_percent = np.where(last > 0, curves[rows, np.maximum(last - 1, 0)], np.nan)
+    step_kn = grid[1] - grid[0]
+    slope = (last_percent - previous_percent) / step_kn
+    # A curve measured at a single load continues with its average slope from 0 kN
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average_slope = np.where(grid[last] > 0, last_percent / grid[last], 0.0)
+    slope = np.where(np.isnan(slope), average_slope, slope)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        before = np.where(first_kn[:, None] > 0, first_percent[:, None] * grid / first_kn[:, None], 0.0)
+    after = last_percent[:, None] + slope[:, None] * (grid - grid[last][:, None])
+    filled = np.where(columns < first[:, None], before, curves)
+    filled = np.where(columns > last[:, None], after, filled)
+    return filled, grid[last]
+
+
+def stretch_at(filled: np.ndarray, step_kn: float, tensions: np.ndarray) -> np.ndarray:
+    """
+    Interpolate the stretch (fraction, not %) of each filled curve at a row of tensions (kN).
+
+    `tensions` has one row per curve. Loads past the end of the grid are extrapolated
+    with the slope of its last step.
+    """
+    position = tensions / step_kn
+    low = np.clip(np.floor(position).astype(np.int64), 0, filled.shape[1] - 2)
+    fraction = position - low
+    percent_low = np.take_along_axis(filled, low, axis=1)
+    percent_high = np.take_along_axis(filled, low + 1, axis=1)
+    return (percent_low + fraction * (percent_high - percent_low)) / 100
+
+
+def simulate_sag(
+    filled: np.ndarray,
+    step_kn: float,
+    weights: np.ndarray,
+    lengths: np.ndarray,
+    pretension_kn: float,
+    load_kg: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the sag (m) and peak tension (kN) of every filled curve at every line length.
+
+    `weights` are the webbings' weights in g/m, unknown (NaN) weights count as weightless.
+    Returns two arrays of shape (webbings, lengths).
+    """
+    count = len(filled)
+    length = np.broadcast_to(lengths.astype(float), (count, len(lengths)))
+    line_weight = np.nan_to_num(weights, nan=0.0)[:, None] / 1000 * GRAVITY # N/m
+    point_load = load_kg * GRAVITY # N
+
+    pretension = np.full((count, 1), float(pretension_kn))
+    unloaded = length / (1 + stretch_at(filled, step_kn, pretension))
+    moment = point_load * length / 4 + line_weight * length**2 / 8
+    vertical = point_load / 2 + line_weight * length / 2
+
+    vertical_squared = vertical**2
+    span_squared = length**2
+
+    def tension_kn(sag: np.ndarray) -> np.ndarray:
+        return np.sqrt((moment / sag) ** 2 + vertical_squared) / 1000
+
+    low = np.zeros_like(length)
+    high = length.copy() # the halves are then longer than any webbing stretches to
+    iterations = math.ceil(math.log2(max(float(lengths.max(initial=1.0)), 1.0) / SAG_TOLERANCE_M)) + 1
+    for _ in range(iterations):
+        sag = (low + high) / 2
+        stretched = unloaded * (1 + stretch_at(filled, step_kn, tension_kn(sag)))
+        # Same as `2 * sqrt((L / 2)² + s²) < stretched`, without a square root per iteration
+        too_short = span_squared + 4 * sag**2 < stretched**2
+        low = np.where(too_short, sag, low)
+        high = np.where(too_short, high, sag)
+
+    sag = (low + high) / 2
+    return sag, tension_kn(sag)
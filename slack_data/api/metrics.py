@@ -0,0 +1,205 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the histogram buckets, Prometheus adds +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Label for requests that matched no route, so unknown paths can't grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+
+@dataclass
+class RequestStats:
+    """
+    SQL statements run for the current request, counted by the engine event hooks.
+    """
+    queries: int = 0
+    sql_seconds: float = 0.0
+
+
+_REQUEST_STATS: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    start = connection.info["query_start"].pop()
+    stats = _REQUEST_STATS.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - start
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count the statements an engine runs, and their time, towards the current request.
+
+    The stats live in a context variable, which is copied into the threadpool and shared
+    with the greenlets of an `AsyncSession`, so queries are counted however a handler runs.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int] = field(init=False)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _labels(labels: dict[str, object]) -> str:
+    def escape(value: object) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+class Metrics:
+    """
+    Per route request latency, status and SQL statistics, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._latency: dict[tuple[str, str], Histogram] = {}
+        self._queries: dict[tuple[str, str], Histogram] = {}
+        self._sql_seconds: dict[tuple[str, str], float] = {}
+        self._responses: dict[tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._queries[key] = Histogram(QUERY_BUCKETS)
+                self._sql_seconds[key] = 0.0
+            latency.observe(seconds)
+            self._queries[key].observe(stats.queries)
+            self._sql_seconds[key] += stats.sql_seconds
+            response_key = (method, route, status)
+            self._responses[response_key] = self._responses.get(response_key, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._queries.clear()
+            self._sql_seconds.clear()
+            self._responses.clear()
+
+    def render(self) -> str:
+        lines = []
+
+        def histogram(name: str, help: str, histograms: dict[tuple[str, str], Histogram]) -> None:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), values in sorted(histograms.items()):
+                labels = {"method": method, "route": route}
+                cumulative = 0
+                for bound, count in zip((*values.buckets, "+Inf"), values.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{{{_labels({**labels, 'le': bound})}}} {cumulative}")
+                lines.append(f"{name}_sum{{{_labels(labels)}}} {values.total}")
+                lines.append(f"{name}_count{{{_labels(labels)}}} {values.count}")
+
+        with self._lock:
+            lines.append("# HELP slackdata_requests_total Responses sent, by route and status.")
+            lines.append("# TYPE slackdata_requests_total counter")
+            for (method, route, status), count in sorted(self._responses.items()):
+                labels = _labels({"method": method, "route": route, "status": status})
+                lines.append(f"slackdata_requests_total{{{labels}}} {count}")
+            histogram(
+                "slackdata_request_duration_seconds",
+                "Time until the response started, by route.",
+                self._latency,
+            )
+            histogram(
+                "slackdata_request_sql_queries",
+                "SQL statements run per request, by route.",
+                self._queries,
+            )
+            lines.append("# HELP slackdata_request_sql_seconds_total Time spent running SQL, by route.")
+            lines.append("# TYPE slackdata_request_sql_seconds_total counter")
+            for (method, route), seconds in sorted(self._sql_seconds.items()):
+                lines.append(
+                    f"slackdata_request_sql_seconds_total{{{_labels({'method': method, 'route': route})}}} {seconds}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times each request by route template and counts its SQL statements.
+
+    The totals up to the start of the response are added as a `Server-Timing` header, and
+    recorded in `METRICS` for the `/metrics` endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _REQUEST_STATS.set(stats)
+        start = time.perf_counter()
+        started = False
+
+        def observe(status: int) -> float:
+            seconds = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            METRICS.observe(scope["method"], route, status, seconds, stats)
+            return seconds
+
+        async def send_with_timing(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                seconds = observe(message["status"])
+                timing = (
+                    f"app;dur={seconds * 1000:.2f}, "
+                    f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries"'
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            if not started: # The server error middleware outside this one sends the 500
+                observe(500)
+            raise
+        finally:
+            _REQUEST_STATS.reset(token)
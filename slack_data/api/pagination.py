@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+from slack_data.models.filters import PageParams
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def sort_key(page: PageParams) -> str:
+    """
+    Get the sort key a cursor is tied to, like `name` or `-weight` for descending order.
+    """
+    return f"-{page.sort}" if page.descending else page.sort
+
+
+def encode_cursor(sort: str, sort_value: Any, row_id: int) -> str:
+    """
+    Encode the position after a row as an opaque cursor string.
+    """
+    payload = json.dumps([sort, sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    """
+    Decode a cursor created by `encode_cursor`, returning the sort value and id it points after.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort or not isinstance(row_id, int):
+        raise HTTPException(status_code=400, detail=f"Cursor does not match sort '{sort}'")
+    return sort_value, row_id
+
+
+def after_cursor(
+    sort_column: Any, id_column: Any, sort_value: Any, row_id: int, descending: bool
+) -> ColumnElement[bool]:
+    """
+    Build the keyset condition for rows after `(sort_value, row_id)`.
+
+    SQLite sorts NULLs first in ascending order and last in descending order,
+    which matches how the indexes are walked, so NULL sort values are handled
+    explicitly instead of breaking the row value comparison.
+    """
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < row_id)
+        return or_(
+            tuple_(sort_column, id_column) < tuple_(sort_value, row_id),
+            sort_column.is_(None),
+        )
+
+    if sort_value is None:
+        return or_(
+            and_(sort_column.is_(None), id_column > row_id),
+            sort_column.is_not(None),
+        )
+    return tuple_(sort_column, id_column) > tuple_(sort_value, row_id)
+
+
+def paginate(
+    statement: SelectOfScalar, model: type[SQLModel], page: PageParams
+) -> SelectOfScalar:
+    """
+    Order a statement by `(page.sort, id)` and restrict it to one page.
+
+    With a cursor the page starts right after the cursor row using a keyset condition,
+    so deep pages are an index range scan rather than an ever growing offset.
+    Without one, `page.offset` is used as a fallback.
+    """
+    sort_column = getattr(model, page.sort)
+    id_column = model.id
+    if page.descending:
+        statement = statement.order_by(sort_column.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(sort_column, id_column)
+
+    if page.cursor is not None:
+        sort_value, row_id = decode_cursor(page.cursor, sort_key(page))
+        statement = statement.where(
+            after_cursor(sort_column, id_column, sort_value, row_id, page.descending)
+        )
+    else:
+        statement = statement.offset(page.offset)
+
+    return statement.limit(page.limit)
+
+
+def set_next_cursor(response: Response, rows: list[Any], page: PageParams) -> None:
+    """
+    Set the `X-Next-Cursor` header when the page is full and more rows may follow.
+    """
+    if rows and len(rows) == page.limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            sort_key(page), getattr(last, page.sort), last.id
+        )
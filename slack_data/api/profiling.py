@@ -0,0 +1,201 @@
+"""
+Opt-in profiling of single requests with cProfile.
+
+A request is profiled when it carries the admin token, in the `X-Profile-Token` header or
+the `profile_token` query parameter, or when it's picked by `Settings.profile_sample_rate`.
+Profiling is off unless `Settings.profile_token` is set. The profile is written to
+`Settings.profile_dir` and its download path is sent in the `X-Profile` response header.
+
+Only one request is profiled at a time. Its database work still runs on the threadpool:
+`RequestProfile.run_in_threadpool` pauses the request's event loop profiler and profiles the
+call inside the worker thread, and both profiles are merged when the request ends. So the
+handler and everything it calls (SQLAlchemy, pydantic validation, computed fields) end up in
+the profile, without holding up other requests. Work of other requests running at the same
+time can show up in the profile too.
+"""
+import cProfile
+import hmac
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TypeVar
+from urllib.parse import parse_qs
+
+from fastapi.concurrency import run_in_threadpool
+
+from slack_data.settings import SETTINGS, Settings
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_QUERY_PARAM = "profile_token"
+PROFILE_SUFFIX = ".prof"
+PROFILES_PATH = "/profiles" # Downloading profiles isn't profiled
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.prof$")
+
+T = TypeVar("T")
+
+_PROFILE_LOCK = threading.Lock()
+
+
+class RequestProfile:
+    """
+    The profiles of one request: its event loop profiler, and one per call it ran on the threadpool.
+    """
+
+    def __init__(self, profiler: cProfile.Profile):
+        self.profiler = profiler
+        self.worker_profilers: list[cProfile.Profile] = []
+        self._running_calls = 0
+
+    async def run_in_threadpool(self, function: Callable[[], T]) -> T:
+        """
+        Run `function` on the threadpool, profiled in its worker thread.
+
+        The event loop profiler is paused meanwhile, as only one profiler can be active in
+        the process on Python 3.12 and later, and so as not to profile other requests.
+        """
+        if self._running_calls == 0:
+            self.profiler.disable()
+        self._running_calls += 1
+        try:
+            return await run_in_threadpool(self._profile_call, function)
+        finally:
+            self._running_calls -= 1
+            if self._running_calls == 0:
+                self.profiler.enable()
+
+    def _profile_call(self, function: Callable[[], T]) -> T:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError: # Another call of the request is being profiled at the same time
+            return function()
+        try:
+            return function()
+        finally:
+            profiler.disable()
+            self.worker_profilers.append(profiler)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profiler)
+        for profiler in self.worker_profilers:
+            stats.add(profiler)
+        return stats
+
+
+_PROFILE: ContextVar[RequestProfile | None] = ContextVar("profile", default=None)
+
+
+def current_profile() -> RequestProfile | None:
+    """
+    Get the profile of the current request, None when it isn't being profiled.
+    """
+    return _PROFILE.get()
+
+
+def has_profile_token(scope, settings: Settings = SETTINGS) -> bool:
+    """
+    Check the admin token of a request, from its header or query string.
+    """
+    if not settings.profile_token:
+        return False
+    tokens = [value.decode() for key, value in scope.get("headers", []) if key == PROFILE_HEADER.encode()]
+    tokens += parse_qs(scope.get("query_string", b"").decode()).get(PROFILE_QUERY_PARAM, [])
+    return any(hmac.compare_digest(token, settings.profile_token) for token in tokens)
+
+
+def profile_name(scope) -> str:
+    route = getattr(scope.get("route"), "path", scope["path"])
+    slug = re.sub(r"[^\w]+", "_", route).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+
+
+def profile_path(name: str, settings: Settings = SETTINGS) -> Path | None:
+    """
+    Get the file of a saved profile, or None if there is no such profile.
+    """
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = Path(settings.profile_dir) / name
+    return path if path.is_file() else None
+
+
+def list_profiles(settings: Settings = SETTINGS) -> list[Path]:
+    """
+    Get the saved profiles, newest first.
+    """
+    directory = Path(settings.profile_dir)
+    if not directory.is_dir():
+        return []
+    profiles = [path for path in directory.iterdir() if path.suffix == PROFILE_SUFFIX]
+    return sorted(profiles, key=lambda path: path.stat().st_mtime, reverse=True)
+
+
+def save_profile(profile: RequestProfile, name: str, settings: Settings = SETTINGS) -> None:
+    """
+    Write a profile in the `pstats` format, then delete the oldest beyond `Settings.profile_keep`.
+    """
+    directory = Path(settings.profile_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    profile.stats().dump_stats(directory / name)
+    for path in list_profiles(settings)[settings.profile_keep:]:
+        path.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests asked for with the admin token, or sampled.
+    """
+
+    def __init__(self, app, settings: Settings = SETTINGS):
+        self.app = app
+        self.settings = settings
+
+    def should_profile(self, scope) -> bool:
+        if scope["type"] != "http" or not self.settings.profile_token:
+            return False
+        if scope["path"].startswith(PROFILES_PATH):
+            return False
+        if has_profile_token(scope, self.settings):
+            return True
+        return random.random() < self.settings.profile_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        # Requests that want a profile while another one runs are served without one
+        if not self.should_profile(scope) or not _PROFILE_LOCK.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError: # Another profiler is already active in this process
+            _PROFILE_LOCK.release()
+            await self.app(scope, receive, send)
+            return
+        name = None
+
+        async def send_with_profile(message):
+            nonlocal name
+            if message["type"] == "http.response.start":
+                name = profile_name(scope)
+                message["headers"] = [
+                    *message.get("headers", []), (b"x-profile", f"{PROFILES_PATH}/{name}".encode())
+                ]
+            await send(message)
+
+        profile = RequestProfile(profiler)
+        token = _PROFILE.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.disable()
+            _PROFILE.reset(token)
+            _PROFILE_LOCK.release()
+        if name is not None:
+            await run_in_threadpool(save_profile, profile, name, self.settings)
@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, Any
+from urllib.parse import urlencode
+
+from fastapi import Depends, Request, Response
+from pydantic import TypeAdapter
+
+CACHE_MAX_ENTRIES = 2048
+CACHE_TTL_SECONDS = 300.0
+
+# Headers describing the body that is sent, set by the final response itself
+_BODY_HEADERS = {"content-length", "content-type"}
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    headers: dict[str, str]
+    tags: frozenset[str]
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized JSON responses with a TTL.
+
+    Entries are tagged with the rows they contain, and mutating handlers invalidate
+    those tags after they commit:
+
+    - `<entity>` for list responses of a table, e.g. `webbing`
+    - `<entity>:<id>` for responses containing a single row, e.g. `webbing:5`
+    - `brand:<id>` for any response showing that brand's name, e.g. `brand_name`
+    - `brand-products:<id>` for brand responses listing that brand's products
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._tag_keys: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        headers: dict[str, str],
+        tags: Iterable[str],
+        generation: int,
+    ) -> None:
+        """
+        Store a response, unless something was invalidated since it was read (`generation`).
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            entry = CacheEntry(body, headers, frozenset(tags), time.monotonic() + self.ttl_seconds)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags: str) -> None:
+        """
+        Drop every entry carrying one of the tags.
+        """
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tag_keys.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tag_keys.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+@lru_cache
+def get_type_adapter(model_type: Any) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+def serialize(model_type: Any, content: Any) -> bytes:
+    """
+    Serialize content to JSON the way FastAPI does for a `response_model`.
+    """
+    adapter = get_type_adapter(model_type)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def _copy_headers(response: Response) -> dict[str, str]:
+    return {
+        key: value for key, value in response.headers.items()
+        if key not in _BODY_HEADERS
+    }
+
+
+class CacheHit(Exception):
+    """
+    Raised by `read_through_cache` to answer a request from the cache.
+    """
+
+    def __init__(self, response: Response):
+        self.response = response
+
+
+class CachedRequest:
+    """
+    Stores the response of the current request in the cache once it's computed.
+    """
+
+    def __init__(self, key: str, response: Response, generation: int):
+        self.key = key
+        self.response = response
+        self.generation = generation
+
+    def store(self, model_type: Any, content: Any, tags: Iterable[str]) -> Response:
+        """
+        Serialize `content` as `model_type`, cache it under `tags` and return the response.
+        """
+        return self.store_body(serialize(model_type, content), tags)
+
+    def store_body(self, body: bytes, tags: Iterable[str]) -> Response:
+        """
+        Cache an already serialized JSON body under `tags` and return the response.
+        """
+        headers = _copy_headers(self.response)
+        # The ETag depends on the current revisions, so it's set again on every hit
+        cached_headers = {key: value for key, value in headers.items() if key != "etag"}
+        RESPONSE_CACHE.set(self.key, body, cached_headers, tags, self.generation)
+        return Response(body, media_type="application/json", headers=headers)
+
+
+async def read_through_cache(request: Request, response: Response) -> CachedRequest:
+    """
+    Dependency that answers the request from the cache, or lets the handler store its result.
+    """
+    generation = RESPONSE_CACHE.generation
+    query = urlencode(sorted(request.query_params.multi_items()))
+    # Writes by other workers or processes can't invalidate entries, so they're only used
+    # while the revisions of the tables they read (see `revisions.conditional_get`) are unchanged
+    revisions = getattr(request.state, "revisions", None)
+    key = f"{request.url.path}?{query}#{revisions}"
+
+    entry = RESPONSE_CACHE.get(key)
+    if entry is not None:
+        headers = {**entry.headers, **_copy_headers(response)}
+        raise CacheHit(Response(entry.body, media_type="application/json", headers=headers))
+    return CachedRequest(key, response, generation)
+
+
+def cache_hit_handler(request: Request, exc: CacheHit) -> Response:
+    return exc.response
+
+
+CacheDep = Annotated[CachedRequest, Depends(read_through_cache)]
@@ -0,0 +1,125 @@
+import hashlib
+import sqlite3
+import threading
+
+from fastapi import Depends, Request, Response
+
+from slack_data.models.revisions import REVISION_TABLE
+from slack_data.settings import Settings
+
+# Tables whose data shows up in the responses of each entity, e.g. webbings include `brand_name`
+# and brands include the names of their products
+ENTITY_TABLES = {
+    "brand": ("brand", "webbing", "roller", "weblock"),
+    "webbing": ("webbing", "brand"),
+    "roller": ("roller", "brand"),
+    "weblock": ("weblock", "brand"),
+    "search": ("brand", "webbing", "roller", "weblock"),
+    "compatible": ("webbing", "roller", "weblock", "brand"),
+    "stats": ("webbing", "roller", "weblock", "brand"),
+}
+
+
+class RevisionReader:
+    """
+    Reads the revision counters that triggers bump in the `table_revision` table.
+
+    The counters live in the database, so writes from other workers and from the command
+    line loaders are seen too. A dedicated connection asks SQLite for its `data_version`,
+    which changes whenever another connection commits, and only reads the table again
+    then, so a check costs a few microseconds and can run on the event loop.
+    """
+
+    def __init__(self):
+        self._connection: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._revisions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def open(self, settings: Settings) -> None:
+        with self._lock:
+            self._close()
+            self._connection = sqlite3.connect(
+                settings.database_path, check_same_thread=False, isolation_level=None
+            )
+            self._connection.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)}")
+            self._connection.execute("PRAGMA query_only = ON")
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+        self._data_version = None
+        self._revisions = {}
+
+    def read(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        with self._lock:
+            if self._connection is None:
+                raise RuntimeError("Revisions not opened. Call `create_db_and_tables` first.")
+            (data_version,) = self._connection.execute("PRAGMA data_version").fetchone()
+            if data_version != self._data_version:
+                self._revisions = dict(
+                    self._connection.execute(f"SELECT name, revision FROM {REVISION_TABLE}").fetchall()
+                )
+                self._data_version = data_version
+            return tuple(self._revisions[table] for table in tables)
+
+
+REVISIONS = RevisionReader()
+
+
+class NotModified(Exception):
+    """
+    Raised by `conditional_get` when the client's cached copy is still current.
+    """
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def get_revisions(tables: tuple[str, ...]) -> tuple[int, ...]:
+    return REVISIONS.read(tables)
+
+
+def revision_etag(request: Request, revisions: tuple[int, ...]) -> str:
+    """
+    Build a strong ETag from the request URL and the revisions of the tables it reads.
+    """
+    key = f"{revisions}:{request.url.path}?{request.url.query}"
+    return f'"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def conditional_get(entity: str):
+    """
+    Dependency that answers `If-None-Match` requests with `304 Not Modified`.
+
+    The ETag only depends on the URL and the revision counters, so a matching request is
+    answered before the handler runs any SQL or serializes anything. The revisions are kept
+    in `request.state.revisions` for the response cache.
+    """
+    tables = ENTITY_TABLES[entity]
+
+    async def check_etag(request: Request, response: Response) -> None:
+        revisions = get_revisions(tables)
+        request.state.revisions = revisions
+        etag = revision_etag(request, revisions)
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            raise NotModified(etag)
+        response.headers["ETag"] = etag
+
+    return Depends(check_etag)
+
+
+def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag})
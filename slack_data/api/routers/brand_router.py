@@ -1,9 +1,20 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, Path
-from sqlmodel import select
+from typing import Annotated, Any
+from fastapi import APIRouter, Body, HTTPException, Query, Path, Response
+from sqlalchemy import literal, union_all
+from sqlmodel import Session, select
 
-from slack_data.database import SessionDep
-from slack_data.models.brands import Brand, BrandCreate, BrandPublic, BrandUpdate
+from slack_data.api.batch import create_batch, update_batch
+from slack_data.api.filters import apply_filters
+from slack_data.api.pagination import paginate, set_next_cursor
+from slack_data.api.response_cache import RESPONSE_CACHE, CacheDep
+from slack_data.api.revisions import conditional_get
+from slack_data.database import DatabaseDep, ReadDatabaseDep
+from slack_data.models.batch import MAX_BATCH_SIZE, BatchResult
+from slack_data.models.brands import BaseBrands, Brand, BrandCreate, BrandPublic, BrandUpdate
+from slack_data.models.filters import ListFilters
+from slack_data.models.rollers import Roller
+from slack_data.models.webbing import Webbing
+from slack_data.models.weblocks import Weblock
 
 brand_router = APIRouter(
     prefix="/brand",
@@ -11,57 +22,156 @@ brand_router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+def get_brand_products(session: Session, brand_ids: list[int]) -> dict[int, dict[str, list[str]]]:
+    """
+    Get the webbing, weblock and roller names for each brand in a single query.
+    """
+    products = {
+        brand_id: {"webbings": [], "weblocks": [], "rollers": []} for brand_id in brand_ids
+    }
+    if not brand_ids:
+        return products
+
+    statement = union_all(
+        *(
+            select(model.brand_id, literal(category).label("category"), model.name, model.id)
+            .where(model.brand_id.in_(brand_ids))
+            for model, category in ((Webbing, "webbings"), (Weblock, "weblocks"), (Roller, "rollers"))
+        )
+    ).order_by("brand_id", "id")
+    for brand_id, category, name, _ in session.execute(statement):
+        products[brand_id][category].append(name)
+    return products
+
+def to_brand_public(session: Session, brands: list[Brand]) -> list[BrandPublic]:
+    """
+    Build the public brand models, aggregating product names instead of walking each relationship.
+    """
+    products = get_brand_products(session, [brand.id for brand in brands])
+    return [
+        BrandPublic(**brand.model_dump(include=set(BaseBrands.model_fields)), **products[brand.id])
+        for brand in brands
+    ]
+
 @brand_router.post("/", response_model=BrandPublic)
-def create_brand(brand: BrandCreate, session: SessionDep):
-    db_brand = Brand.model_validate(brand)
-    session.add(db_brand)
-    session.commit()
-    session.refresh(db_brand)
-    return db_brand
-
-@brand_router.get("/", response_model=list[BrandPublic])
-def read_brands(
-    session: SessionDep,
-    offset: Annotated[int, Query(ge=0)] = 0,
-    limit: Annotated[int, Query(le=100)] = 10,
+async def create_brand(brand: BrandCreate, db: DatabaseDep):
+    def create(session: Session):
+        db_brand = Brand.model_validate(brand)
+        session.add(db_brand)
+        session.commit()
+        RESPONSE_CACHE.invalidate("brand")
+        session.refresh(db_brand)
+        return to_brand_public(session, [db_brand])[0]
+
+    return await db.run(create)
+
+@brand_router.post("/batch", response_model=BatchResult)
+async def create_brands(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
+):
+    """
+    Create many brands in one transaction, reporting errors per item.
+
+    With `atomic` nothing is created if any item fails.
+    """
+    def create(session: Session):
+        result, brands = create_batch(session, Brand, BrandCreate, items, atomic)
+        if brands:
+            RESPONSE_CACHE.invalidate("brand")
+        return result
+
+    return await db.run(create)
+
+@brand_router.patch("/batch", response_model=BatchResult)
+async def update_brands(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
 ):
-    heroes = session.exec(
-        select(Brand).offset(offset).limit(limit)
-    ).all()
-    return heroes
-
-@brand_router.get("/{brand_id}", response_model=BrandPublic)
-def read_brand(brand_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    brand = session.get(Brand, brand_id)
-    if not brand:
-        raise HTTPException(status_code=404, detail=f"brand {brand_id} not found")
-    return brand
+    """
+    Update many brands in one transaction, reporting errors per item.
+
+    Every item holds the `id` of the brand and the fields to change.
+    With `atomic` nothing is updated if any item fails.
+    """
+    def update(session: Session):
+        result, updated = update_batch(session, Brand, BrandUpdate, items, atomic)
+        if updated:
+            RESPONSE_CACHE.invalidate("brand", *(f"brand:{brand.id}" for brand, _ in updated))
+        return result
+
+    return await db.run(update)
+
+@brand_router.get(
+    "/",
+    response_model=list[BrandPublic],
+    dependencies=[conditional_get("brand")],
+)
+async def read_brands(
+    db: ReadDatabaseDep,
+    response: Response,
+    cache: CacheDep,
+    filters: Annotated[ListFilters, Query()],
+):
+    def read(session: Session):
+        statement = apply_filters(select(Brand), Brand, filters)
+        brands = session.exec(paginate(statement, Brand, filters)).all()
+        set_next_cursor(response, brands, filters)
+        tags = {"brand", *(f"brand-products:{brand.id}" for brand in brands)}
+        return cache.store(list[BrandPublic], to_brand_public(session, list(brands)), tags)
+
+    return await db.run(read)
+
+@brand_router.get(
+    "/{brand_id}",
+    response_model=BrandPublic,
+    dependencies=[conditional_get("brand")],
+)
+async def read_brand(brand_id: Annotated[int, Path(gt=0)], db: ReadDatabaseDep, cache: CacheDep):
+    def read(session: Session):
+        brand = session.get(Brand, brand_id)
+        if not brand:
+            raise HTTPException(status_code=404, detail=f"brand {brand_id} not found")
+        tags = {f"brand:{brand_id}", f"brand-products:{brand_id}"}
+        return cache.store(BrandPublic, to_brand_public(session, [brand])[0], tags)
+
+    return await db.run(read)
 
 @brand_router.patch("/{brand_id}", response_model=BrandPublic)
-def update_brand(
+async def update_brand(
     brand_id: Annotated[int, Path(gt=0)],
     brand: BrandUpdate,
-    session: SessionDep
+    db: DatabaseDep
 ):
-    db_brand = session.get(Brand, brand_id)
-    if not db_brand:
-        raise HTTPException(status_code=404, detail=f"brand {brand_id} not found")
-    
-    brand_data = brand.model_dump(exclude_unset=True)
-    for key, value in brand_data.items():
-        setattr(db_brand, key, value)
-    
-    session.add(db_brand)
-    session.commit()
-    session.refresh(db_brand)
-    return db_brand
+    def update(session: Session):
+        db_brand = session.get(Brand, brand_id)
+        if not db_brand:
+            raise HTTPException(status_code=404, detail=f"brand {brand_id} not found")
+
+        brand_data = brand.model_dump(exclude_unset=True)
+        for key, value in brand_data.items():
+            setattr(db_brand, key, value)
+
+        session.add(db_brand)
+        session.commit()
+        RESPONSE_CACHE.invalidate("brand", f"brand:{brand_id}")
+        session.refresh(db_brand)
+        return to_brand_public(session, [db_brand])[0]
+
+    return await db.run(update)
 
 @brand_router.delete("/{brand_id}")
-def delete_brand(brand_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    db_brand = session.get(Brand, brand_id)
-    if not db_brand:
-        raise HTTPException(status_code=404, detail=f"brand {brand_id} not found")
-    
-    session.delete(db_brand)
-    session.commit()
+async def delete_brand(brand_id: Annotated[int, Path(gt=0)], db: DatabaseDep):
+    def delete(session: Session):
+        db_brand = session.get(Brand, brand_id)
+        if not db_brand:
+            raise HTTPException(status_code=404, detail=f"brand {brand_id} not found")
+
+        session.delete(db_brand)
+        session.commit()
+        RESPONSE_CACHE.invalidate("brand", f"brand:{brand_id}")
+
+    await db.run(delete)
     return {"ok": True}
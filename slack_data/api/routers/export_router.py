@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import threading
+from collections.abc import Callable, Iterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel
+from starlette.background import BackgroundTask
+
+from slack_data.api.response_cache import get_type_adapter
+from slack_data.api.serialization import public_rows, row_type, select_public
+from slack_data.api.stretch_curves import get_stretch_curves
+from slack_data.database import open_export_session
+from slack_data.models.export import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_MEDIA_TYPES,
+    ExportEntity,
+    ExportFormat,
+)
+from slack_data.models.rollers import Roller, RollerPublic
+from slack_data.models.webbing import Webbing, WebbingPublic
+from slack_data.models.weblocks import Weblock, WeblockPublic
+from slack_data.settings import SETTINGS
+
+export_router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+)
+
+EXPORT_MODELS: dict[ExportEntity, tuple[type[SQLModel], type[SQLModel]]] = {
+    ExportEntity.WEBBING: (Webbing, WebbingPublic),
+    ExportEntity.ROLLER: (Roller, RollerPublic),
+    ExportEntity.WEBLOCK: (Weblock, WeblockPublic),
+}
+
+# One slot per connection of the export pool. When every slot is streaming, more exports are
+# refused with a 503 instead of parking a worker thread until a connection is free.
+EXPORT_SLOTS = threading.BoundedSemaphore(SETTINGS.export_pool_size)
+EXPORT_RETRY_AFTER_SECONDS = 10
+
+def acquire_export_slot() -> Callable[[], None] | None:
+    """
+    Take an export slot without waiting. Returns a function that releases it, safe to call twice.
+    """
+    if not EXPORT_SLOTS.acquire(blocking=False):
+        return None
+    lock = threading.Lock()
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        with lock:
+            if not released:
+                released = True
+                EXPORT_SLOTS.release()
+
+    return release
+
+def release_when_done(content: Iterator, release: Callable[[], None]) -> Iterator:
+    try:
+        yield from content
+    finally:
+        release()
+
+def iter_export_batches(entity: ExportEntity, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list[dict]]:
+    """
+    Yield every row of `entity` as public dicts with their id, `batch_size` rows at a time.
+
+    The rows are read from one cursor in id order, so only a batch is held in memory and the
+    whole export sees a single snapshot of the database.
+    """
+    model, public_model = EXPORT_MODELS[entity]
+    statement = (
+        select_public(model, public_model)
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size)
+    )
+    with open_export_session() as session:
+        for rows in session.execute(statement).partitions():
+            extra = {}
+            if model is Webbing:
+                extra["stretch"] = get_stretch_curves(session, [row.id for row in rows])
+            yield public_rows(public_model, rows, with_id=True, **extra)
+
+def iter_ndjson(entity: ExportEntity) -> Iterator[bytes]:
+    _, public_model = EXPORT_MODELS[entity]
+    adapter = get_type_adapter(row_type(public_model, with_id=True))
+    for rows in iter_export_batches(entity):
+        yield b"".join(adapter.dump_json(row) + b"\n" for row in rows)
+
+def iter_csv(entity: ExportEntity) -> Iterator[str]:
+    """
+    Yield the rows as CSV, with nested values like the stretch curve written as JSON.
+    """
+    _, public_model = EXPORT_MODELS[entity]
+    adapter = get_type_adapter(list[row_type(public_model, with_id=True)])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(["id", *public_model.model_fields])
+    yield flush() # The header goes out before the query runs
+    for rows in iter_export_batches(entity):
+        for row in adapter.dump_python(rows, mode="json"):
+            writer.writerow(
+                json.dumps(value, separators=(",", ":")) if isinstance(value, (list, dict)) else value
+                for value in row.values()
+            )
+        yield flush()
+
+@export_router.get("/{entity}")
+def export(entity: ExportEntity, format: ExportFormat = ExportFormat.NDJSON):
+    """
+    Stream every row of a table as NDJSON or CSV, with brand names joined in.
+
+    Answers 503 while `SLACKDATA_EXPORT_POOL_SIZE` exports are already streaming.
+    """
+    release = acquire_export_slot()
+    if release is None:
+        raise HTTPException(
+            status_code=503,
+            detail="too many exports running, retry later",
+            headers={"Retry-After": str(EXPORT_RETRY_AFTER_SECONDS)},
+        )
+    content = iter_ndjson(entity) if format is ExportFormat.NDJSON else iter_csv(entity)
+    # The background task releases the slot of a response that never started streaming
+    return StreamingResponse(
+        release_when_done(content, release),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity.value}.{format.value}"'},
+        background=BackgroundTask(release),
+    )
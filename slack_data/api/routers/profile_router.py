@@ -0,0 +1,70 @@
+import hmac
+import io
+import pstats
+from datetime import datetime, timezone
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from slack_data.api.profiling import PROFILES_PATH, list_profiles, profile_path
+from slack_data.models.profiles import ProfileInfo
+from slack_data.settings import SETTINGS
+
+# Functions shown in the text rendering of a profile
+TEXT_PROFILE_LINES = 80
+
+
+def require_profile_token(
+    x_profile_token: Annotated[str | None, Header()] = None,
+    profile_token: Annotated[str | None, Query()] = None,
+):
+    """
+    Dependency that only lets requests with the admin token through.
+    """
+    if not SETTINGS.profile_token:
+        raise HTTPException(status_code=404, detail="profiling is disabled")
+    token = x_profile_token or profile_token or ""
+    if not hmac.compare_digest(token, SETTINGS.profile_token):
+        raise HTTPException(status_code=403, detail="invalid profile token")
+
+
+profile_router = APIRouter(
+    prefix=PROFILES_PATH,
+    tags=["profiles"],
+    dependencies=[Depends(require_profile_token)],
+    responses={404: {"description": "Not found"}},
+)
+
+@profile_router.get("/", response_model=list[ProfileInfo])
+def read_profiles():
+    """
+    List the saved request profiles, newest first.
+    """
+    profiles = []
+    for path in list_profiles():
+        stat = path.stat()
+        profiles.append(
+            ProfileInfo(
+                name=path.name,
+                size=stat.st_size,
+                created_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            )
+        )
+    return profiles
+
+@profile_router.get("/{name}")
+def read_profile(name: str, format: Literal["prof", "text"] = "prof"):
+    """
+    Download a profile for `pstats` or snakeviz, or read its slowest calls as text.
+    """
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"profile {name} not found")
+    if format == "prof":
+        return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+    output = io.StringIO()
+    stats = pstats.Stats(str(path), stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TEXT_PROFILE_LINES)
+    return PlainTextResponse(output.getvalue())
@@ -1,9 +1,17 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, Path
-from sqlmodel import select
+from typing import Annotated, Any
+from fastapi import APIRouter, Body, HTTPException, Query, Path, Response
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session
 
-from slack_data.database import SessionDep
-from slack_data.models.rollers import Roller, RollerCreate, RollerPublic, RollerUpdate
+from slack_data.api.batch import create_batch, update_batch
+from slack_data.api.filters import apply_filters
+from slack_data.api.pagination import paginate, set_next_cursor
+from slack_data.api.response_cache import RESPONSE_CACHE, CacheDep
+from slack_data.api.revisions import conditional_get
+from slack_data.api.serialization import public_rows, select_public, serialize_rows
+from slack_data.database import DatabaseDep, ReadDatabaseDep
+from slack_data.models.batch import MAX_BATCH_SIZE, BatchResult
+from slack_data.models.rollers import Roller, RollerCreate, RollerFilters, RollerPublic, RollerUpdate
 
 roller_router = APIRouter(
     prefix="/roller",
@@ -11,57 +19,152 @@ roller_router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-@roller_router.post("/", response_model=RollerPublic)
-def create_roller(roller: RollerCreate, session: SessionDep):
+def build_roller(roller: RollerCreate) -> Roller:
     db_roller = Roller.model_validate(roller)
-    session.add(db_roller)
-    session.commit()
-    session.refresh(db_roller)
+    db_roller.set_width_range()
     return db_roller
 
-@roller_router.get("/", response_model=list[RollerPublic])
-def read_rollers(
-    session: SessionDep,
-    offset: Annotated[int, Query(ge=0)] = 0,
-    limit: Annotated[int, Query(le=100)] = 10,
+def apply_roller_update(db_roller: Roller, roller: RollerUpdate) -> None:
+    roller_data = roller.model_dump(exclude_unset=True)
+    for key, value in roller_data.items():
+        setattr(db_roller, key, value)
+    if "width" in roller_data:
+        db_roller.set_width_range()
+
+@roller_router.post("/", response_model=RollerPublic)
+async def create_roller(roller: RollerCreate, db: DatabaseDep):
+    def create(session: Session):
+        db_roller = build_roller(roller)
+        session.add(db_roller)
+        session.commit()
+        RESPONSE_CACHE.invalidate("roller", f"brand-products:{db_roller.brand_id}")
+        session.refresh(db_roller)
+        return RollerPublic.model_validate(db_roller)
+
+    return await db.run(create)
+
+@roller_router.post("/batch", response_model=BatchResult)
+async def create_rollers(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
 ):
-    heroes = session.exec(
-        select(Roller).offset(offset).limit(limit)
-    ).all()
-    return heroes
-
-@roller_router.get("/{roller_id}", response_model=RollerPublic)
-def read_roller(roller_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    roller = session.get(Roller, roller_id)
-    if not roller:
-        raise HTTPException(status_code=404, detail=f"roller {roller_id} not found")
-    return roller
+    """
+    Create many rollers in one transaction, reporting errors per item.
+
+    With `atomic` nothing is created if any item fails.
+    """
+    def create(session: Session):
+        result, rollers = create_batch(session, Roller, RollerCreate, items, atomic, build=build_roller)
+        if rollers:
+            RESPONSE_CACHE.invalidate(
+                "roller", *{f"brand-products:{roller.brand_id}" for roller in rollers}
+            )
+        return result
+
+    return await db.run(create)
+
+@roller_router.patch("/batch", response_model=BatchResult)
+async def update_rollers(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
+):
+    """
+    Update many rollers in one transaction, reporting errors per item.
+
+    Every item holds the `id` of the roller and the fields to change.
+    With `atomic` nothing is updated if any item fails.
+    """
+    def update(session: Session):
+        result, updated = update_batch(
+            session, Roller, RollerUpdate, items, atomic, apply=apply_roller_update
+        )
+        if updated:
+            tags = {"roller"}
+            for roller, old_brand_id in updated:
+                tags |= {
+                    f"roller:{roller.id}",
+                    f"brand-products:{old_brand_id}",
+                    f"brand-products:{roller.brand_id}",
+                }
+            RESPONSE_CACHE.invalidate(*tags)
+        return result
+
+    return await db.run(update)
+
+@roller_router.get(
+    "/",
+    response_model=list[RollerPublic],
+    dependencies=[conditional_get("roller")],
+)
+async def read_rollers(
+    db: ReadDatabaseDep,
+    response: Response,
+    cache: CacheDep,
+    filters: Annotated[RollerFilters, Query()],
+):
+    def read(session: Session):
+        statement = apply_filters(select_public(Roller, RollerPublic), Roller, filters)
+        rows = session.exec(paginate(statement, Roller, filters)).all()
+        set_next_cursor(response, rows, filters)
+        tags = {"roller", *(f"brand:{row.brand_id}" for row in rows)}
+        return cache.store_body(serialize_rows(RollerPublic, public_rows(RollerPublic, rows)), tags)
+
+    return await db.run(read)
+
+@roller_router.get(
+    "/{roller_id}",
+    response_model=RollerPublic,
+    dependencies=[conditional_get("roller")],
+)
+async def read_roller(roller_id: Annotated[int, Path(gt=0)], db: ReadDatabaseDep, cache: CacheDep):
+    def read(session: Session):
+        roller = session.get(Roller, roller_id, options=[joinedload(Roller.brand)])
+        if not roller:
+            raise HTTPException(status_code=404, detail=f"roller {roller_id} not found")
+        tags = {f"roller:{roller_id}", f"brand:{roller.brand_id}"}
+        return cache.store(RollerPublic, roller, tags)
+
+    return await db.run(read)
 
 @roller_router.patch("/{roller_id}", response_model=RollerPublic)
-def update_roller(
+async def update_roller(
     roller_id: Annotated[int, Path(gt=0)],
     roller: RollerUpdate,
-    session: SessionDep
+    db: DatabaseDep
 ):
-    db_roller = session.get(Roller, roller_id)
-    if not db_roller:
-        raise HTTPException(status_code=404, detail=f"roller {roller_id} not found")
-    
-    roller_data = roller.model_dump(exclude_unset=True)
-    for key, value in roller_data.items():
-        setattr(db_roller, key, value)
-    
-    session.add(db_roller)
-    session.commit()
-    session.refresh(db_roller)
-    return db_roller
+    def update(session: Session):
+        db_roller = session.get(Roller, roller_id)
+        if not db_roller:
+            raise HTTPException(status_code=404, detail=f"roller {roller_id} not found")
+        old_brand_id = db_roller.brand_id
+
+        apply_roller_update(db_roller, roller)
+        session.add(db_roller)
+        session.commit()
+        RESPONSE_CACHE.invalidate(
+            "roller",
+            f"roller:{roller_id}",
+            f"brand-products:{old_brand_id}",
+            f"brand-products:{db_roller.brand_id}",
+        )
+        session.refresh(db_roller)
+        return RollerPublic.model_validate(db_roller)
+
+    return await db.run(update)
 
 @roller_router.delete("/{roller_id}")
-def delete_roller(roller_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    db_roller = session.get(Roller, roller_id)
-    if not db_roller:
-        raise HTTPException(status_code=404, detail=f"roller {roller_id} not found")
-    
-    session.delete(db_roller)
-    session.commit()
+async def delete_roller(roller_id: Annotated[int, Path(gt=0)], db: DatabaseDep):
+    def delete(session: Session):
+        db_roller = session.get(Roller, roller_id)
+        if not db_roller:
+            raise HTTPException(status_code=404, detail=f"roller {roller_id} not found")
+
+        brand_id = db_roller.brand_id
+        session.delete(db_roller)
+        session.commit()
+        RESPONSE_CACHE.invalidate("roller", f"roller:{roller_id}", f"brand-products:{brand_id}")
+
+    await db.run(delete)
     return {"ok": True}
@@ -0,0 +1,71 @@
+import re
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+from sqlalchemy import text
+from sqlmodel import Session
+
+from slack_data.api.revisions import conditional_get
+from slack_data.database import ReadDatabaseDep
+from slack_data.models.search import (
+    BM25_WEIGHTS,
+    SEARCH_TABLE,
+    SearchEntity,
+    SearchResult,
+)
+
+search_router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+)
+
+def to_match_query(query: str) -> str | None:
+    """
+    Convert free text into an FTS5 query where every word must match as a prefix.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+@search_router.get(
+    "/",
+    response_model=list[SearchResult],
+    dependencies=[conditional_get("search")],
+)
+async def search(
+    db: ReadDatabaseDep,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    entity: Annotated[list[SearchEntity] | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    """
+    Search webbings, rollers and weblocks by name, description, notes and brand name.
+
+    Every word is matched as a prefix and results are ranked with bm25.
+    """
+    match_query = to_match_query(q)
+    if match_query is None:
+        return []
+
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    entity_filter = ""
+    params = {"match": match_query, "limit": limit}
+    if entity:
+        entity_filter = f"AND entity IN ({', '.join(f':entity_{i}' for i in range(len(entity)))})"
+        params.update({f"entity_{i}": value.value for i, value in enumerate(entity)})
+
+    statement = text(
+        f"""
+        SELECT entity, entity_id AS id, name, brand_name, bm25({SEARCH_TABLE}, {weights}) AS rank
+        FROM {SEARCH_TABLE}
+        WHERE {SEARCH_TABLE} MATCH :match {entity_filter}
+        ORDER BY rank
+        LIMIT :limit
+        """
+    )
+
+    def read(session: Session):
+        return [SearchResult(**row._asdict()) for row in session.execute(statement, params)]
+
+    return await db.run(read)
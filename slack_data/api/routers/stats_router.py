@@ -0,0 +1,50 @@
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlmodel import Session
+
+from slack_data.api.revisions import conditional_get
+from slack_data.api.stats import STATS_FIELDS, STATS_GROUPS, get_stats
+from slack_data.database import ReadDatabaseDep
+from slack_data.models.stats import (
+    STATS_DEFAULT_BUCKETS,
+    STATS_MAX_BUCKETS,
+    CatalogStats,
+    StatsEntity,
+)
+
+stats_router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+@stats_router.get(
+    "/{entity}",
+    response_model=CatalogStats,
+    dependencies=[conditional_get("stats")],
+)
+async def read_stats(
+    entity: StatsEntity,
+    db: ReadDatabaseDep,
+    group_by: str = "material",
+    field: str = "breaking_strength",
+    buckets: Annotated[int, Query(ge=1, le=STATS_MAX_BUCKETS)] = STATS_DEFAULT_BUCKETS,
+):
+    """
+    Count, min, max, mean, ISA certified share and a histogram of `field`, per value of `group_by`.
+
+    `group_by=brand` groups by brand name. The results are cached until the table changes.
+    """
+    if group_by not in STATS_GROUPS[entity.value]:
+        raise HTTPException(
+            status_code=422, detail=f"group_by must be one of {', '.join(STATS_GROUPS[entity.value])}"
+        )
+    if field not in STATS_FIELDS[entity.value]:
+        raise HTTPException(
+            status_code=422, detail=f"field must be one of {', '.join(STATS_FIELDS[entity.value])}"
+        )
+
+    def read(session: Session):
+        return get_stats(session, entity.value, group_by, field, buckets)
+
+    return await db.run(read)
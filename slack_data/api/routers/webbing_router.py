@@ -1,9 +1,41 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, Path
-from sqlmodel import select
+from typing import Annotated, Any
+import numpy as np
+from fastapi import APIRouter, Body, HTTPException, Query, Path, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import Session, select
 
-from slack_data.database import SessionDep
-from slack_data.models.webbing import Webbing, WebbingCreate, WebbingPublic, WebbingUpdate
+from slack_data.api.batch import create_batch, update_batch
+from slack_data.api.filters import apply_filters
+from slack_data.api.line_simulation import MAX_SIMULATION_CELLS, fill_curves, simulate_sag
+from slack_data.api.pagination import paginate, set_next_cursor
+from slack_data.api.stretch_curves import get_stretch_curves
+from slack_data.api.stretch_index import GRID_MAX_KN, STRETCH_INDEX
+from slack_data.api.response_cache import RESPONSE_CACHE, CacheDep
+from slack_data.api.revisions import conditional_get
+from slack_data.api.serialization import public_rows, select_public, serialize_rows
+from slack_data.database import DatabaseDep, ReadDatabaseDep
+from slack_data.models.batch import MAX_BATCH_SIZE, BatchResult
+from slack_data.models.brands import Brand
+from slack_data.models.compatibility import WebbingCompatibility
+from slack_data.models.filters import MAX_PAGE_SIZE
+from slack_data.models.rollers import Roller, RollerPublic
+from slack_data.models.webbing import (
+    FiberMaterial,
+    LineSimulation,
+    LineSimulationParams,
+    SimilarStretchFilters,
+    StretchPoint,
+    Webbing,
+    WebbingCreate,
+    WebbingFilters,
+    WebbingLineSimulation,
+    WebbingPublic,
+    WebbingSimilarity,
+    WebbingStretchAtLoad,
+    WebbingUpdate,
+)
+from slack_data.models.weblocks import Weblock, WeblockPublic
 
 webbing_router = APIRouter(
     prefix="/webbing",
@@ -11,57 +43,413 @@ webbing_router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-@webbing_router.post("/", response_model=WebbingPublic)
-def create_webbing(webbing: WebbingCreate, session: SessionDep):
+# Load the brand and stretch curve with the webbing instead of lazily per row
+WEBBING_LOAD_OPTIONS = [joinedload(Webbing.brand), selectinload(Webbing.stretch_points)]
+
+def build_webbing(webbing: WebbingCreate) -> Webbing:
     db_webbing = Webbing.model_validate(webbing)
-    session.add(db_webbing)
-    session.commit()
-    session.refresh(db_webbing)
+    db_webbing.set_stretch(webbing.stretch)
     return db_webbing
 
-@webbing_router.get("/", response_model=list[WebbingPublic])
-def read_webbings(
-    session: SessionDep,
-    offset: Annotated[int, Query(ge=0)] = 0,
-    limit: Annotated[int, Query(le=100)] = 10,
+def apply_webbing_update(db_webbing: Webbing, webbing: WebbingUpdate) -> None:
+    webbing_data = webbing.model_dump(exclude_unset=True, exclude={"stretch"})
+    for key, value in webbing_data.items():
+        setattr(db_webbing, key, value)
+    if "stretch" in webbing.model_fields_set:
+        db_webbing.set_stretch(webbing.stretch)
+
+@webbing_router.post("/", response_model=WebbingPublic)
+async def create_webbing(webbing: WebbingCreate, db: DatabaseDep):
+    def create(session: Session):
+        db_webbing = build_webbing(webbing)
+        session.add(db_webbing)
+        session.commit()
+        RESPONSE_CACHE.invalidate("webbing", f"brand-products:{db_webbing.brand_id}")
+        session.refresh(db_webbing)
+        return WebbingPublic.model_validate(db_webbing)
+
+    return await db.run(create)
+
+@webbing_router.post("/batch", response_model=BatchResult)
+async def create_webbings(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
+):
+    """
+    Create many webbings in one transaction, reporting errors per item.
+
+    With `atomic` nothing is created if any item fails.
+    """
+    def create(session: Session):
+        result, webbings = create_batch(session, Webbing, WebbingCreate, items, atomic, build=build_webbing)
+        if webbings:
+            RESPONSE_CACHE.invalidate(
+                "webbing", *{f"brand-products:{webbing.brand_id}" for webbing in webbings}
+            )
+        return result
+
+    return await db.run(create)
+
+@webbing_router.patch("/batch", response_model=BatchResult)
+async def update_webbings(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
+):
+    """
+    Update many webbings in one transaction, reporting errors per item.
+
+    Every item holds the `id` of the webbing and the fields to change.
+    With `atomic` nothing is updated if any item fails.
+    """
+    def update(session: Session):
+        result, updated = update_batch(
+            session, Webbing, WebbingUpdate, items, atomic,
+            apply=apply_webbing_update, options=WEBBING_LOAD_OPTIONS,
+        )
+        if updated:
+            tags = {"webbing"}
+            for webbing, old_brand_id in updated:
+                tags |= {
+                    f"webbing:{webbing.id}",
+                    f"brand-products:{old_brand_id}",
+                    f"brand-products:{webbing.brand_id}",
+                }
+            RESPONSE_CACHE.invalidate(*tags)
+        return result
+
+    return await db.run(update)
+
+@webbing_router.get(
+    "/",
+    response_model=list[WebbingPublic],
+    dependencies=[conditional_get("webbing")],
+)
+async def read_webbings(
+    db: ReadDatabaseDep,
+    response: Response,
+    cache: CacheDep,
+    filters: Annotated[WebbingFilters, Query()],
+):
+    def read(session: Session):
+        statement = apply_filters(select_public(Webbing, WebbingPublic), Webbing, filters)
+        rows = session.exec(paginate(statement, Webbing, filters)).all()
+        set_next_cursor(response, rows, filters)
+        curves = get_stretch_curves(session, [row.id for row in rows])
+        webbings = public_rows(WebbingPublic, rows, stretch=curves)
+        tags = {"webbing", *(f"brand:{row.brand_id}" for row in rows)}
+        return cache.store_body(serialize_rows(WebbingPublic, webbings), tags)
+
+    return await db.run(read)
+
+@webbing_router.get(
+    "/stretch",
+    response_model=list[WebbingStretchAtLoad],
+    dependencies=[conditional_get("webbing")],
+)
+async def read_stretch_at_load(
+    db: ReadDatabaseDep,
+    kn: Annotated[float, Query(ge=0, le=GRID_MAX_KN)],
+    ids: Annotated[list[int] | None, Query()] = None,
+    material: Annotated[FiberMaterial | None, Query()] = None,
+    width: Annotated[int | None, Query()] = None,
 ):
-    heroes = session.exec(
-        select(Webbing).offset(offset).limit(limit)
-    ).all()
-    return heroes
-
-@webbing_router.get("/{webbing_id}", response_model=WebbingPublic)
-def read_webbing(webbing_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    webbing = session.get(Webbing, webbing_id)
-    if not webbing:
-        raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
-    return webbing
+    """
+    Interpolate the stretch of every webbing (or the filtered subset) at the given load.
+    """
+    def read(session: Session):
+        STRETCH_INDEX.ensure_loaded(session)
+        webbing_ids, percents = STRETCH_INDEX.interpolate(
+            kn,
+            ids=ids,
+            material=material.value if material else None,
+            min_width=width,
+            max_width=width,
+        )
+
+        names = {
+            webbing_id: (name, brand_name)
+            for webbing_id, name, brand_name in session.exec(
+                select(Webbing.id, Webbing.name, Brand.name)
+                .join(Brand)
+                .where(Webbing.id.in_(webbing_ids.tolist()))
+            )
+        }
+        return [
+            WebbingStretchAtLoad(
+                id=webbing_id,
+                name=names[webbing_id][0],
+                brand_name=names[webbing_id][1],
+                kn=kn,
+                percent=round(percent, 3),
+            )
+            for webbing_id, percent in zip(webbing_ids.tolist(), percents.tolist())
+            if webbing_id in names
+        ]
+
+    return await db.run(read)
+
+@webbing_router.get(
+    "/simulate",
+    response_model=LineSimulation,
+    dependencies=[conditional_get("webbing")],
+)
+async def simulate_lines(
+    db: ReadDatabaseDep,
+    cache: CacheDep,
+    params: Annotated[LineSimulationParams, Query()],
+):
+    """
+    Simulate the sag and peak tension of every webbing (or the filtered subset) at every length.
+
+    Webbings without a stretch curve are left out. See `line_simulation` for the model.
+    """
+    lengths = np.array(params.lengths())
+
+    def read(session: Session):
+        STRETCH_INDEX.ensure_loaded(session)
+        webbing_ids, curves, weights = STRETCH_INDEX.subset(
+            ids=params.ids,
+            material=params.material.value if params.material else None,
+            min_width=params.min_width,
+            max_width=params.max_width,
+            min_weight=params.min_weight,
+            max_weight=params.max_weight,
+        )
+        measured = ~np.isnan(curves).all(axis=1)
+        webbing_ids, curves, weights = webbing_ids[measured], curves[measured], weights[measured]
+        if len(webbing_ids) * len(lengths) > MAX_SIMULATION_CELLS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"at most {MAX_SIMULATION_CELLS} webbing and length pairs can be simulated at once",
+            )
+        rows = {
+            row.id: row
+            for row in session.exec(
+                select(Webbing.id, Webbing.name, Brand.name.label("brand_name"),
+                       Webbing.brand_id, Webbing.width, Webbing.weight)
+                .join(Brand)
+                .where(Webbing.id.in_(webbing_ids.tolist()))
+            )
+        }
+        return webbing_ids, curves, weights, rows
+
+    webbing_ids, curves, weights, rows = await db.run(read)
+
+    def simulate():
+        filled, measured_max = fill_curves(curves, STRETCH_INDEX.grid)
+        sags, tensions = simulate_sag(
+            filled, STRETCH_INDEX.step_kn, weights, lengths, params.pretension, params.slackliner_weight
+        )
+        simulation = LineSimulation(
+            pretension=params.pretension,
+            slackliner_weight=params.slackliner_weight,
+            lengths=lengths.tolist(),
+            webbings=[
+                WebbingLineSimulation(
+                    id=webbing_id,
+                    name=rows[webbing_id].name,
+                    brand_name=rows[webbing_id].brand_name,
+                    width=rows[webbing_id].width,
+                    weight=rows[webbing_id].weight,
+                    sag=sag,
+                    peak_tension=tension,
+                    measured_max_kn=max_kn,
+                )
+                for webbing_id, sag, tension, max_kn in zip(
+                    webbing_ids.tolist(),
+                    sags.round(3).tolist(),
+                    tensions.round(3).tolist(),
+                    measured_max.tolist(),
+                )
+                if webbing_id in rows
+            ],
+        )
+        tags = {"webbing", *(f"brand:{row.brand_id}" for row in rows.values())}
+        return cache.store(LineSimulation, simulation, tags)
+
+    return await run_in_threadpool(simulate)
+
+def find_similar_webbings(
+    session: Session,
+    curve: np.ndarray,
+    filters: SimilarStretchFilters,
+    exclude_id: int | None = None,
+) -> list[WebbingSimilarity]:
+    """
+    Find the webbings closest to a resampled stretch curve and load their details.
+    """
+    webbing_ids, distances = STRETCH_INDEX.nearest(
+        curve,
+        filters.k,
+        exclude_id=exclude_id,
+        material=filters.material.value if filters.material else None,
+        min_width=filters.min_width,
+        max_width=filters.max_width,
+        min_weight=filters.min_weight,
+        max_weight=filters.max_weight,
+    )
+
+    rows = {
+        row.id: row
+        for row in session.exec(
+            select(Webbing.id, Webbing.name, Brand.name.label("brand_name"),
+                   Webbing.material, Webbing.width, Webbing.weight)
+            .join(Brand)
+            .where(Webbing.id.in_(webbing_ids.tolist()))
+        )
+    }
+    return [
+        WebbingSimilarity(**rows[webbing_id]._asdict(), distance=round(distance, 3))
+        for webbing_id, distance in zip(webbing_ids.tolist(), distances.tolist())
+        if webbing_id in rows
+    ]
+
+@webbing_router.post("/similar", response_model=list[WebbingSimilarity])
+async def read_similar_to_curve(
+    db: ReadDatabaseDep,
+    stretch: Annotated[list[StretchPoint], Body(min_length=2)],
+    filters: Annotated[SimilarStretchFilters, Query()],
+):
+    """
+    Find the webbings whose stretch curves are most similar to the given curve.
+    """
+    def read(session: Session):
+        STRETCH_INDEX.ensure_loaded(session)
+        points = sorted(stretch, key=lambda point: point.kn)
+        curve = STRETCH_INDEX.resample(
+            [point.kn for point in points], [point.percent for point in points]
+        )
+        return find_similar_webbings(session, curve, filters)
+
+    return await db.run(read)
+
+@webbing_router.get(
+    "/{webbing_id}/similar",
+    response_model=list[WebbingSimilarity],
+    dependencies=[conditional_get("webbing")],
+)
+async def read_similar_webbings(
+    webbing_id: Annotated[int, Path(gt=0)],
+    db: ReadDatabaseDep,
+    filters: Annotated[SimilarStretchFilters, Query()],
+):
+    """
+    Find the webbings whose stretch curves are most similar to the given webbing.
+    """
+    def read(session: Session):
+        STRETCH_INDEX.ensure_loaded(session)
+        curve = STRETCH_INDEX.curve(webbing_id)
+        if curve is None:
+            raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
+        return find_similar_webbings(session, curve, filters, exclude_id=webbing_id)
+
+    return await db.run(read)
+
+@webbing_router.get(
+    "/{webbing_id}/compatible",
+    response_model=WebbingCompatibility,
+    dependencies=[conditional_get("compatible")],
+)
+async def read_compatible_gear(
+    webbing_id: Annotated[int, Path(gt=0)],
+    db: ReadDatabaseDep,
+    cache: CacheDep,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = MAX_PAGE_SIZE,
+):
+    """
+    List the weblocks that fit the webbing's width by name, and the rollers by tightest fit.
+
+    Each table is read with a single index lookup, which also gives the order: weblocks on
+    `(width, name)` and rollers on the `(width_min, width_max)` range parsed from their
+    free-form width, those with the largest minimum and then smallest maximum first.
+    """
+    def read(session: Session):
+        width = session.exec(select(Webbing.width).where(Webbing.id == webbing_id)).first()
+        if width is None:
+            raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
+
+        weblocks, rollers = [], []
+        if width > 0: # 0 when the width is unknown
+            weblocks = session.exec(
+                select_public(Weblock, WeblockPublic)
+                .where(Weblock.width == width)
+                .order_by(Weblock.name, Weblock.id)
+                .limit(limit)
+            ).all()
+            rollers = session.exec(
+                select_public(Roller, RollerPublic)
+                .where(Roller.width_min <= width, Roller.width_max >= width)
+                .order_by(Roller.width_min.desc(), Roller.width_max, Roller.id.desc())
+                .limit(limit)
+            ).all()
+        compatibility = WebbingCompatibility(
+            webbing_id=webbing_id,
+            width=width,
+            weblocks=public_rows(WeblockPublic, weblocks),
+            rollers=public_rows(RollerPublic, rollers),
+        )
+        tags = {
+            f"webbing:{webbing_id}", "weblock", "roller",
+            *(f"brand:{row.brand_id}" for row in [*weblocks, *rollers]),
+        }
+        return cache.store(WebbingCompatibility, compatibility, tags)
+
+    return await db.run(read)
+
+@webbing_router.get(
+    "/{webbing_id}",
+    response_model=WebbingPublic,
+    dependencies=[conditional_get("webbing")],
+)
+async def read_webbing(webbing_id: Annotated[int, Path(gt=0)], db: ReadDatabaseDep, cache: CacheDep):
+    def read(session: Session):
+        webbing = session.get(Webbing, webbing_id, options=WEBBING_LOAD_OPTIONS)
+        if not webbing:
+            raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
+        tags = {f"webbing:{webbing_id}", f"brand:{webbing.brand_id}"}
+        return cache.store(WebbingPublic, webbing, tags)
+
+    return await db.run(read)
 
 @webbing_router.patch("/{webbing_id}", response_model=WebbingPublic)
-def update_webbing(
+async def update_webbing(
     webbing_id: Annotated[int, Path(gt=0)],
     webbing: WebbingUpdate,
-    session: SessionDep
+    db: DatabaseDep
 ):
-    db_webbing = session.get(Webbing, webbing_id)
-    if not db_webbing:
-        raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
-    
-    webbing_data = webbing.model_dump(exclude_unset=True)
-    for key, value in webbing_data.items():
-        setattr(db_webbing, key, value)
-    
-    session.add(db_webbing)
-    session.commit()
-    session.refresh(db_webbing)
-    return db_webbing
+    def update(session: Session):
+        db_webbing = session.get(Webbing, webbing_id)
+        if not db_webbing:
+            raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
+        old_brand_id = db_webbing.brand_id
+
+        apply_webbing_update(db_webbing, webbing)
+        session.add(db_webbing)
+        session.commit()
+        RESPONSE_CACHE.invalidate(
+            "webbing",
+            f"webbing:{webbing_id}",
+            f"brand-products:{old_brand_id}",
+            f"brand-products:{db_webbing.brand_id}",
+        )
+        session.refresh(db_webbing)
+        return WebbingPublic.model_validate(db_webbing)
+
+    return await db.run(update)
 
 @webbing_router.delete("/{webbing_id}")
-def delete_webbing(webbing_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    db_webbing = session.get(Webbing, webbing_id)
-    if not db_webbing:
-        raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
-    
-    session.delete(db_webbing)
-    session.commit()
+async def delete_webbing(webbing_id: Annotated[int, Path(gt=0)], db: DatabaseDep):
+    def delete(session: Session):
+        db_webbing = session.get(Webbing, webbing_id)
+        if not db_webbing:
+            raise HTTPException(status_code=404, detail=f"Webbing {webbing_id} not found")
+
+        brand_id = db_webbing.brand_id
+        session.delete(db_webbing)
+        session.commit()
+        RESPONSE_CACHE.invalidate("webbing", f"webbing:{webbing_id}", f"brand-products:{brand_id}")
+
+    await db.run(delete)
     return {"ok": True}
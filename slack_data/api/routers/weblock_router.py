@@ -1,9 +1,17 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Query, Path
-from sqlmodel import select
+from typing import Annotated, Any
+from fastapi import APIRouter, Body, HTTPException, Query, Path, Response
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session
 
-from slack_data.database import SessionDep
-from slack_data.models.weblocks import Weblock, WeblockCreate, WeblockPublic, WeblockUpdate
+from slack_data.api.batch import create_batch, update_batch
+from slack_data.api.filters import apply_filters
+from slack_data.api.pagination import paginate, set_next_cursor
+from slack_data.api.response_cache import RESPONSE_CACHE, CacheDep
+from slack_data.api.revisions import conditional_get
+from slack_data.api.serialization import public_rows, select_public, serialize_rows
+from slack_data.database import DatabaseDep, ReadDatabaseDep
+from slack_data.models.batch import MAX_BATCH_SIZE, BatchResult
+from slack_data.models.weblocks import Weblock, WeblockCreate, WeblockFilters, WeblockPublic, WeblockUpdate
 
 weblock_router = APIRouter(
     prefix="/weblock",
@@ -12,56 +20,140 @@ weblock_router = APIRouter(
 )
 
 @weblock_router.post("/", response_model=WeblockPublic)
-def create_weblock(weblock: WeblockCreate, session: SessionDep):
-    db_weblock = weblock.model_validate(weblock)
-    session.add(db_weblock)
-    session.commit()
-    session.refresh(db_weblock)
-    return db_weblock
-
-@weblock_router.get("/", response_model=list[WeblockPublic])
-def read_weblocks(
-    session: SessionDep,
-    offset: Annotated[int, Query(ge=0)] = 0,
-    limit: Annotated[int, Query(le=100)] = 10,
+async def create_weblock(weblock: WeblockCreate, db: DatabaseDep):
+    def create(session: Session):
+        db_weblock = Weblock.model_validate(weblock)
+        session.add(db_weblock)
+        session.commit()
+        RESPONSE_CACHE.invalidate("weblock", f"brand-products:{db_weblock.brand_id}")
+        session.refresh(db_weblock)
+        return WeblockPublic.model_validate(db_weblock)
+
+    return await db.run(create)
+
+@weblock_router.post("/batch", response_model=BatchResult)
+async def create_weblocks(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
+):
+    """
+    Create many weblocks in one transaction, reporting errors per item.
+
+    With `atomic` nothing is created if any item fails.
+    """
+    def create(session: Session):
+        result, weblocks = create_batch(session, Weblock, WeblockCreate, items, atomic)
+        if weblocks:
+            RESPONSE_CACHE.invalidate(
+                "weblock", *{f"brand-products:{weblock.brand_id}" for weblock in weblocks}
+            )
+        return result
+
+    return await db.run(create)
+
+@weblock_router.patch("/batch", response_model=BatchResult)
+async def update_weblocks(
+    items: Annotated[list[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    db: DatabaseDep,
+    atomic: bool = False,
+):
+    """
+    Update many weblocks in one transaction, reporting errors per item.
+
+    Every item holds the `id` of the weblock and the fields to change.
+    With `atomic` nothing is updated if any item fails.
+    """
+    def update(session: Session):
+        result, updated = update_batch(session, Weblock, WeblockUpdate, items, atomic)
+        if updated:
+            tags = {"weblock"}
+            for weblock, old_brand_id in updated:
+                tags |= {
+                    f"weblock:{weblock.id}",
+                    f"brand-products:{old_brand_id}",
+                    f"brand-products:{weblock.brand_id}",
+                }
+            RESPONSE_CACHE.invalidate(*tags)
+        return result
+
+    return await db.run(update)
+
+@weblock_router.get(
+    "/",
+    response_model=list[WeblockPublic],
+    dependencies=[conditional_get("weblock")],
+)
+async def read_weblocks(
+    db: ReadDatabaseDep,
+    response: Response,
+    cache: CacheDep,
+    filters: Annotated[WeblockFilters, Query()],
 ):
-    heroes = session.exec(
-        select(Weblock).offset(offset).limit(limit)
-    ).all()
-    return heroes
-
-@weblock_router.get("/{weblock_id}", response_model=WeblockPublic)
-def read_weblock(weblock_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    weblock = session.get(Weblock, weblock_id)
-    if not weblock:
-        raise HTTPException(status_code=404, detail=f"weblock {weblock_id} not found")
-    return weblock
+    def read(session: Session):
+        statement = apply_filters(select_public(Weblock, WeblockPublic), Weblock, filters)
+        rows = session.exec(paginate(statement, Weblock, filters)).all()
+        set_next_cursor(response, rows, filters)
+        tags = {"weblock", *(f"brand:{row.brand_id}" for row in rows)}
+        return cache.store_body(serialize_rows(WeblockPublic, public_rows(WeblockPublic, rows)), tags)
+
+    return await db.run(read)
+
+@weblock_router.get(
+    "/{weblock_id}",
+    response_model=WeblockPublic,
+    dependencies=[conditional_get("weblock")],
+)
+async def read_weblock(weblock_id: Annotated[int, Path(gt=0)], db: ReadDatabaseDep, cache: CacheDep):
+    def read(session: Session):
+        weblock = session.get(Weblock, weblock_id, options=[joinedload(Weblock.brand)])
+        if not weblock:
+            raise HTTPException(status_code=404, detail=f"weblock {weblock_id} not found")
+        tags = {f"weblock:{weblock_id}", f"brand:{weblock.brand_id}"}
+        return cache.store(WeblockPublic, weblock, tags)
+
+    return await db.run(read)
 
 @weblock_router.patch("/{weblock_id}", response_model=WeblockPublic)
-def update_weblock(
+async def update_weblock(
     weblock_id: Annotated[int, Path(gt=0)],
     weblock: WeblockUpdate,
-    session: SessionDep
+    db: DatabaseDep
 ):
-    db_weblock = session.get(Weblock, weblock_id)
-    if not db_weblock:
-        raise HTTPException(status_code=404, detail=f"weblock {weblock_id} not found")
-    
-    weblock_data = weblock.model_dump(exclude_unset=True)
-    for key, value in weblock_data.items():
-        setattr(db_weblock, key, value)
-    
-    session.add(db_weblock)
-    session.commit()
-    session.refresh(db_weblock)
-    return db_weblock
+    def update(session: Session):
+        db_weblock = session.get(Weblock, weblock_id)
+        if not db_weblock:
+            raise HTTPException(status_code=404, detail=f"weblock {weblock_id} not found")
+        old_brand_id = db_weblock.brand_id
+
+        weblock_data = weblock.model_dump(exclude_unset=True)
+        for key, value in weblock_data.items():
+            setattr(db_weblock, key, value)
+
+        session.add(db_weblock)
+        session.commit()
+        RESPONSE_CACHE.invalidate(
+            "weblock",
+            f"weblock:{weblock_id}",
+            f"brand-products:{old_brand_id}",
+            f"brand-products:{db_weblock.brand_id}",
+        )
+        session.refresh(db_weblock)
+        return WeblockPublic.model_validate(db_weblock)
+
+    return await db.run(update)
 
 @weblock_router.delete("/{weblock_id}")
-def delete_weblock(weblock_id: Annotated[int, Path(gt=0)], session: SessionDep):
-    db_weblock = session.get(Weblock, weblock_id)
-    if not db_weblock:
-        raise HTTPException(status_code=404, detail=f"weblock {weblock_id} not found")
-    
-    session.delete(db_weblock)
-    session.commit()
+async def delete_weblock(weblock_id: Annotated[int, Path(gt=0)], db: DatabaseDep):
+    def delete(session: Session):
+        db_weblock = session.get(Weblock, weblock_id)
+        if not db_weblock:
+            raise HTTPException(status_code=404, detail=f"weblock {weblock_id} not found")
+
+        brand_id = db_weblock.brand_id
+        session.delete(db_weblock)
+        session.commit()
+        RESPONSE_CACHE.invalidate("weblock", f"weblock:{weblock_id}", f"brand-products:{brand_id}")
+
+    await db.run(delete)
     return {"ok": True}
@@ -0,0 +1,100 @@
+import types
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, TypedDict, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from sqlalchemy import Row
+from sqlmodel import SQLModel, select
+from sqlmodel.sql.expression import Select
+
+from slack_data.api.response_cache import get_type_adapter
+from slack_data.models.brands import Brand
+
+
+def select_public(model: type[SQLModel], public_model: type[SQLModel]) -> Select:
+    """
+    Select the columns of `model` shown by `public_model`, with the brand name joined in.
+
+    `id` and `brand_id` are always selected, for pagination and cache tags. The rows can be
+    filtered and paginated like a `select(model)` statement, without loading ORM objects.
+    """
+    table_columns = model.__table__.columns
+    names = ["id", "brand_id"] + [
+        name for name in public_model.model_fields
+        if name in table_columns and name not in {"id", "brand_id"}
+    ]
+    columns = [getattr(model, name) for name in names]
+    return select(*columns, Brand.name.label("brand_name")).join(Brand)
+
+
+def _row_annotation(annotation: Any) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return row_type(annotation)
+    args = get_args(annotation)
+    if not args:
+        return annotation
+    row_args = tuple(_row_annotation(arg) for arg in args)
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        return Union[row_args]
+    return origin[row_args if len(row_args) > 1 else row_args[0]]
+
+
+@lru_cache
+def row_type(public_model: type[BaseModel], with_id: bool = False) -> type:
+    """
+    Build a `TypedDict` with the fields of a public model, nested models included.
+
+    Dicts are serialized against it by pydantic-core exactly like the model would be,
+    without creating or validating a model instance per row. With `with_id` the row id
+    comes first, for exports.
+    """
+    annotations = {"id": int} if with_id else {}
+    annotations.update(
+        (name, _row_annotation(field.annotation)) for name, field in public_model.model_fields.items()
+    )
+    return TypedDict(f"{public_model.__name__}Row", annotations)
+
+
+def public_rows(
+    public_model: type[SQLModel],
+    rows: Sequence[Row],
+    with_id: bool = False,
+    **extra: dict[int, Any],
+) -> list[dict[str, Any]]:
+    """
+    Turn selected rows into dicts with the fields of `public_model`, in the same order.
+
+    `extra` maps other field names to values by row id, like the stretch curve of each webbing.
+    Fields that are neither selected nor in `extra` get their default.
+    """
+    if not rows:
+        return []
+    positions = {name: index for index, name in enumerate(rows[0]._fields)}
+    id_index = positions["id"]
+    columns = [("id", id_index, None, None)] if with_id else []
+    columns += [
+        (name, positions.get(name), extra.get(name), field.default)
+        for name, field in public_model.model_fields.items()
+    ]
+    return [
+        {
+            name: (
+                values_by_id.get(row[id_index]) if values_by_id is not None
+                else row[index] if index is not None
+                else default
+            )
+            for name, index, values_by_id, default in columns
+        }
+        for row in rows
+    ]
+
+
+def serialize_rows(
+    public_model: type[SQLModel], rows: list[dict[str, Any]], with_id: bool = False
+) -> bytes:
+    """
+    Serialize `public_rows` output to the same JSON as a list of `public_model`.
+    """
+    return get_type_adapter(list[row_type(public_model, with_id)]).dump_json(rows)
@@ -0,0 +1,161 @@
+import threading
+from collections import OrderedDict
+from enum import Enum
+
+from sqlalchemy import Integer, cast, func
+from sqlmodel import Session, SQLModel, select
+
+from slack_data.api.revisions import ENTITY_TABLES, get_revisions
+from slack_data.models.brands import Brand
+from slack_data.models.rollers import Roller
+from slack_data.models.stats import CatalogStats, HistogramBucket, StatsGroup
+from slack_data.models.webbing import Webbing
+from slack_data.models.weblocks import Weblock
+
+STATS_CACHE_MAX_ENTRIES = 256
+
+# Group by the brand name, through the `brand_id` column
+BRAND_GROUP = "brand"
+
+STATS_MODELS: dict[str, type[SQLModel]] = {"webbing": Webbing, "roller": Roller, "weblock": Weblock}
+STATS_GROUPS = {
+    "webbing": ("material", "width", "classification", "isa_certified", BRAND_GROUP),
+    "roller": ("material", "roller_material", "slider_type", "lock_type", "bearing_material", "isa_certified", BRAND_GROUP),
+    "weblock": ("material", "width", "front_pin", "attachment_point", "isa_certified", BRAND_GROUP),
+}
+STATS_FIELDS = {
+    "webbing": ("breaking_strength", "weight", "width", "price_normalized", "stretch_2kn", "stretch_5kn", "stretch_10kn"),
+    "roller": ("breaking_strength", "weight", "price_normalized"),
+    "weblock": ("breaking_strength", "weight", "width", "price_normalized"),
+}
+
+
+class StatsCache:
+    """
+    Computed statistics, kept until a table they read from changes.
+
+    Entries store the revisions of their tables (bumped by triggers, see `models.revisions`)
+    and are only used while those are unchanged, so no write ever needs to invalidate them.
+    """
+
+    def __init__(self, max_entries: int = STATS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[tuple[int, ...], CatalogStats]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, revisions: tuple[int, ...]) -> CatalogStats | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != revisions:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: tuple, revisions: tuple[int, ...], stats: CatalogStats) -> None:
+        with self._lock:
+            self._entries[key] = (revisions, stats)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+STATS_CACHE = StatsCache()
+
+
+def _key(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _rounded(value: float | None) -> float | None:
+    return round(value, 6) if value is not None else None
+
+
+def compute_stats(session: Session, entity: str, group_by: str, field: str, buckets: int) -> CatalogStats:
+    """
+    Aggregate `field` per value of `group_by` with two `GROUP BY` queries.
+
+    The first gets the count, certified count, min, max and mean of every group. The second
+    counts the values per group and histogram bucket, with buckets spanning the range of
+    the whole table, computed from the first.
+    """
+    model = STATS_MODELS[entity]
+    value = getattr(model, field)
+    if group_by == BRAND_GROUP:
+        group_columns = (model.brand_id, Brand.name)
+    else:
+        group_columns = (getattr(model, group_by),)
+
+    def grouped(*columns):
+        statement = select(*group_columns, *columns)
+        if group_by == BRAND_GROUP:
+            statement = statement.join(Brand, Brand.id == model.brand_id)
+        return statement.group_by(*group_columns)
+
+    aggregates = session.exec(
+        grouped(
+            func.count(),
+            func.count(value),
+            func.min(value),
+            func.max(value),
+            func.avg(value),
+            func.sum(cast(model.isa_certified, Integer)),
+        ).order_by(func.count().desc())
+    ).all()
+
+    low = min((row[-4] for row in aggregates if row[-4] is not None), default=None)
+    high = max((row[-3] for row in aggregates if row[-3] is not None), default=None)
+    histograms: dict = {}
+    edges: list[float] = []
+    if low is not None:
+        buckets = buckets if high > low else 1
+        width = (high - low) / buckets or 1.0
+        edges = [low + width * index for index in range(buckets)] + [high]
+        histograms = {row[0]: [0] * buckets for row in aggregates}
+        # SQLite's two argument MIN is the smaller value, keeping the maximum in the last bucket
+        bucket = func.min(cast((value - low) / width, Integer), buckets - 1).label("bucket")
+        counts = session.exec(grouped(bucket, func.count()).where(value.is_not(None)).group_by(bucket))
+        for *group, index, count in counts:
+            histograms[group[0]][index] = count
+
+    groups = []
+    for *group, count, values, minimum, maximum, mean, certified in aggregates:
+        groups.append(
+            StatsGroup(
+                key=_key(group[-1]),
+                count=count,
+                certified=certified or 0,
+                certified_share=round((certified or 0) / count, 6),
+                values=values,
+                min=minimum,
+                max=maximum,
+                mean=_rounded(mean),
+                histogram=[
+                    HistogramBucket(lower=_rounded(edges[index]), upper=_rounded(edges[index + 1]), count=bucket_count)
+                    for index, bucket_count in enumerate(histograms[group[0]])
+                ] if edges else [],
+            )
+        )
+    return CatalogStats(
+        entity=entity,
+        group_by=group_by,
+        field=field,
+        count=sum(group.count for group in groups),
+        groups=groups,
+    )
+
+
+def get_stats(session: Session, entity: str, group_by: str, field: str, buckets: int) -> CatalogStats:
+    """
+    Get statistics from the cache, computing them if a table they read has changed since.
+    """
+    key = (entity, group_by, field, buckets)
+    revisions = get_revisions(ENTITY_TABLES[entity])
+    stats = STATS_CACHE.get(key, revisions)
+    if stats is None:
+        stats = compute_stats(session, entity, group_by, field, buckets)
+        STATS_CACHE.set(key, revisions, stats)
+    return stats
@@ -0,0 +1,20 @@
+from sqlmodel import Session, select
+
+from slack_data.models.webbing import WebbingStretch
+
+
+def get_stretch_curves(session: Session, webbing_ids: list[int]) -> dict[int, list[dict[str, float]]]:
+    """
+    Get the stretch curves of many webbings with one query, as `StretchPoint` dicts sorted by load.
+    """
+    curves: dict[int, list[dict[str, float]]] = {}
+    if not webbing_ids:
+        return curves
+    statement = (
+        select(WebbingStretch.webbing_id, WebbingStretch.kn, WebbingStretch.percent)
+        .where(WebbingStretch.webbing_id.in_(webbing_ids))
+        .order_by(WebbingStretch.webbing_id, WebbingStretch.kn)
+    )
+    for webbing_id, kn, percent in session.exec(statement):
+        curves.setdefault(webbing_id, []).append({"kn": kn, "percent": percent})
+    return curves
@@ -0,0 +1,277 @@
+import threading
+
+import numpy as np
+from sqlmodel import Session, select
+
+from slack_data.api.revisions import get_revisions
+from slack_data.models.revisions import WebbingChange
+from slack_data.models.webbing import Webbing, WebbingStretch
+
+GRID_STEP_KN = 0.25
+GRID_MAX_KN = 50.0
+MIN_OVERLAP_KN = 2.0 # curves must share at least this load range to be compared
+CHANGE_CHUNK_SIZE = 500 # changed webbings read per query when catching up
+
+
+class StretchIndex:
+    """
+    In-memory matrix of every webbing stretch curve, resampled onto a common kN grid.
+
+    Row `i` of `curves` holds the stretch (%) of webbing `ids[i]` at each load in `grid`,
+    with NaN outside of the measured range, so a query over the whole catalog is a
+    single vectorized operation. The matrix is loaded from the database on first use,
+    then `ensure_loaded` rereads the webbings that `webbing_change` lists as changed
+    since, whichever process wrote them.
+    """
+
+    def __init__(self, step_kn: float = GRID_STEP_KN, max_kn: float = GRID_MAX_KN):
+        self.step_kn = step_kn
+        self.grid = np.arange(0.0, max_kn + step_kn / 2, step_kn)
+        self.loaded = False
+        self.revision: int | None = None # webbing revision the matrix is up to date with
+        self._lock = threading.Lock() # guards the arrays
+        self._load_lock = threading.Lock() # one load or update at a time
+        self._clear()
+
+    def _clear(self) -> None:
+        self._size = 0
+        self._rows: dict[int, int] = {}
+        self._ids = np.empty(0, dtype=np.int64)
+        self._curves = np.empty((0, len(self.grid)))
+        self._material = np.empty(0, dtype=object)
+        self._width = np.empty(0)
+        self._weight = np.empty(0)
+
+    def resample(self, kns: list[float], percents: list[float]) -> np.ndarray:
+        """
+        Resample a stretch curve sorted by kN onto the grid, NaN outside of its range.
+        """
+        if not kns:
+            return np.full(len(self.grid), np.nan)
+        return np.interp(self.grid, kns, percents, left=np.nan, right=np.nan)
+
+    def load(self, session: Session) -> None:
+        """
+        (Re)build the matrix from every webbing in the database.
+        """
+        with self._load_lock:
+            self._load(session, get_revisions(("webbing",))[0])
+
+    def ensure_loaded(self, session: Session) -> None:
+        """
+        Build the matrix on first use, then apply the webbings changed since, by any process.
+
+        The webbing revision is read before the rows, so a write that commits while they
+        are read is applied again by the next call instead of being missed.
+        """
+        if self.loaded and get_revisions(("webbing",))[0] == self.revision:
+            return
+        with self._load_lock:
+            revision = get_revisions(("webbing",))[0]
+            if not self.loaded:
+                self._load(session, revision)
+            elif revision != self.revision:
+                changed = session.exec(
+                    select(WebbingChange.webbing_id).where(WebbingChange.revision > self.revision)
+                ).all()
+                if len(changed) > max(self._size // 2, CHANGE_CHUNK_SIZE):
+                    self._load(session, revision)
+                else:
+                    self._update(session, changed, revision)
+
+    def _read(
+        self, session: Session, webbing_ids: list[int] | None = None
+    ) -> list[tuple[int, np.ndarray, object, float | None, float | None]]:
+        """
+        Read and resample the curves of the given webbings, or of every webbing.
+        """
+        webbings = select(Webbing.id, Webbing.material, Webbing.width, Webbing.weight)
+        points = (
+            select(WebbingStretch.webbing_id, WebbingStretch.kn, WebbingStretch.percent)
+            .order_by(WebbingStretch.webbing_id, WebbingStretch.kn)
+        )
+        if webbing_ids is not None:
+            webbings = webbings.where(Webbing.id.in_(webbing_ids))
+            points = points.where(WebbingStretch.webbing_id.in_(webbing_ids))
+        rows = session.exec(webbings).all()
+
+        curves: dict[int, tuple[list[float], list[float]]] = {}
+        for webbing_id, kn, percent in session.exec(points):
+            kns, percents = curves.setdefault(webbing_id, ([], []))
+            kns.append(kn)
+            percents.append(percent)
+        return [
+            (webbing_id, self.resample(*curves.get(webbing_id, ([], []))), material, width, weight)
+            for webbing_id, material, width, weight in rows
+        ]
+
+    def _load(self, session: Session, revision: int) -> None:
+        rows = self._read(session)
+        with self._lock:
+            self._clear()
+            self._grow(len(rows))
+            for row in rows:
+                self._set_row(*row)
+            self.revision = revision
+            self.loaded = True
+
+    def _update(self, session: Session, webbing_ids: list[int], revision: int) -> None:
+        rows = []
+        for start in range(0, len(webbing_ids), CHANGE_CHUNK_SIZE):
+            rows += self._read(session, webbing_ids[start:start + CHANGE_CHUNK_SIZE])
+        found = {row[0] for row in rows}
+        with self._lock:
+            for webbing_id in webbing_ids:
+                if webbing_id not in found:
+                    self._remove(webbing_id)
+            self._grow(self._size + sum(row[0] not in self._rows for row in rows))
+            for row in rows:
+                self._set_row(*row)
+            self.revision = revision
+
+    def _remove(self, webbing_id: int) -> None:
+        """
+        Remove the curve of a deleted webbing by moving the last row into its place.
+        """
+        row = self._rows.pop(webbing_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            for array in (self._ids, self._curves, self._material, self._width, self._weight):
+                array[row] = array[last]
+            self._rows[int(self._ids[row])] = row
+        self._size = last
+
+    def _grow(self, size: int) -> None:
+        capacity = len(self._ids)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+        extra = capacity - len(self._ids)
+        self._ids = np.concatenate([self._ids, np.zeros(extra, dtype=np.int64)])
+        self._curves = np.vstack([self._curves, np.full((extra, len(self.grid)), np.nan)])
+        self._material = np.concatenate([self._material, np.full(extra, None, dtype=object)])
+        self._width = np.concatenate([self._width, np.full(extra, np.nan)])
+        self._weight = np.concatenate([self._weight, np.full(extra, np.nan)])
+
+    def _set_row(
+        self,
+        webbing_id: int,
+        curve: np.ndarray,
+        material: object,
+        width: float | None,
+        weight: float | None,
+    ) -> None:
+        row = self._rows.get(webbing_id)
+        if row is None:
+            row = self._size
+            self._rows[webbing_id] = row
+            self._size += 1
+        self._ids[row] = webbing_id
+        self._curves[row] = curve
+        self._material[row] = getattr(material, "value", material)
+        self._width[row] = np.nan if width is None else width
+        self._weight[row] = np.nan if weight is None else weight
+
+    def _mask(
+        self,
+        ids: list[int] | None = None,
+        material: str | None = None,
+        min_width: float | None = None,
+        max_width: float | None = None,
+        min_weight: float | None = None,
+        max_weight: float | None = None,
+    ) -> np.ndarray:
+        size = self._size
+        mask = np.ones(size, dtype=bool)
+        if ids:
+            mask &= np.isin(self._ids[:size], ids)
+        if material is not None:
+            mask &= self._material[:size] == material
+        if min_width is not None:
+            mask &= self._width[:size] >= min_width
+        if max_width is not None:
+            mask &= self._width[:size] <= max_width
+        if min_weight is not None:
+            mask &= self._weight[:size] >= min_weight
+        if max_weight is not None:
+            mask &= self._weight[:size] <= max_weight
+        return mask
+
+    def interpolate(self, kn: float, **filters) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Interpolate the stretch (%) of every matching webbing at `kn` in one vectorized step.
+
+        Returns the webbing ids and their stretch, leaving out webbings whose curve
+        doesn't cover `kn`.
+        """
+        position = kn / self.step_kn
+        low = min(int(np.floor(position)), len(self.grid) - 1)
+        high = min(low + 1, len(self.grid) - 1)
+        fraction = position - low
+
+        with self._lock:
+            mask = self._mask(**filters)
+            curves = self._curves[: self._size][mask]
+            ids = self._ids[: self._size][mask]
+            if fraction == 0:
+                values = curves[:, low]
+            else:
+                values = curves[:, low] * (1 - fraction) + curves[:, high] * fraction
+
+        measured = ~np.isnan(values)
+        return ids[measured], values[measured]
+
+    def subset(self, **filters) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copy the ids, curves and weights (g/m, NaN when unknown) of every matching webbing.
+        """
+        with self._lock:
+            mask = self._mask(**filters)
+            size = self._size
+            return self._ids[:size][mask], self._curves[:size][mask], self._weight[:size][mask]
+
+    def curve(self, webbing_id: int) -> np.ndarray | None:
+        """
+        Get the resampled curve of a webbing, or None if it isn't in the index.
+        """
+        with self._lock:
+            row = self._rows.get(webbing_id)
+            return None if row is None else self._curves[row].copy()
+
+    def nearest(
+        self, curve: np.ndarray, k: int, exclude_id: int | None = None, **filters
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the `k` webbings whose stretch curves are closest to `curve`.
+
+        The distance is the root mean square difference in stretch (%) over the loads
+        both curves were measured at, computed for every matching webbing at once.
+        Webbings sharing less than `MIN_OVERLAP_KN` of load range are skipped.
+        Returns the webbing ids and distances, closest first.
+        """
+        min_overlap = int(MIN_OVERLAP_KN / self.step_kn) + 1
+        with self._lock:
+            mask = self._mask(**filters)
+            if exclude_id is not None and exclude_id in self._rows:
+                mask[self._rows[exclude_id]] = False
+            ids = self._ids[: self._size][mask]
+            differences = self._curves[: self._size][mask] - curve
+
+        compared = ~np.isnan(differences)
+        overlap = compared.sum(axis=1)
+        squared = np.where(compared, differences, 0.0) ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distances = np.sqrt(squared.sum(axis=1) / overlap)
+        distances[overlap < min_overlap] = np.inf
+
+        k = min(k, int(np.isfinite(distances).sum()))
+        if k == 0:
+            return ids[:0], distances[:0]
+        closest = np.argpartition(distances, k - 1)[:k]
+        closest = closest[np.argsort(distances[closest], kind="stable")]
+        return ids[closest], distances[closest]
+
+
+STRETCH_INDEX = StretchIndex()
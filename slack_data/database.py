@@ -1,31 +1,227 @@
-from typing import Annotated, Optional
+from collections.abc import Callable
+from typing import Annotated, Concatenate, ParamSpec, TypeVar
+
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from slack_data.api.metrics import instrument_engine
+from slack_data.api.profiling import current_profile
+from slack_data.api.revisions import REVISIONS
+from slack_data.models.exchange_rates import create_price_triggers
+from slack_data.models.revisions import create_revision_triggers
+from slack_data.models.search import create_search_index
+from slack_data.settings import SETTINGS, Settings
+
+P = ParamSpec("P")
+T = TypeVar("T")
 
-sqlite_file_name = "database.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
 connect_args = {"check_same_thread": False}
 
-DATABASE_ENGINE: Optional[Engine] = None
+# SQLite allows a single writer at a time, so writes share one connection and queue for it
+# instead of failing with "database is locked". Reads use a separate pool of read-only
+# connections, which WAL mode lets run alongside the writer.
+DATABASE_ENGINE: Engine | None = None
+READ_ENGINE: Engine | None = None
+# Streamed exports hold a connection for as long as the client reads, so they get their own
+# read-only pool and can never take every connection of `READ_ENGINE`
+EXPORT_ENGINE: Engine | None = None
+
+# Only created when `Settings.async_db` is enabled, the sync engines are still used at startup
+ASYNC_DATABASE_ENGINE: AsyncEngine | None = None
+ASYNC_READ_ENGINE: AsyncEngine | None = None
+
+
+def apply_pragmas(settings: Settings, read_only: bool):
+    """
+    Create a `connect` listener that configures every new SQLite connection.
+    """
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA synchronous = {settings.synchronous}")
+        cursor.execute(f"PRAGMA cache_size = {-int(settings.cache_size_kib)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.mmap_size)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+        if not read_only:
+            # Let `begin_transaction` emit BEGIN instead of the driver, which only does so
+            # before DML and so breaks SAVEPOINTs that follow a SELECT
+            dbapi_connection.isolation_level = None
+
+    return on_connect
+
+
+def begin_transaction(connection) -> None:
+    """
+    Start write transactions with the write lock held, so they never fail to upgrade from a read.
+    """
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _pool_args(settings: Settings, read_only: bool, pool_size: int | None = None) -> dict:
+    if pool_size is None:
+        pool_size = settings.read_pool_size if read_only else 1
+    return {
+        "echo": settings.echo_sql,
+        "pool_size": pool_size,
+        "max_overflow": 0,
+        "pool_timeout": settings.pool_timeout,
+    }
 
 
-def create_db_and_tables():
-    global DATABASE_ENGINE
+def create_database_engine(settings: Settings, read_only: bool = False, pool_size: int | None = None) -> Engine:
+    engine = create_engine(
+        settings.database_url, connect_args=connect_args, **_pool_args(settings, read_only, pool_size)
+    )
+    event.listen(engine, "connect", apply_pragmas(settings, read_only))
+    if not read_only:
+        event.listen(engine, "begin", begin_transaction)
+    instrument_engine(engine)
+    return engine
+
+
+def create_async_database_engine(settings: Settings, read_only: bool = False) -> AsyncEngine:
+    engine = create_async_engine(
+        settings.async_database_url, connect_args=connect_args, **_pool_args(settings, read_only)
+    )
+    event.listen(engine.sync_engine, "connect", apply_pragmas(settings, read_only))
+    if not read_only:
+        event.listen(engine.sync_engine, "begin", begin_transaction)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+def create_db_and_tables(settings: Settings = SETTINGS):
+    global DATABASE_ENGINE, READ_ENGINE, EXPORT_ENGINE, ASYNC_DATABASE_ENGINE, ASYNC_READ_ENGINE
     if DATABASE_ENGINE is not None:
         raise RuntimeError("`create_db_and_tables` called, but database already created.")
-    DATABASE_ENGINE = create_engine(
-        sqlite_url, connect_args=connect_args, echo=True
-    )
+    DATABASE_ENGINE = create_database_engine(settings)
     SQLModel.metadata.create_all(DATABASE_ENGINE)
+    with DATABASE_ENGINE.begin() as connection:
+        create_search_index(connection)
+        create_price_triggers(connection)
+        create_revision_triggers(connection)
+    REVISIONS.open(settings)
+    READ_ENGINE = create_database_engine(settings, read_only=True)
+    EXPORT_ENGINE = create_database_engine(settings, read_only=True, pool_size=settings.export_pool_size)
+    if settings.async_db:
+        ASYNC_DATABASE_ENGINE = create_async_database_engine(settings)
+        ASYNC_READ_ENGINE = create_async_database_engine(settings, read_only=True)
+
+
+async def dispose_engines():
+    """
+    Close every pooled connection, call on shutdown.
+    """
+    for engine in (ASYNC_DATABASE_ENGINE, ASYNC_READ_ENGINE):
+        if engine is not None:
+            await engine.dispose()
+    for engine in (DATABASE_ENGINE, READ_ENGINE, EXPORT_ENGINE):
+        if engine is not None:
+            engine.dispose()
+    REVISIONS.close()
 
 
 def get_session():
-    global DATABASE_ENGINE
     if DATABASE_ENGINE is None:
         raise RuntimeError("Database engine not created. Call `create_db_and_tables` first.")
     with Session(DATABASE_ENGINE) as session:
         yield session
 
 
+def get_read_session():
+    """
+    Get a session on the read-only pool, for handlers that don't write.
+    """
+    if READ_ENGINE is None:
+        raise RuntimeError("Database engine not created. Call `create_db_and_tables` first.")
+    with Session(READ_ENGINE) as session:
+        yield session
+
+
+def open_export_session() -> Session:
+    """
+    Open a session on the export pool for a streamed response, which outlives the request.
+    The caller closes it.
+    """
+    if EXPORT_ENGINE is None:
+        raise RuntimeError("Database engine not created. Call `create_db_and_tables` first.")
+    return Session(EXPORT_ENGINE)
+
+
+class Database:
+    """
+    Runs synchronous database code for an `async def` handler without blocking the event loop.
+
+    With a `Session` the code runs on the threadpool. With an `AsyncSession` it runs through
+    `run_sync`, which awaits the aiosqlite driver on the event loop instead of holding a
+    worker thread for the whole request.
+    """
+
+    def __init__(self, session: Session | AsyncSession):
+        self.session = session
+
+    async def run(
+        self, function: Callable[Concatenate[Session, P], T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """
+        Call `function(session, *args, **kwargs)` and release the connection once it returns.
+
+        Releasing the connection right away, rather than when the request finishes, means a
+        request never holds a connection while it waits for a worker thread. When the request
+        is being profiled, the function is profiled inside its worker thread.
+        """
+        if isinstance(self.session, AsyncSession):
+            try:
+                return await self.session.run_sync(function, *args, **kwargs)
+            finally:
+                await self.session.close()
+
+        def call() -> T:
+            try:
+                return function(self.session, *args, **kwargs)
+            finally:
+                self.session.close()
+
+        profile = current_profile()
+        if profile is not None:
+            return await profile.run_in_threadpool(call)
+        return await run_in_threadpool(call)
+
+
+async def _open_database(engine: Engine | None, async_engine: AsyncEngine | None):
+    if async_engine is not None:
+        async with AsyncSession(async_engine) as session:
+            yield Database(session)
+        return
+    if engine is None:
+        raise RuntimeError("Database engine not created. Call `create_db_and_tables` first.")
+    with Session(engine) as session: # `Database.run` already released the connection
+        yield Database(session)
+
+
+async def get_db():
+    async for database in _open_database(DATABASE_ENGINE, ASYNC_DATABASE_ENGINE):
+        yield database
+
+
+async def get_read_db():
+    """
+    Get a `Database` on the read-only pool, for handlers that don't write.
+    """
+    async for database in _open_database(READ_ENGINE, ASYNC_READ_ENGINE):
+        yield database
+
+
 SessionDep = Annotated[Session, Depends(get_session)]
+ReadSessionDep = Annotated[Session, Depends(get_read_session)]
+DatabaseDep = Annotated[Database, Depends(get_db)]
+ReadDatabaseDep = Annotated[Database, Depends(get_read_db)]
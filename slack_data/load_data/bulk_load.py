@@ -0,0 +1,92 @@
+import time
+from collections.abc import Callable, Iterable, Iterator
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, select
+
+from slack_data.models.brands import Brand, BrandCreate
+
+BATCH_SIZE = 1000
+
+
+def chunked(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    """
+    Split an iterable of rows into lists of at most `size` rows.
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def resolve_brands(session: Session, brand_names: Iterable[str]) -> dict[str, int]:
+    """
+    Map brand names to brand ids, inserting any brands that don't exist yet.
+
+    Existing brands are looked up with a single `IN` query and missing brands
+    are inserted together, so the cost doesn't depend on the number of rows.
+    """
+    names = set(brand_names)
+    if not names:
+        return {}
+
+    statement = select(Brand.name, Brand.id).where(Brand.name.in_(names))
+    brand_ids = {name: brand_id for name, brand_id in session.exec(statement)}
+
+    missing = names - brand_ids.keys()
+    if missing:
+        session.execute(
+            insert(Brand), [BrandCreate(name=name).model_dump() for name in sorted(missing)]
+        )
+        statement = select(Brand.name, Brand.id).where(Brand.name.in_(missing))
+        brand_ids.update({name: brand_id for name, brand_id in session.exec(statement)})
+        print(f"Added {len(missing)} brands to the database.")
+
+    return brand_ids
+
+
+def bulk_load(
+    session: Session,
+    model: type[SQLModel],
+    items: Iterable[dict],
+    get_brand_name: Callable[[dict], str],
+    build_row: Callable[[dict, int], dict],
+    batch_size: int = BATCH_SIZE,
+    insert_batch: Callable[[Session, list[dict]], None] | None = None,
+) -> int:
+    """
+    Insert raw items into the table of `model` in a single transaction.
+
+    Items are consumed lazily in batches of `batch_size`. For each batch, brands not
+    seen before are resolved together, then `build_row` turns each item and its brand
+    id into a validated column dict and the batch is inserted with one executemany
+    statement, or with `insert_batch` when rows need more than one table. Only one
+    batch is held in memory at a time. Returns the number of inserted rows.
+    """
+    start = time.perf_counter()
+    brand_ids: dict[str, int] = {}
+    row_count = 0
+
+    for batch in chunked(items, batch_size):
+        brand_names = [get_brand_name(item) for item in batch]
+        brand_ids.update(resolve_brands(session, set(brand_names) - brand_ids.keys()))
+
+        rows = [build_row(item, brand_ids[name]) for item, name in zip(batch, brand_names)]
+        if insert_batch is None:
+            session.execute(insert(model), rows)
+        else:
+            insert_batch(session, rows)
+        row_count += len(rows)
+    session.commit()
+
+    elapsed = time.perf_counter() - start
+    rate = row_count / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"Inserted {row_count} rows into `{model.__tablename__}` "
+        f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)."
+    )
+    return row_count
@@ -0,0 +1,109 @@
+"""
+Load exchange rates from a local JSON file and renormalize the prices they affect.
+
+The file holds the units of every currency per unit of the reference currency, like the
+ECB's euro reference rates:
+
+    {"reference": "EUR", "rates": {"USD": 1.08, "GBP": 0.83, ...}}
+
+Run `python -m slack_data.load_data.load_exchange_rates --help` to load rates from the
+command line. A running server picks up the new prices on its next request, through the
+table revisions.
+"""
+import argparse
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from slack_data.load_data.sync import file_digest
+from slack_data.models.exchange_rates import (
+    REFERENCE_CURRENCY,
+    ExchangeRate,
+    update_normalized_prices,
+)
+from slack_data.models.sources import SourceFile
+from slack_data.utilities.currencies import Currency, get_currency
+
+EXCHANGE_RATE_FILE = Path(__file__).parent.parent.parent / "exchange_rates.json"
+
+
+def read_exchange_rates(path: Path = EXCHANGE_RATE_FILE) -> dict[Currency, float]:
+    """
+    Read the rates of an exchange rate file, which must be relative to the reference currency.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"exchange rate file not found: {path}")
+    with open(path) as file:
+        data = json.load(file)
+
+    reference = get_currency(str(data.get("reference", REFERENCE_CURRENCY.value)))
+    if reference != REFERENCE_CURRENCY:
+        raise ValueError(f"exchange rates must be relative to {REFERENCE_CURRENCY.value}, not {reference.value}")
+    rates = {get_currency(code): float(rate) for code, rate in data.get("rates", {}).items()}
+    for currency, rate in rates.items():
+        if rate <= 0:
+            raise ValueError(f"invalid exchange rate for {currency.value}: {rate}")
+    rates[REFERENCE_CURRENCY] = 1.0
+    return rates
+
+
+def set_exchange_rates(session: Session, rates: dict[Currency, float]) -> list[Currency]:
+    """
+    Store exchange rates and recompute the normalized prices in the currencies whose rate changed.
+
+    Everything is written in a single transaction. Returns the changed currencies.
+    """
+    existing = {rate.currency: rate.rate for rate in session.exec(select(ExchangeRate))}
+    changed = [currency for currency, rate in rates.items() if existing.get(currency) != rate]
+    updated_at = datetime.now(timezone.utc)
+    for currency in changed:
+        session.merge(ExchangeRate(currency=currency, rate=rates[currency], updated_at=updated_at))
+    if changed:
+        session.flush()
+        update_normalized_prices(session, changed)
+    session.commit()
+    return changed
+
+
+def load_exchange_rates(session: Session, path: Path = EXCHANGE_RATE_FILE, force: bool = False) -> list[Currency]:
+    """
+    Load the exchange rate file, skipping it when its digest matches the last load, unless `force` is set.
+    """
+    digest = file_digest(path)
+    source_file = session.get(SourceFile, path.name)
+    if source_file is not None and source_file.digest == digest and not force:
+        print(f"`{path.name}` is unchanged since the last load, skipping.")
+        return []
+
+    rates = read_exchange_rates(path)
+    session.merge(
+        SourceFile(
+            name=path.name,
+            digest=digest,
+            row_count=len(rates),
+            synced_at=datetime.now(timezone.utc),
+        )
+    )
+    changed = set_exchange_rates(session, rates)
+    print(f"Loaded {len(rates)} exchange rates from `{path.name}`, {len(changed)} changed.")
+    return changed
+
+
+def main():
+    import slack_data.main  # noqa: F401, registers every model before the mappers are configured
+    from slack_data.database import create_db_and_tables, get_session
+
+    parser = argparse.ArgumentParser(description="Load exchange rates and renormalize prices.")
+    parser.add_argument("path", nargs="?", type=Path, default=EXCHANGE_RATE_FILE)
+    parser.add_argument("--force", action="store_true", help="Load the file even if it's unchanged")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with next(get_session()) as session:
+        load_exchange_rates(session, args.path, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,26 @@
-import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
-from sqlmodel import select
+from sqlmodel import Session
 
-from slack_data.database import SessionDep
-from slack_data.models.brands import Brand, BrandCreate
+from slack_data.load_data.bulk_load import BATCH_SIZE, bulk_load
+from slack_data.load_data.stream_json import CHUNK_SIZE, iter_json_array
 from slack_data.models.rollers import BearingMaterial, LockType, SliderType, Roller, RollerCreate
 from slack_data.utilities.currencies import get_currency
 from slack_data.utilities.materials import MetalMaterial, RollerMaterial
+from slack_data.utilities.widths import parse_width_range
 
 
 ROLLER_FILE = Path(__file__).parent.parent.parent / "rollers.json"
 
-def load_rollers_json() -> list[dict]:
+def iter_rollers_json(chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
     """
-    Load the rollers data from the `rollers.json` file.
+    Stream the roller entries from the `rollers.json` file, one entry at a time.
     """
     if not ROLLER_FILE.exists():
-        raise FileNotFoundError(f"rollers file not found: {ROLLER_FILE}")
+        raise FileNotFoundError(f"roller file not found: {ROLLER_FILE}")
 
-    with open(ROLLER_FILE, "r", encoding="utf-8") as file:
-        roller_data = json.load(file)
-
-    return roller_data
+    yield from iter_json_array(ROLLER_FILE, chunk_size)
 
 def clean_roller_data(rollers: dict) -> dict:
     """
@@ -42,67 +40,54 @@ def clean_roller_data(rollers: dict) -> dict:
             cleaned_rollers[key] = str(value) if value is not None else None
     return cleaned_rollers
 
-def add_rollers_to_db(rollers: list[dict], session: SessionDep) -> None:
+def get_brand_name(roller: dict) -> str:
     """
-    Add the loaded roller and brand data to the database session.
+    Get the brand name of a roller entry.
     """
+    brand_name = roller.get("manufacturer") or roller.get("brand")
 
+    if not brand_name:
+        raise ValueError("Brand name is missing from roller data.")
 
-    for roller in rollers:
-        brand_id = get_brand(session, roller)
-
-        if (currency := roller.get("price_unit")) is not None:
-            currency = get_currency(currency)
-
-        roller_create = RollerCreate(
-            name=str(roller.get("name")),
-            brand_id=brand_id,
-            material=get_metal_material(str(roller.get("materialType", ""))),
-            roller_material=get_roller_material(str(roller.get("roller_material", ""))),
-            lock_type=get_lock_type(str(roller.get("locking_type", ""))),
-            bearing_material=get_bearing_material(str(roller.get("bearing_material", "steel"))),
-            width=roller.get("width", None),
-            weight=float(roller.get("weight", 0)),
-            breaking_strength=roller.get("mbs"),
-            slider_type=get_slider_type(str(roller.get("slider_type", ""))),
-            isa_certified=roller.get("isa_approved", False),
-            price=roller.get("price"),
-            currency=currency,
-        )
-        db_roller = Roller.model_validate(roller_create)
-        db_roller.brand = session.get(Brand, brand_id)
-        print(f"Adding roller: {db_roller.name} by {db_roller.brand.name}")
-        session.add(db_roller)
+    return str(brand_name).strip()
 
-    session.commit()
-    session.refresh(db_roller)
+def build_roller_row(roller: dict, brand_id: int) -> dict:
+    """
+    Validate a cleaned roller entry and convert it to a row for the `roller` table.
 
-def get_brand(session: SessionDep, roller: dict) -> int:
-    brand_name = roller.get("manufacturer") or roller.get("brand")
+    The numeric `width_min` and `width_max` columns are parsed from `width`, or else from
+    `compatible_webbing_width`. The free-form `width` is stored as it is.
+    """
+    if (currency := roller.get("price_unit")) is not None:
+        currency = get_currency(currency)
+    width_min, width_max = parse_width_range(roller.get("width") or roller.get("compatible_webbing_width"))
 
-    if not brand_name:
-        raise ValueError("Brand name is missing from roller data.")
-    
-    brand_name = str(brand_name).strip()
-
-    statement = select(Brand.id).where(Brand.name == brand_name)
-    result = session.exec(statement).first()
-
-    if result is None:
-        brand_create = BrandCreate(name=brand_name)
-        db_brand = Brand.model_validate(brand_create)
-        print(f"Adding brand: {db_brand.name}")
-        session.add(db_brand)
-        session.commit()
-        session.refresh(db_brand)
-        brand_id = db_brand.id
-    else:
-        brand_id = result
+    roller_create = RollerCreate(
+        name=str(roller.get("name")),
+        brand_id=brand_id,
+        material=get_metal_material(str(roller.get("materialType", ""))),
+        roller_material=get_roller_material(str(roller.get("roller_material", ""))),
+        lock_type=get_lock_type(str(roller.get("locking_type", ""))),
+        bearing_material=get_bearing_material(str(roller.get("bearing_material", "steel"))),
+        width=roller.get("width", None),
+        weight=float(roller.get("weight", 0)),
+        breaking_strength=roller.get("mbs"),
+        slider_type=get_slider_type(str(roller.get("slider_type", ""))),
+        isa_certified=roller.get("isa_approved", False),
+        price=roller.get("price"),
+        currency=currency,
+    )
+    row = roller_create.model_dump()
+    row.update(width_min=width_min, width_max=width_max)
+    return row
 
-    if brand_id is None:
-        raise ValueError(f"Brand ID for '{brand_name}' could not be determined.")
-        
-    return brand_id
+def add_rollers_to_db(
+    rollers: Iterable[dict], session: Session, batch_size: int = BATCH_SIZE
+) -> int:
+    """
+    Add the loaded roller and brand data to the database in a single transaction.
+    """
+    return bulk_load(session, Roller, rollers, get_brand_name, build_roller_row, batch_size)
 
 def get_slider_type(slider_type: str) -> SliderType:
     """
@@ -180,17 +165,22 @@ def get_bearing_material(bearing_material: str) -> BearingMaterial:
     else:
         return BearingMaterial.Other
 
-def load_rollers(session: SessionDep) -> None:
+def load_rollers(session: Session, batch_size: int = BATCH_SIZE) -> None:
     """
     Load the roller data from the JSON file and add it to the database.
+
+    Entries are streamed from the file, cleaned and inserted batch by batch,
+    so memory use doesn't grow with the size of the file.
     """
-    rollers = load_rollers_json()
-    cleaned_rollers = [clean_roller_data(roller) for roller in rollers]
+    cleaned_rollers = (clean_roller_data(roller) for roller in iter_rollers_json())
 
-    add_rollers_to_db(cleaned_rollers, session)
-    print(f"Added {len(cleaned_rollers)} rollers to the database.")
+    roller_count = add_rollers_to_db(cleaned_rollers, session, batch_size)
+    print(f"Added {roller_count} rollers to the database.")
 
 if __name__ == "__main__":
-    rollers = load_rollers_json()
-    print(f"Loaded {len(rollers)} rollers from {ROLLER_FILE}")
-    print(rollers[:1])
+    roller_count = 0
+    for roller in iter_rollers_json():
+        if roller_count == 0:
+            print(roller)
+        roller_count += 1
+    print(f"Loaded {roller_count} rollers from {ROLLER_FILE}")
@@ -1,26 +1,25 @@
-import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
-from sqlmodel import select
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session
 
-from slack_data.database import SessionDep
-from slack_data.models.brands import Brand, BrandCreate
-from slack_data.models.webbing import FiberMaterial, Webbing, WebbingCreate
+from slack_data.load_data.bulk_load import BATCH_SIZE, bulk_load
+from slack_data.load_data.stream_json import CHUNK_SIZE, iter_json_array
+from slack_data.models.webbing import FiberMaterial, Webbing, WebbingCreate, WebbingStretch
+from slack_data.utilities.stretch import stretch_at_standard_loads
 
 
 WEBBING_FILE = Path(__file__).parent.parent.parent / "webbings.json"
 
-def load_webbings_json() -> list[dict]:
+def iter_webbings_json(chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
     """
-    Load the webbing data from the ISA's `webbing.json` file.
+    Stream the webbing entries from the ISA's `webbing.json` file, one entry at a time.
     """
     if not WEBBING_FILE.exists():
         raise FileNotFoundError(f"Webbing file not found: {WEBBING_FILE}")
 
-    with open(WEBBING_FILE, "r", encoding="utf-8") as file:
-        webbing_data = json.load(file)
-
-    return webbing_data
+    yield from iter_json_array(WEBBING_FILE, chunk_size)
 
 def clean_webbing_data(webbing: dict) -> dict:
     """
@@ -34,62 +33,96 @@ def clean_webbing_data(webbing: dict) -> dict:
             cleaned_webbing[key] = None
         elif key == "isa_certified":
             cleaned_webbing[key] = bool(value) if isinstance(value, str) else value
+        elif key == "stretch":
+            cleaned_webbing[key] = value or None
         else:
             cleaned_webbing[key] = str(value) if value is not None else None
     return cleaned_webbing
 
-def add_webbings_to_db(webbings: list[dict], session: SessionDep) -> None:
-    """
-    Add the loaded webbing and branddata to the database session.
-    """
-    brand_cache = {}
-
-    for webbing in webbings:
-        brand_id, brand_cache = get_brand(session, brand_cache, webbing)
-
-        material = get_material_type(str(webbing.get("materialType", "")))
-
-        webbing_create = WebbingCreate(
-            name=str(webbing.get("name")),
-            brand_id=brand_id,
-            material=material,
-            width=int(webbing.get("width", 0)),
-            weight=float(webbing.get("weight", 0)),
-            breaking_strength=webbing.get("breakingStrength"),
-            stretch=webbing.get("stretch"),
-        )
-        db_webbing = Webbing.model_validate(webbing_create)
-        db_webbing.brand = session.get(Brand, brand_id)
-        print(f"Adding webbing: {db_webbing.name} by {db_webbing.brand.name}")
-        session.add(db_webbing)
-
-    session.commit()
-    session.refresh(db_webbing)
-
-def get_brand(session: SessionDep, brand_cache: dict[str, int], webbing: dict) -> tuple[int,dict]:
-    brand_name = str(webbing.get("brand"))
-    if brand_name not in brand_cache:
-        # get brand_id from the database or create it if it doesn't exist
-        statement = select(Brand.id).where(Brand.name == brand_name)
-        result = session.exec(statement).first()
-        if result is None:
-            # Create a new brand entry if it doesn't exist
-            brand_create = BrandCreate(name=brand_name)
-            db_brand = Brand.model_validate(brand_create)
-            print(f"Adding brand: {db_brand.name}")
-            session.add(db_brand)
-            session.commit()
-            session.refresh(db_brand)
-            brand_id = db_brand.id
-        else:
-            brand_id = result
+def get_brand_name(webbing: dict) -> str:
+    """
+    Get the brand name of a webbing entry.
+    """
+    return str(webbing.get("brand"))
+
+def build_webbing_row(webbing: dict, brand_id: int) -> dict:
+    """
+    Validate a cleaned webbing entry and convert it to a row for the `webbing` table.
 
-        if brand_id is None:
-            raise ValueError(f"Brand ID for '{brand_name}' could not be determined.")
-        
-        brand_cache[brand_name] = brand_id
-    brand_id = brand_cache[brand_name]
-    return brand_id, brand_cache
+    The stretch curve is kept under the `stretch` key as sorted (kN, percent) pairs,
+    alongside the derived stretch values, to be inserted by `insert_webbing_batch`.
+    """
+    webbing_create = WebbingCreate(
+        name=str(webbing.get("name")),
+        brand_id=brand_id,
+        material=get_material_type(str(webbing.get("materialType", ""))),
+        width=int(webbing.get("width", 0)),
+        weight=float(webbing.get("weight", 0)),
+        breaking_strength=webbing.get("breakingStrength"),
+        stretch=webbing.get("stretch"),
+    )
+    stretch = sorted((point.kn, point.percent) for point in webbing_create.stretch or [])
+
+    row = webbing_create.model_dump(exclude={"stretch"})
+    row.update(stretch_at_standard_loads(stretch))
+    row["stretch"] = stretch
+    return row
+
+def insert_stretch_points(
+    session: Session, webbing_ids: list[int], stretches: list[list[tuple[float, float]]]
+) -> None:
+    """
+    Insert the stretch curve points of a batch of webbings.
+    """
+    stretch_rows = [
+        {"webbing_id": webbing_id, "kn": kn, "percent": percent}
+        for webbing_id, stretch in zip(webbing_ids, stretches)
+        for kn, percent in stretch
+    ]
+    if stretch_rows:
+        session.execute(insert(WebbingStretch), stretch_rows)
+
+def insert_webbing_batch(session: Session, rows: list[dict]) -> None:
+    """
+    Insert a batch of webbing rows and their stretch curve points.
+    """
+    stretches = [row.pop("stretch") for row in rows]
+    statement = insert(Webbing).returning(Webbing.id, sort_by_parameter_order=True)
+    webbing_ids = session.scalars(statement, rows).all()
+    insert_stretch_points(session, webbing_ids, stretches)
+
+def update_webbing_batch(session: Session, rows: list[dict]) -> None:
+    """
+    Update a batch of existing webbing rows by id, replacing their stretch curves.
+    """
+    stretches = [row.pop("stretch") for row in rows]
+    webbing_ids = [row["id"] for row in rows]
+    session.execute(delete(WebbingStretch).where(WebbingStretch.webbing_id.in_(webbing_ids)))
+    session.execute(update(Webbing), rows)
+    insert_stretch_points(session, webbing_ids, stretches)
+
+def delete_webbing_batch(session: Session, webbing_ids: list[int]) -> None:
+    """
+    Delete a batch of webbings and their stretch curves.
+    """
+    session.execute(delete(WebbingStretch).where(WebbingStretch.webbing_id.in_(webbing_ids)))
+    session.execute(delete(Webbing).where(Webbing.id.in_(webbing_ids)))
+
+def add_webbings_to_db(
+    webbings: Iterable[dict], session: Session, batch_size: int = BATCH_SIZE
+) -> int:
+    """
+    Add the loaded webbing and brand data to the database in a single transaction.
+    """
+    return bulk_load(
+        session,
+        Webbing,
+        webbings,
+        get_brand_name,
+        build_webbing_row,
+        batch_size,
+        insert_batch=insert_webbing_batch,
+    )
 
 def get_material_type(material: str) -> FiberMaterial:
     """
@@ -109,17 +142,22 @@ def get_material_type(material: str) -> FiberMaterial:
     else:
         return FiberMaterial.OTHER
 
-def load_webbings(session: SessionDep) -> None:
+def load_webbings(session: Session, batch_size: int = BATCH_SIZE) -> None:
     """
     Load the webbing data from the JSON file and add it to the database.
+
+    Entries are streamed from the file, cleaned and inserted batch by batch,
+    so memory use doesn't grow with the size of the file.
     """
-    webbings = load_webbings_json()
-    cleaned_webbings = [clean_webbing_data(webbing) for webbing in webbings]
+    cleaned_webbings = (clean_webbing_data(webbing) for webbing in iter_webbings_json())
 
-    add_webbings_to_db(cleaned_webbings, session)
-    print(f"Added {len(cleaned_webbings)} webbings to the database.")
+    webbing_count = add_webbings_to_db(cleaned_webbings, session, batch_size)
+    print(f"Added {webbing_count} webbings to the database.")
 
 if __name__ == "__main__":
-    webbings = load_webbings_json()
-    print(f"Loaded {len(webbings)} webbings from {WEBBING_FILE}")
-    print(webbings[:1])
+    webbing_count = 0
+    for webbing in iter_webbings_json():
+        if webbing_count == 0:
+            print(webbing)
+        webbing_count += 1
+    print(f"Loaded {webbing_count} webbings from {WEBBING_FILE}")
@@ -0,0 +1,79 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+CHUNK_SIZE = 1 << 16 # characters read from the file at a time
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_json_array(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the items of a top level JSON array one at a time.
+
+    The file is read in chunks and each item is decoded as soon as it is complete,
+    so memory use is bounded by the largest single item rather than the file size.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8") as file:
+        buffer = ""
+        position = 0
+        at_eof = False
+
+        def read_more(size: int) -> None:
+            nonlocal buffer, position, at_eof
+            chunk = file.read(size)
+            if not chunk:
+                at_eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        def skip_whitespace() -> None:
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer) or at_eof:
+                    return
+                read_more(chunk_size)
+
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] != "[":
+            raise ValueError(f"Expected a JSON array in {path}")
+        position += 1
+
+        expect_item = True
+        while True:
+            skip_whitespace()
+            if position >= len(buffer):
+                raise ValueError(f"Unexpected end of file in {path}")
+
+            character = buffer[position]
+            if character == "]":
+                return
+            if not expect_item:
+                if character != ",":
+                    raise ValueError(f"Expected ',' or ']' in {path}, got {character!r}")
+                position += 1
+                expect_item = True
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+                read_more(max(chunk_size, len(buffer)))
+                continue
+
+            if not at_eof and (end >= len(buffer) or buffer[end] not in _DELIMITERS):
+                # A value not followed by a delimiter (e.g. a number) may have been cut short.
+                read_more(chunk_size)
+                continue
+
+            position = end
+            expect_item = False
+            yield item
@@ -0,0 +1,317 @@
+"""
+Incrementally sync the database with the seed JSON files.
+
+Every entry is matched to an existing row by its natural key (brand name, name) and
+hashed, so only new and changed entries are written. A file whose digest matches the
+last sync is skipped without being parsed.
+
+Run `python -m slack_data.load_data.sync --help` to sync from the command line. A running
+server picks up the changes on its next request, through the table revisions.
+"""
+import argparse
+import hashlib
+import json
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import (
+    Column,
+    MetaData,
+    String,
+    Table,
+    delete,
+    exists,
+    insert,
+    tuple_,
+    update,
+)
+from sqlmodel import Session, SQLModel, select
+
+from slack_data.load_data import load_rollers, load_webbings
+from slack_data.load_data.bulk_load import BATCH_SIZE, chunked, resolve_brands
+from slack_data.models.brands import Brand
+from slack_data.models.rollers import Roller
+from slack_data.models.sources import SourceFile
+from slack_data.models.webbing import Webbing
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+# Natural keys (brand name, name) of the entries synced so far, see `create_seen_table`
+SEEN_KEYS = Table(
+    "sync_seen_keys",
+    MetaData(),
+    Column("brand_name", String, primary_key=True),
+    Column("name", String, primary_key=True),
+    prefixes=["TEMPORARY"],
+)
+
+
+@dataclass(frozen=True)
+class SeedSource:
+    """
+    A seed JSON file and how to turn its entries into rows of `model`.
+    """
+    path: Path
+    model: type[SQLModel]
+    iter_items: Callable[[], Iterable[dict]]
+    clean: Callable[[dict], dict]
+    get_brand_name: Callable[[dict], str]
+    build_row: Callable[[dict, int], dict]
+    insert_batch: Callable[[Session, list[dict]], None] | None = None
+    update_batch: Callable[[Session, list[dict]], None] | None = None
+    delete_batch: Callable[[Session, list[int]], None] | None = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+@dataclass
+class SyncResult:
+    source: str
+    table: str
+    skipped: bool = False
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    retired: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.retired)
+
+
+SEED_SOURCES = (
+    SeedSource(
+        path=load_webbings.WEBBING_FILE,
+        model=Webbing,
+        iter_items=load_webbings.iter_webbings_json,
+        clean=load_webbings.clean_webbing_data,
+        get_brand_name=load_webbings.get_brand_name,
+        build_row=load_webbings.build_webbing_row,
+        insert_batch=load_webbings.insert_webbing_batch,
+        update_batch=load_webbings.update_webbing_batch,
+        delete_batch=load_webbings.delete_webbing_batch,
+    ),
+    SeedSource(
+        path=load_rollers.ROLLER_FILE,
+        model=Roller,
+        iter_items=load_rollers.iter_rollers_json,
+        clean=load_rollers.clean_roller_data,
+        get_brand_name=load_rollers.get_brand_name,
+        build_row=load_rollers.build_roller_row,
+    ),
+)
+
+
+def file_digest(path: Path) -> str:
+    """
+    Get the sha256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_hash(item: dict) -> str:
+    """
+    Hash a raw JSON entry independently of its key order.
+    """
+    payload = json.dumps(item, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_existing_rows(
+    session: Session, model: type[SQLModel], keys: Iterable[tuple[str, str]]
+) -> dict[tuple[str, str], tuple[int, str | None]]:
+    """
+    Map the natural keys (brand name, name) of a batch that are already rows to their id and source hash.
+    """
+    keys = set(keys)
+    statement = (
+        select(Brand.name, model.name, model.id, model.source_hash)
+        .join(Brand)
+        .where(model.name.in_({name for _, name in keys}))
+    )
+    return {
+        (brand_name, name): (row_id, source_hash)
+        for brand_name, name, row_id, source_hash in session.exec(statement)
+        if (brand_name, name) in keys
+    }
+
+
+def create_seen_table(session: Session) -> None:
+    """
+    Create an empty temporary table of the natural keys synced so far. It's kept in SQLite
+    rather than in memory, so a sync holds a single batch however large the file is.
+    """
+    SEEN_KEYS.create(session.connection(), checkfirst=True)
+    session.execute(delete(SEEN_KEYS))
+
+
+def mark_seen(session: Session, keys: list[tuple[str, str]]) -> set[tuple[str, str]]:
+    """
+    Record the keys of a batch as seen, returning those already seen in an earlier batch.
+    """
+    if not keys:
+        return set()
+    key_columns = tuple_(SEEN_KEYS.c.brand_name, SEEN_KEYS.c.name)
+    seen = set(session.execute(select(SEEN_KEYS.c.brand_name, SEEN_KEYS.c.name).where(key_columns.in_(keys))))
+    session.execute(
+        insert(SEEN_KEYS).prefix_with("OR IGNORE"),
+        [{"brand_name": brand_name, "name": name} for brand_name, name in keys],
+    )
+    return {tuple(key) for key in seen}
+
+
+def get_unseen_ids(session: Session, model: type[SQLModel]) -> list[int]:
+    """
+    Get the ids of the rows that came from the file, but weren't in it this time.
+    """
+    seen = exists().where(SEEN_KEYS.c.brand_name == Brand.name, SEEN_KEYS.c.name == model.name)
+    statement = select(model.id).join(Brand).where(model.source_hash.is_not(None), ~seen)
+    return list(session.exec(statement))
+
+
+def sync_source(
+    session: Session,
+    source: SeedSource,
+    retire: bool = False,
+    force: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> SyncResult:
+    """
+    Insert new entries and update changed entries of a seed file in a single transaction.
+
+    With `retire`, rows that came from the file but are no longer in it are deleted.
+    Rows created through the API have no source hash and are never retired.
+    The file is skipped when its digest matches the last sync, unless `force` is set.
+    """
+    start = time.perf_counter()
+    table = source.model.__tablename__
+    result = SyncResult(source=source.name, table=table)
+
+    digest = file_digest(source.path)
+    source_file = session.get(SourceFile, source.name)
+    if source_file is not None and source_file.digest == digest and not force:
+        result.skipped = True
+        print(f"`{source.name}` is unchanged since the last sync, skipping.")
+        return result
+
+    create_seen_table(session)
+    brand_ids: dict[str, int] = {}
+    entries = 0
+
+    for batch in chunked(source.iter_items(), batch_size):
+        entries_by_key: dict[tuple[str, str], tuple[dict, str]] = {}
+        for raw_item in batch:
+            source_hash = record_hash(raw_item)
+            item = source.clean(raw_item)
+            key = (source.get_brand_name(item), str(item.get("name")))
+            if key in entries_by_key:
+                print(f"Skipping duplicate entry {key} in `{source.name}`.")
+                continue
+            entries_by_key[key] = (item, source_hash)
+        for key in mark_seen(session, list(entries_by_key)):
+            print(f"Skipping duplicate entry {key} in `{source.name}`.")
+            del entries_by_key[key]
+        entries += len(entries_by_key)
+
+        existing = get_existing_rows(session, source.model, entries_by_key)
+        items = []
+        for key, (item, source_hash) in entries_by_key.items():
+            row_id, existing_hash = existing.get(key, (None, None))
+            if row_id is not None and existing_hash == source_hash:
+                result.unchanged += 1
+                continue
+            items.append((item, key[0], source_hash, row_id))
+
+        brand_names = {brand_name for _, brand_name, _, _ in items}
+        brand_ids.update(resolve_brands(session, brand_names - brand_ids.keys()))
+
+        new_rows, changed_rows = [], []
+        for item, brand_name, source_hash, row_id in items:
+            row = source.build_row(item, brand_ids[brand_name])
+            row["source_hash"] = source_hash
+            if row_id is None:
+                new_rows.append(row)
+            else:
+                row["id"] = row_id
+                changed_rows.append(row)
+
+        if new_rows:
+            if source.insert_batch is None:
+                session.execute(insert(source.model), new_rows)
+            else:
+                source.insert_batch(session, new_rows)
+        if changed_rows:
+            if source.update_batch is None:
+                session.execute(update(source.model), changed_rows)
+            else:
+                source.update_batch(session, changed_rows)
+        result.inserted += len(new_rows)
+        result.updated += len(changed_rows)
+
+    if retire:
+        retired_ids = get_unseen_ids(session, source.model)
+        for ids in chunked(retired_ids, batch_size):
+            if source.delete_batch is None:
+                session.execute(delete(source.model).where(source.model.id.in_(ids)))
+            else:
+                source.delete_batch(session, ids)
+        result.retired = len(retired_ids)
+
+    session.merge(
+        SourceFile(
+            name=source.name,
+            digest=digest,
+            row_count=entries,
+            synced_at=datetime.now(timezone.utc),
+        )
+    )
+    session.commit()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Synced `{source.name}` into `{table}` in {elapsed:.2f}s: {result.inserted} inserted, "
+        f"{result.updated} updated, {result.unchanged} unchanged, {result.retired} retired."
+    )
+    return result
+
+
+def sync_seed_files(
+    session: Session,
+    retire: bool = False,
+    force: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> list[SyncResult]:
+    """
+    Sync every seed file, see `sync_source`.
+    """
+    return [
+        sync_source(session, source, retire=retire, force=force, batch_size=batch_size)
+        for source in SEED_SOURCES
+    ]
+
+
+def main():
+    import slack_data.main  # noqa: F401, registers every model before the mappers are configured
+    from slack_data.database import create_db_and_tables, get_session
+
+    parser = argparse.ArgumentParser(description="Sync the database with the seed JSON files.")
+    parser.add_argument("--retire", action="store_true", help="Delete rows that are no longer in the files")
+    parser.add_argument("--force", action="store_true", help="Check every entry, even if a file is unchanged")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with next(get_session()) as session:
+        sync_seed_files(session, retire=args.retire, force=args.force, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
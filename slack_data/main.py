@@ -1,16 +1,23 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from sqlmodel import select
-
-from slack_data.database import get_session, create_db_and_tables
-from slack_data.load_data.load_rollers import load_rollers
-from slack_data.load_data.load_webbings import load_webbings
+from fastapi.responses import PlainTextResponse
+
+from slack_data.database import create_db_and_tables, dispose_engines, get_session
+from slack_data.load_data.load_exchange_rates import load_exchange_rates
+from slack_data.load_data.sync import sync_seed_files
+from slack_data.api.metrics import METRICS, MetricsMiddleware
+from slack_data.api.profiling import ProfilingMiddleware
+from slack_data.api.response_cache import RESPONSE_CACHE, CacheHit, cache_hit_handler
+from slack_data.api.revisions import NotModified, not_modified_handler
 from slack_data.api.routers.brand_router import brand_router
+from slack_data.api.routers.export_router import export_router
+from slack_data.api.routers.profile_router import profile_router
 from slack_data.api.routers.roller_router import roller_router
+from slack_data.api.routers.search_router import search_router
+from slack_data.api.routers.stats_router import stats_router
 from slack_data.api.routers.webbing_router import webbing_router
 from slack_data.api.routers.weblock_router import weblock_router
-from slack_data.models.rollers import Roller
-from slack_data.models.webbing import Webbing
+from slack_data.settings import SETTINGS
 
 
 
@@ -18,25 +25,39 @@ from slack_data.models.webbing import Webbing
 async def lifespan(app: FastAPI):
     create_db_and_tables()
     with next(get_session()) as session:
-        existing_webbings = session.exec(select(Webbing)).first()
-        if existing_webbings is None: # Only load from `webbings.json` if the database is empty
-            print("Loading webbing data into the database...")
-            load_webbings(session=session)
-        existing_rollers = session.exec(select(Roller)).first()
-        if existing_rollers is None: # Only load from `rollers.json` if the database is empty
-            print("Loading roller data into the database...")
-            load_rollers(session=session)
+        # Prices are normalized with these rates whether or not the seed files are synced
+        load_exchange_rates(session)
+        if SETTINGS.sync_seed_files: # Only new and changed entries of `webbings.json` and `rollers.json` are written
+            sync_seed_files(session, retire=SETTINGS.retire_seed_rows)
     yield
+    await dispose_engines()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_exception_handler(NotModified, not_modified_handler)
+app.add_exception_handler(CacheHit, cache_hit_handler)
 
 app.include_router(webbing_router)
 app.include_router(brand_router)
 app.include_router(weblock_router)
 app.include_router(roller_router)
+app.include_router(search_router)
+app.include_router(export_router)
+app.include_router(stats_router)
+app.include_router(profile_router)
 
 @app.get("/")
 def root():
     return {"message": "Welcome to SlackData"}
 
+@app.get("/cache")
+def cache_stats():
+    return RESPONSE_CACHE.stats()
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Request latency and SQL statistics per route, in the Prometheus text format.
+    """
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
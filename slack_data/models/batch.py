@@ -0,0 +1,23 @@
+from typing import Any
+
+from sqlmodel import SQLModel
+
+MAX_BATCH_SIZE = 1000
+
+
+class BatchItemResult(SQLModel):
+    """
+    Outcome of one item of a batch write.
+    """
+    index: int # position of the item in the request body
+    id: int | None = None # id of the created or updated row, None if the item failed
+    errors: list[dict[str, Any]] | None = None
+
+
+class BatchResult(SQLModel):
+    """
+    Model for the response of a batch create or update.
+    """
+    succeeded: int
+    failed: int
+    items: list[BatchItemResult]
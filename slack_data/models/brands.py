@@ -52,6 +52,29 @@ class BrandPublic(BaseBrands):
     """
 
     webbings: list[str]
+    weblocks: list[str] = []
+    rollers: list[str] = []
+
+    @computed_field
+    def webbing_count(self) -> int:
+        """
+        Computed field to get the number of webbings associated with this brand.
+        """
+        return len(self.webbings)
+
+    @computed_field
+    def weblock_count(self) -> int:
+        """
+        Computed field to get the number of weblocks associated with this brand.
+        """
+        return len(self.weblocks)
+
+    @computed_field
+    def roller_count(self) -> int:
+        """
+        Computed field to get the number of rollers associated with this brand.
+        """
+        return len(self.rollers)
 
 
 class BrandCreate(BaseBrands):
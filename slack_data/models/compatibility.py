@@ -0,0 +1,17 @@
+from sqlmodel import SQLModel
+
+from slack_data.models.rollers import RollerPublic
+from slack_data.models.weblocks import WeblockPublic
+
+
+class WebbingCompatibility(SQLModel):
+    """
+    Model for the weblocks and rollers that fit a webbing's width.
+
+    Weblocks fit when their width equals the webbing's, rollers when it is within
+    their `width_min` to `width_max` range.
+    """
+    webbing_id: int
+    width: int # mm
+    weblocks: list[WeblockPublic]
+    rollers: list[RollerPublic]
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from sqlalchemy import Connection, func, text, update
+from sqlmodel import Field, Session, SQLModel, select
+
+from slack_data.models.rollers import Roller
+from slack_data.models.webbing import Webbing
+from slack_data.models.weblocks import Weblock
+from slack_data.utilities.currencies import Currency
+
+# Prices are normalized to this currency in the `price_normalized` column of every priced table
+REFERENCE_CURRENCY = Currency.EUR
+PRICED_MODELS = (Webbing, Roller, Weblock)
+PRICE_DECIMALS = 2
+
+
+class ExchangeRate(SQLModel, table=True):
+    """
+    Units of a currency per unit of the reference currency, like the ECB's euro reference rates.
+    """
+    __tablename__ = "exchange_rate"
+
+    currency: Currency = Field(primary_key=True)
+    rate: float = Field(gt=0)
+    updated_at: datetime
+
+
+def _normalized_price(alias: str) -> str:
+    rate = f"(SELECT rate FROM exchange_rate WHERE exchange_rate.currency = {alias}.currency)"
+    return f"ROUND({alias}.price / {rate}, {PRICE_DECIMALS})"
+
+
+def _price_triggers_ddl() -> list[str]:
+    statements = []
+    for model in PRICED_MODELS:
+        table = model.__tablename__
+        set_price = f"UPDATE {table} SET price_normalized = {_normalized_price('new')} WHERE id = new.id;"
+        statements += [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_price_insert AFTER INSERT ON {table} BEGIN
+                {set_price}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_price_update AFTER UPDATE OF price, currency ON {table} BEGIN
+                {set_price}
+            END
+            """,
+        ]
+    return statements
+
+
+def create_price_triggers(connection: Connection) -> None:
+    """
+    Create the triggers that set `price_normalized` on every insert, and on updates of the price or currency.
+
+    The normalized price is NULL without a price, a currency or an exchange rate for it.
+    """
+    for statement in _price_triggers_ddl():
+        connection.execute(text(statement))
+
+
+def update_normalized_prices(session: Session, currencies: list[Currency] | None = None) -> None:
+    """
+    Recompute `price_normalized` with one `UPDATE` per table, after exchange rates changed.
+
+    Only rows priced in `currencies` are updated, every row if it's None.
+    """
+    for model in PRICED_MODELS:
+        rate = select(ExchangeRate.rate).where(ExchangeRate.currency == model.currency).scalar_subquery()
+        statement = update(model).values(price_normalized=func.round(model.price / rate, PRICE_DECIMALS))
+        if currencies is not None:
+            statement = statement.where(model.currency.in_(currencies))
+        session.execute(statement, execution_options={"synchronize_session": False})
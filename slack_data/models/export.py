@@ -0,0 +1,20 @@
+from enum import Enum
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportEntity(str, Enum):
+    WEBBING = "webbing"
+    ROLLER = "roller"
+    WEBLOCK = "weblock"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
@@ -0,0 +1,62 @@
+from typing import Literal
+
+from pydantic import field_validator, model_validator
+from sqlmodel import Field, SQLModel
+
+MAX_PAGE_SIZE = 100
+
+
+class PageParams(SQLModel):
+    """
+    Query parameters for paginating and sorting a list endpoint.
+    """
+    cursor: str | None = None # opaque cursor from the `X-Next-Cursor` header of the previous page
+    offset: int = Field(default=0, ge=0) # fallback when no cursor is given
+    limit: int = Field(default=10, ge=1, le=MAX_PAGE_SIZE)
+    sort: Literal["name"] = "name"
+    descending: bool = False
+
+
+class ListFilters(PageParams):
+    """
+    Query filters shared by every list endpoint.
+
+    `ids` fetches many rows by id in one request, given as `ids=1,2,3` or `ids=1&ids=2`.
+    Unless `limit` is set, every requested row is returned in one page.
+    """
+    ids: list[int] | None = Field(default=None, max_length=MAX_PAGE_SIZE)
+
+    @field_validator("ids", mode="before")
+    @classmethod
+    def split_ids(cls, value):
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return [part for item in value for part in str(item).split(",") if part.strip()]
+        return value
+
+    @model_validator(mode="after")
+    def fit_limit_to_ids(self):
+        if self.ids and "limit" not in self.model_fields_set:
+            self.limit = len(self.ids)
+        return self
+
+
+class GearFilters(ListFilters):
+    """
+    Query filters shared by webbings, weblocks and rollers.
+
+    `min_<field>`/`max_<field>` filter an inclusive range, lists filter on membership
+    and any other value must match exactly.
+    """
+    brand_id: int | None = None
+    isa_certified: bool | None = None
+    min_weight: float | None = None
+    max_weight: float | None = None
+    min_breaking_strength: float | None = None
+    max_breaking_strength: float | None = None
+    min_price_normalized: float | None = None # in the reference currency, see `exchange_rates`
+    max_price_normalized: float | None = None
+
+
+PAGE_FIELDS = set(PageParams.model_fields)
@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+
+class ProfileInfo(SQLModel):
+    """
+    Model for a saved request profile.
+    """
+    name: str
+    size: int # bytes
+    created_at: datetime
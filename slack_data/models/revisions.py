@@ -0,0 +1,84 @@
+import time
+
+from sqlalchemy import Connection, text
+from sqlmodel import Field, SQLModel
+
+REVISION_TABLE = "table_revision"
+
+# Tables whose writes bump a revision, and the revision they bump. Stretch points are
+# part of their webbing.
+REVISED_TABLES = {
+    "brand": "brand",
+    "webbing": "webbing",
+    "webbing_stretch": "webbing",
+    "roller": "roller",
+    "weblock": "weblock",
+}
+# Tables whose writes are logged in `webbing_change`, with their webbing id column
+WEBBING_CHANGE_COLUMNS = {"webbing": "id", "webbing_stretch": "webbing_id"}
+
+
+class TableRevision(SQLModel, table=True):
+    """
+    Counter bumped by triggers on every row written to a table, by any connection or process.
+    """
+    __tablename__ = REVISION_TABLE
+
+    name: str = Field(primary_key=True)
+    revision: int
+
+
+class WebbingChange(SQLModel, table=True):
+    """
+    The webbing revision at which each webbing or its stretch curve was last written.
+
+    Lets the stretch index catch up with the webbings changed since it was built, by any process.
+    """
+    __tablename__ = "webbing_change"
+
+    webbing_id: int = Field(primary_key=True)
+    revision: int = Field(index=True)
+
+
+def _log_webbing_change(table: str, alias: str) -> str:
+    webbing_id = f"{alias}.{WEBBING_CHANGE_COLUMNS[table]}"
+    revision = f"(SELECT revision FROM {REVISION_TABLE} WHERE name = 'webbing')"
+    return (
+        f"INSERT INTO webbing_change (webbing_id, revision) VALUES ({webbing_id}, {revision}) "
+        "ON CONFLICT (webbing_id) DO UPDATE SET revision = excluded.revision;"
+    )
+
+
+def _revision_triggers_ddl() -> list[str]:
+    statements = []
+    for table, revised in REVISED_TABLES.items():
+        for event, alias in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+            # The revision is bumped before the change is logged with it
+            body = f"UPDATE {REVISION_TABLE} SET revision = revision + 1 WHERE name = '{revised}';"
+            if table in WEBBING_CHANGE_COLUMNS:
+                body += _log_webbing_change(table, alias)
+            statements.append(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_revision_{event.lower()} AFTER {event} ON {table} BEGIN
+                    {body}
+                END
+                """
+            )
+    return statements
+
+
+def create_revision_triggers(connection: Connection) -> None:
+    """
+    Create a revision counter per table and the triggers that bump it.
+
+    Counters start at the creation time in microseconds, so a recreated database never
+    hands out the revisions, and so the ETags, of an earlier one.
+    """
+    start = time.time_ns() // 1000
+    for name in sorted(set(REVISED_TABLES.values())):
+        connection.execute(
+            text(f"INSERT OR IGNORE INTO {REVISION_TABLE} (name, revision) VALUES (:name, :revision)"),
+            {"name": name, "revision": start},
+        )
+    for statement in _revision_triggers_ddl():
+        connection.execute(text(statement))
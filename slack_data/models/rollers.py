@@ -1,10 +1,14 @@
 from enum import Enum
+from typing import Literal
 from pydantic import computed_field
+from sqlalchemy import Index, desc
 from sqlmodel import Field, Relationship, SQLModel
 
+from slack_data.models.filters import GearFilters
 from slack_data.utilities.currencies import Currency
 from slack_data.utilities.isa_warnings import ISAWarning
 from slack_data.utilities.materials import MetalMaterial, RollerMaterial
+from slack_data.utilities.widths import parse_width_range
 
 class SliderType(Enum):
     MovingPlates = "Moving plates"
@@ -50,11 +54,33 @@ class BaseRoller(SQLModel):
     notes: str | None = None
 
 class Roller(BaseRoller, table=True):
+    # Composite indexes for the common filter and sort combinations of the list endpoint
+    __table_args__ = (
+        Index("ix_roller_lock_type_breaking_strength", "lock_type", "breaking_strength"),
+        Index("ix_roller_brand_id_name", "brand_id", "name"),
+        Index("ix_roller_isa_certified_name", "isa_certified", "name"),
+        Index("ix_roller_weight", "weight"),
+        Index("ix_roller_breaking_strength", "breaking_strength"),
+        Index("ix_roller_price_normalized", "price_normalized"),
+        # Rollers fitting a webbing width, tightest fit first, see `/webbing/{id}/compatible`
+        Index("ix_roller_width_min_width_max", "width_min", desc("width_max")),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     brand_id: int = Field(foreign_key="brand.id")
     brand: "Brand" = Relationship(back_populates="roller")
+    price_normalized: float | None = None # Price in the reference currency, set by a trigger from `exchange_rate`
+    source_hash: str | None = None # Hash of the `rollers.json` entry, None if created through the API
+    width_min: int | None = None # mm, parsed from `width`
+    width_max: int | None = None # mm, parsed from `width`
     
     
+    def set_width_range(self) -> None:
+        """
+        Update the numeric width range from the free-form `width`.
+        """
+        self.width_min, self.width_max = parse_width_range(self.width)
+
     @computed_field
     def brand_name(self) -> str:
         """
@@ -67,6 +93,9 @@ class RollerPublic(BaseRoller):
     Model for public roller data.
     """
     brand_name: str
+    price_normalized: float | None = None
+    width_min: int | None = None
+    width_max: int | None = None
 
     class Config:
         orm_mode = True
@@ -94,5 +123,11 @@ class RollerUpdate(BaseRoller):
         validate_assignment = True
         extra = "forbid"
 
-
-    
\ No newline at end of file
+class RollerFilters(GearFilters):
+    """
+    Query filters for listing rollers.
+    """
+    sort: Literal["name", "weight", "breaking_strength", "price_normalized"] = "name"
+    material: list[MetalMaterial] | None = None
+    slider_type: list[SliderType] | None = None
+    lock_type: list[LockType] | None = None
@@ -0,0 +1,104 @@
+from enum import Enum
+
+from sqlalchemy import Connection, text
+from sqlmodel import SQLModel
+
+
+class SearchEntity(str, Enum):
+    WEBBING = "webbing"
+    ROLLER = "roller"
+    WEBLOCK = "weblock"
+
+
+# Each entity row is stored at rowid `id * 4 + code`, so triggers can update it by rowid
+ENTITY_CODES = {SearchEntity.WEBBING: 1, SearchEntity.ROLLER: 2, SearchEntity.WEBLOCK: 3}
+
+SEARCH_TABLE = "search_index"
+# bm25 column weights: name, description, notes, brand_name (entity and entity_id are unindexed)
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 5.0, 0.0, 0.0)
+
+
+class SearchResult(SQLModel):
+    """
+    Model for a full-text search hit.
+    """
+    entity: SearchEntity
+    id: int
+    name: str
+    brand_name: str | None = None
+    rank: float # bm25 score, lower is more relevant
+
+
+def _row_values(alias: str, entity: SearchEntity) -> str:
+    code = ENTITY_CODES[entity]
+    return (
+        f"{alias}.id * 4 + {code}, {alias}.name, {alias}.description, {alias}.notes, "
+        f"(SELECT name FROM brand WHERE brand.id = {alias}.brand_id), '{entity.value}', {alias}.id"
+    )
+
+
+def _search_index_ddl() -> list[str]:
+    columns = "rowid, name, description, notes, brand_name, entity, entity_id"
+    statements = [
+        f"""
+        CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+            name, description, notes, brand_name, entity UNINDEXED, entity_id UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        """
+    ]
+    for entity, code in ENTITY_CODES.items():
+        table = entity.value
+        statements += [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {SEARCH_TABLE}({columns}) VALUES ({_row_values("new", entity)});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_update
+            AFTER UPDATE OF name, description, notes, brand_id ON {table} BEGIN
+                DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + {code};
+                INSERT INTO {SEARCH_TABLE}({columns}) VALUES ({_row_values("new", entity)});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + {code};
+            END
+            """,
+            f"""
+            INSERT INTO {SEARCH_TABLE}({columns}) SELECT {_row_values(table, entity)} FROM {table}
+            """,
+        ]
+
+    brand_rows = " UNION ALL ".join(
+        f"SELECT id * 4 + {code} FROM {entity.value} WHERE brand_id = new.id"
+        for entity, code in ENTITY_CODES.items()
+    )
+    statements.append(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS brand_search_update AFTER UPDATE OF name ON brand BEGIN
+            UPDATE {SEARCH_TABLE} SET brand_name = new.name WHERE rowid IN ({brand_rows});
+        END
+        """
+    )
+    return statements
+
+
+def create_search_index(connection: Connection) -> None:
+    """
+    Create the FTS5 search table and the triggers that keep it in sync.
+
+    The table is filled from the existing rows when it's first created. After that the
+    triggers update it on every insert, update and delete of webbings, rollers and
+    weblocks, and when a brand is renamed.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    if exists:
+        return
+    for statement in _search_index_ddl():
+        connection.execute(text(statement))
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class SourceFile(SQLModel, table=True):
+    """
+    Digest of a seed JSON file as of its last sync, so an unchanged file can be skipped.
+    """
+    __tablename__ = "source_file"
+
+    name: str = Field(primary_key=True) # file name, like `webbings.json`
+    digest: str # sha256 of the file contents
+    row_count: int
+    synced_at: datetime
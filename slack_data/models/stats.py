@@ -0,0 +1,49 @@
+from enum import Enum
+
+from sqlmodel import SQLModel
+
+STATS_DEFAULT_BUCKETS = 10
+STATS_MAX_BUCKETS = 50
+
+
+class StatsEntity(str, Enum):
+    WEBBING = "webbing"
+    ROLLER = "roller"
+    WEBLOCK = "weblock"
+
+
+class HistogramBucket(SQLModel):
+    """
+    Number of values in the range `[lower, upper)`, the last bucket includes `upper`.
+    """
+    lower: float
+    upper: float
+    count: int
+
+
+class StatsGroup(SQLModel):
+    """
+    Aggregates of a field over the rows sharing one value of the grouping column.
+    """
+    key: str | int | float | bool | None # Enum value, brand name, width, ...
+    count: int # rows in the group
+    certified: int # ISA certified rows in the group
+    certified_share: float
+    values: int # rows with a value for the field
+    min: float | None = None
+    max: float | None = None
+    mean: float | None = None
+    histogram: list[HistogramBucket]
+
+
+class CatalogStats(SQLModel):
+    """
+    Model for the grouped statistics of one field of a table.
+
+    Every group's histogram uses the same buckets, spanning the field's range over the whole table.
+    """
+    entity: str
+    group_by: str
+    field: str
+    count: int
+    groups: list[StatsGroup]
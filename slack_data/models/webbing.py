@@ -1,9 +1,18 @@
 from enum import Enum
-from pydantic import computed_field
+from typing import Literal
+from pydantic import computed_field, model_validator
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
+from slack_data.models.filters import GearFilters
 from slack_data.utilities.currencies import Currency
 from slack_data.utilities.isa_warnings import ISAWarning
+from slack_data.utilities.stretch import stretch_at_standard_loads
+
+
+MAX_PRETENSION_KN = 25.0
+MAX_LINE_LENGTH = 3000.0 # m
+MAX_LINE_LENGTHS = 500 # lengths simulated by one request
 
 
 class FiberMaterial(str, Enum):
@@ -21,6 +30,13 @@ class Classification(str, Enum):
     C = "C"
     OTHER = "Other"
 
+class StretchPoint(SQLModel):
+    """
+    A single measured point of a webbing stretch curve.
+    """
+    kn: float
+    percent: float
+
 class BaseWebbing(SQLModel):
     """
     Base class for webbing version.
@@ -31,7 +47,6 @@ class BaseWebbing(SQLModel):
     width: int
     weight: float | None = None # g/m
     breaking_strength: float | None = None # kN
-    stretch: str | None = None # like [{"kn":0, "percent": 0.0}, {"kn": 10, "percent": 14.97}]
     isa_certified: bool = False
     classification: Classification | None = None
     isa_warning: ISAWarning | None = None
@@ -42,10 +57,41 @@ class BaseWebbing(SQLModel):
     version: str | None = None # Version indicating which batch data is from TODO: how to keep track of this?
     notes: str | None = None
 
+class WebbingStretch(StretchPoint, table=True):
+    """
+    Stretch curve point of a webbing, stored as one row per point.
+    """
+    __tablename__ = "webbing_stretch"
+
+    id: int | None = Field(default=None, primary_key=True)
+    webbing_id: int = Field(foreign_key="webbing.id", index=True, ondelete="CASCADE")
+    webbing: "Webbing" = Relationship(back_populates="stretch_points")
+
 class Webbing(BaseWebbing, table=True):
+    # Composite indexes for the common filter and sort combinations of the list endpoint
+    __table_args__ = (
+        Index("ix_webbing_material_width_breaking_strength", "material", "width", "breaking_strength"),
+        Index("ix_webbing_brand_id_name", "brand_id", "name"),
+        Index("ix_webbing_isa_certified_name", "isa_certified", "name"),
+        Index("ix_webbing_width", "width"),
+        Index("ix_webbing_weight", "weight"),
+        Index("ix_webbing_breaking_strength", "breaking_strength"),
+        Index("ix_webbing_price_normalized", "price_normalized"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     brand_id: int = Field(foreign_key="brand.id")
     brand: "Brand" = Relationship(back_populates="webbing")
+    price_normalized: float | None = None # Price in the reference currency, set by a trigger from `exchange_rate`
+    stretch_points: list[WebbingStretch] = Relationship(
+        back_populates="webbing",
+        cascade_delete=True,
+        sa_relationship_kwargs={"order_by": "WebbingStretch.kn"},
+    )
+    stretch_2kn: float | None = None # % stretch at 2 kN, derived from the stretch curve
+    stretch_5kn: float | None = None # % stretch at 5 kN, derived from the stretch curve
+    stretch_10kn: float | None = None # % stretch at 10 kN, derived from the stretch curve
+    source_hash: str | None = None # Hash of the `webbings.json` entry, None if created through the API
     
     
     @computed_field
@@ -55,11 +101,37 @@ class Webbing(BaseWebbing, table=True):
         """
         return self.brand.name if self.brand else "Unknown"
 
+    @computed_field
+    def stretch(self) -> list[StretchPoint] | None:
+        """
+        Computed field to get the stretch curve, sorted by load.
+        """
+        if not self.stretch_points:
+            return None
+        return [StretchPoint(kn=point.kn, percent=point.percent) for point in self.stretch_points]
+
+    def set_stretch(self, stretch: list[StretchPoint] | None) -> None:
+        """
+        Replace the stretch curve and update the derived stretch values.
+        """
+        points = sorted(stretch or [], key=lambda point: point.kn)
+        self.stretch_points = [
+            WebbingStretch(kn=point.kn, percent=point.percent) for point in points
+        ]
+        derived = stretch_at_standard_loads([(point.kn, point.percent) for point in points])
+        for key, value in derived.items():
+            setattr(self, key, value)
+
 class WebbingPublic(BaseWebbing):
     """
     Model for public webbing data.
     """
     brand_name: str
+    price_normalized: float | None = None
+    stretch: list[StretchPoint] | None = None
+    stretch_2kn: float | None = None
+    stretch_5kn: float | None = None
+    stretch_10kn: float | None = None
 
     class Config:
         orm_mode = True
@@ -71,6 +143,7 @@ class WebbingCreate(BaseWebbing):
     Model for creating a new webbing entry.
     """
     brand_id: int
+    stretch: list[StretchPoint] | None = None # like [{"kn":0, "percent": 0.0}, {"kn": 10, "percent": 14.97}]
 
     class Config:
         exclude = ["id"]
@@ -81,11 +154,110 @@ class WebbingUpdate(BaseWebbing):
     Model for updating an existing webbing entry.
     """
     brand_id: int | None = None
+    stretch: list[StretchPoint] | None = None
 
     class Config:
         exclude = ["id"]
         validate_assignment = True
         extra = "forbid"
 
+class WebbingStretchAtLoad(SQLModel):
+    """
+    Model for the interpolated stretch of a webbing at a given load.
+    """
+    id: int
+    name: str
+    brand_name: str
+    kn: float
+    percent: float
 
-    
\ No newline at end of file
+class WebbingSimilarity(SQLModel):
+    """
+    Model for a webbing with a stretch curve similar to a reference curve.
+    """
+    id: int
+    name: str
+    brand_name: str
+    material: FiberMaterial
+    width: int
+    weight: float | None = None
+    distance: float # RMS difference in stretch (%) over the shared load range
+
+class SimilarStretchFilters(SQLModel):
+    """
+    Query filters for the similar stretch search.
+    """
+    k: int = Field(default=10, ge=1, le=100)
+    material: FiberMaterial | None = None
+    min_width: int | None = None
+    max_width: int | None = None
+    min_weight: float | None = None
+    max_weight: float | None = None
+
+class LineSimulationParams(SQLModel):
+    """
+    Query parameters for simulating the sag and peak tension of many webbings.
+
+    Every length from `min_length` to `max_length` in steps of `length_step` is simulated,
+    only `min_length` if `max_length` isn't set. The webbings are filtered like the similar
+    stretch search.
+    """
+    pretension: float = Field(gt=0, le=MAX_PRETENSION_KN) # kN, while the line is straight
+    slackliner_weight: float = Field(default=80.0, gt=0, le=300) # kg
+    min_length: float = Field(gt=0, le=MAX_LINE_LENGTH) # m
+    max_length: float | None = Field(default=None, gt=0, le=MAX_LINE_LENGTH) # m
+    length_step: float = Field(default=10.0, gt=0) # m
+    ids: list[int] | None = None
+    material: FiberMaterial | None = None
+    min_width: int | None = None
+    max_width: int | None = None
+    min_weight: float | None = None
+    max_weight: float | None = None
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if self.max_length is not None and self.max_length < self.min_length:
+            raise ValueError("max_length must not be smaller than min_length")
+        if self.length_count() > MAX_LINE_LENGTHS:
+            raise ValueError(f"at most {MAX_LINE_LENGTHS} lengths can be simulated at once")
+        return self
+
+    def length_count(self) -> int:
+        if self.max_length is None:
+            return 1
+        return int((self.max_length - self.min_length) / self.length_step + 1e-9) + 1
+
+    def lengths(self) -> list[float]:
+        return [round(self.min_length + index * self.length_step, 6) for index in range(self.length_count())]
+
+class WebbingLineSimulation(SQLModel):
+    """
+    Model for the simulated sag and peak tension of a webbing, one value per length.
+    """
+    id: int
+    name: str
+    brand_name: str
+    width: int
+    weight: float | None = None
+    sag: list[float] # m, at the middle of the line
+    peak_tension: list[float] # kN, at the anchors
+    measured_max_kn: float # Tensions above this are extrapolated from the stretch curve
+
+class LineSimulation(SQLModel):
+    """
+    Model for the results of a line simulation, sharing the list of lengths.
+    """
+    pretension: float
+    slackliner_weight: float
+    lengths: list[float]
+    webbings: list[WebbingLineSimulation]
+
+class WebbingFilters(GearFilters):
+    """
+    Query filters for listing webbings.
+    """
+    sort: Literal["name", "width", "weight", "breaking_strength", "price_normalized"] = "name"
+    material: list[FiberMaterial] | None = None
+    classification: list[Classification] | None = None
+    min_width: int | None = None
+    max_width: int | None = None
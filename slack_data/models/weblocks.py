@@ -1,7 +1,10 @@
 from enum import Enum
+from typing import Literal
 from pydantic import computed_field
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
+from slack_data.models.filters import GearFilters
 from slack_data.utilities.currencies import Currency
 from slack_data.utilities.isa_warnings import ISAWarning
 from slack_data.utilities.materials import MetalMaterial
@@ -44,9 +47,21 @@ class BaseWeblock(SQLModel):
     notes: str | None = None
 
 class Weblock(BaseWeblock, table=True):
+    # Composite indexes for the common filter and sort combinations of the list endpoint
+    __table_args__ = (
+        Index("ix_weblock_material_width_breaking_strength", "material", "width", "breaking_strength"),
+        Index("ix_weblock_brand_id_name", "brand_id", "name"),
+        Index("ix_weblock_isa_certified_name", "isa_certified", "name"),
+        Index("ix_weblock_width_name", "width", "name"), # also lists the weblocks fitting a webbing by name
+        Index("ix_weblock_weight", "weight"),
+        Index("ix_weblock_breaking_strength", "breaking_strength"),
+        Index("ix_weblock_price_normalized", "price_normalized"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     brand_id: int = Field(foreign_key="brand.id")
     brand: "Brand" = Relationship(back_populates="weblock")
+    price_normalized: float | None = None # Price in the reference currency, set by a trigger from `exchange_rate`
     
     
     @computed_field
@@ -61,6 +76,7 @@ class WeblockPublic(BaseWeblock):
     Model for public weblock data.
     """
     brand_name: str
+    price_normalized: float | None = None
 
     class Config:
         orm_mode = True
@@ -88,5 +104,13 @@ class WeblockUpdate(BaseWeblock):
         validate_assignment = True
         extra = "forbid"
 
-
-    
\ No newline at end of file
+class WeblockFilters(GearFilters):
+    """
+    Query filters for listing weblocks.
+    """
+    sort: Literal["name", "width", "weight", "breaking_strength", "price_normalized"] = "name"
+    material: list[MetalMaterial] | None = None
+    front_pin: list[FrontPin] | None = None
+    attachment_point: list[AttachmentPoint] | None = None
+    min_width: int | None = None
+    max_width: int | None = None
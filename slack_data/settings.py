@@ -0,0 +1,77 @@
+import os
+from dataclasses import dataclass
+
+ENV_PREFIX = "SLACKDATA_"
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _env(name: str, default: str) -> str:
+    return os.environ.get(f"{ENV_PREFIX}{name}", default)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return _env(name, str(default)).strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Runtime configuration, read from `SLACKDATA_*` environment variables.
+    """
+    database_path: str = "database.db"
+    echo_sql: bool = False
+    async_db: bool = False # Serve requests through aiosqlite instead of the threadpool
+    sync_seed_files: bool = True # Sync the seed JSON files into the database on startup
+    retire_seed_rows: bool = False # Delete rows that were removed from the seed JSON files when syncing
+    read_pool_size: int = 8 # Read-only connections, readers don't block each other in WAL mode
+    export_pool_size: int = 2 # Connections for streamed exports, separate from the read pool
+    pool_timeout: float = 30.0 # Seconds to wait for a free connection
+    busy_timeout_ms: int = 5000 # How long SQLite waits on a locked database before failing
+    synchronous: str = "NORMAL" # Safe with WAL, only the last commits can be lost on power failure
+    cache_size_kib: int = 65536 # Page cache per connection
+    mmap_size: int = 268435456 # Bytes of the database file to memory map
+    profile_token: str | None = None # Admin token that enables request profiling, off when unset
+    profile_sample_rate: float = 0.0 # Fraction of requests profiled without asking, from 0 to 1
+    profile_dir: str = "profiles" # Where profiles are written
+    profile_keep: int = 100 # Number of profiles kept, the oldest are deleted
+
+    def __post_init__(self):
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"{ENV_PREFIX}SYNCHRONOUS must be one of {sorted(SYNCHRONOUS_MODES)}")
+        if self.export_pool_size < 1:
+            raise ValueError(f"{ENV_PREFIX}EXPORT_POOL_SIZE must be at least 1")
+        if not 0 <= self.profile_sample_rate <= 1:
+            raise ValueError(f"{ENV_PREFIX}PROFILE_SAMPLE_RATE must be between 0 and 1")
+
+    @property
+    def database_url(self) -> str:
+        return f"sqlite:///{self.database_path}"
+
+    @property
+    def async_database_url(self) -> str:
+        return f"sqlite+aiosqlite:///{self.database_path}"
+
+
+def load_settings() -> Settings:
+    defaults = Settings()
+    return Settings(
+        database_path=_env("DATABASE_PATH", defaults.database_path),
+        echo_sql=_env_bool("ECHO_SQL", defaults.echo_sql),
+        async_db=_env_bool("ASYNC_DB", defaults.async_db),
+        sync_seed_files=_env_bool("SYNC_SEED_FILES", defaults.sync_seed_files),
+        retire_seed_rows=_env_bool("RETIRE_SEED_ROWS", defaults.retire_seed_rows),
+        read_pool_size=int(_env("READ_POOL_SIZE", str(defaults.read_pool_size))),
+        export_pool_size=int(_env("EXPORT_POOL_SIZE", str(defaults.export_pool_size))),
+        pool_timeout=float(_env("POOL_TIMEOUT", str(defaults.pool_timeout))),
+        busy_timeout_ms=int(_env("BUSY_TIMEOUT_MS", str(defaults.busy_timeout_ms))),
+        synchronous=_env("SYNCHRONOUS", defaults.synchronous).upper(),
+        cache_size_kib=int(_env("CACHE_SIZE_KIB", str(defaults.cache_size_kib))),
+        mmap_size=int(_env("MMAP_SIZE", str(defaults.mmap_size))),
+        profile_token=_env("PROFILE_TOKEN", "") or None,
+        profile_sample_rate=float(_env("PROFILE_SAMPLE_RATE", str(defaults.profile_sample_rate))),
+        profile_dir=_env("PROFILE_DIR", defaults.profile_dir),
+        profile_keep=int(_env("PROFILE_KEEP", str(defaults.profile_keep))),
+    )
+
+
+SETTINGS = load_settings()
@@ -0,0 +1,30 @@
+from collections.abc import Sequence
+from itertools import pairwise
+
+STANDARD_LOADS_KN = (2, 5, 10) # loads (kN) at which stretch is precomputed for every webbing
+
+
+def interpolate_stretch(points: Sequence[tuple[float, float]], kn: float) -> float | None:
+    """
+    Linearly interpolate the stretch (%) at a load from (kN, percent) points sorted by kN.
+
+    Returns None when the load is outside of the measured range.
+    """
+    if not points or kn < points[0][0] or kn > points[-1][0]:
+        return None
+
+    for (kn_low, percent_low), (kn_high, percent_high) in pairwise(points):
+        if kn_low <= kn <= kn_high:
+            if kn_high == kn_low:
+                return percent_high
+            fraction = (kn - kn_low) / (kn_high - kn_low)
+            return percent_low + fraction * (percent_high - percent_low)
+
+    return points[-1][1]
+
+
+def stretch_at_standard_loads(points: Sequence[tuple[float, float]]) -> dict[str, float | None]:
+    """
+    Get the derived `stretch_<load>kn` values of a stretch curve sorted by kN.
+    """
+    return {f"stretch_{load}kn": interpolate_stretch(points, load) for load in STANDARD_LOADS_KN}
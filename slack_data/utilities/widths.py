@@ -0,0 +1,22 @@
+import math
+import re
+
+WIDTH_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_width_range(width: str | None) -> tuple[int | None, int | None]:
+    """
+    Parse a free-form width like "25, 26", "18-28 mm" or "[25, 26]" into (smallest, largest) mm.
+
+    A single number is both the smallest and largest width. The range is narrowed to
+    whole millimeters that fit, and (None, None) is returned when there is no width.
+    """
+    numbers = [float(number) for number in WIDTH_NUMBER_PATTERN.findall(str(width or ""))]
+    numbers = [number for number in numbers if number > 0]
+    if not numbers:
+        return None, None
+    width_min, width_max = math.ceil(min(numbers)), math.floor(max(numbers))
+    if width_min > width_max: # Like a single 25.5, with no whole millimeter in between
+        width_min = width_max = round(min(numbers))
+    return width_min, width_max
+
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# Settings are read when `slack_data.settings` is imported, so the test database is configured
+# before the app is imported, and the imports of this module come after it
+os.environ["SLACKDATA_DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="slackdata-"), "test.db")
+os.environ["SLACKDATA_PROFILE_TOKEN"] = ""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from slack_data import database
+from slack_data.api.response_cache import RESPONSE_CACHE
+from slack_data.main import app
+from slack_data.models.brands import Brand
+
+WEBLOCK_COUNT = 30
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    A client of the app on a fresh database synced from the seed files, plus a few weblocks.
+    """
+    with TestClient(app) as client:
+        brand_ids = first_ids(Brand, 3)
+        weblocks = [
+            {
+                "name": f"Test Weblock {index:02d}",
+                "material": "Aluminum",
+                "width": 25,
+                "brand_id": brand_ids[index % len(brand_ids)],
+            }
+            for index in range(WEBLOCK_COUNT)
+        ]
+        response = client.post("/weblock/batch", json=weblocks, params={"atomic": True})
+        assert response.status_code == 200, response.text
+        yield client
+
+
+def first_ids(model, count: int) -> list[int]:
+    """
+    Get the lowest ids of a table, public models don't include them.
+    """
+    with Session(database.READ_ENGINE) as session:
+        return list(session.exec(select(model.id).order_by(model.id).limit(count)))
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, connection, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Count the SQL statements run inside a `with count_queries() as counter:` block.
+
+    The response cache is cleared first, so every request reaches the database.
+    """
+    @contextmanager
+    def counting():
+        RESPONSE_CACHE.clear()
+        counter = QueryCounter()
+        engines = [database.DATABASE_ENGINE, database.READ_ENGINE]
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", counter)
+
+    return counting
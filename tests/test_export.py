@@ -0,0 +1,86 @@
+import asyncio
+
+from slack_data import database
+from slack_data.api.routers.export_router import acquire_export_slot
+from slack_data.main import app
+from slack_data.settings import SETTINGS
+
+
+def hold_every_slot() -> list:
+    releases = []
+    while (release := acquire_export_slot()) is not None:
+        releases.append(release)
+    return releases
+
+
+async def disconnect_after_first_chunk(path: str, query: str = "") -> list[dict]:
+    """
+    Call the app like a client that goes away once the first chunk of the body arrives.
+    """
+    messages = []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body":
+            disconnected.set()
+            await asyncio.sleep(0.01) # Let the app notice the disconnect before the next chunk
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"testserver")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+def test_export_streams_outside_the_read_pool(client, count_queries):
+    with count_queries() as counter:
+        response = client.get("/export/roller")
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == len(client.get("/roller/", params={"limit": 100}).json())
+    assert counter.count == 0 # Exports read through the export pool only
+
+    releases = hold_every_slot()
+    assert len(releases) == SETTINGS.export_pool_size # Every slot was released after streaming
+    for release in releases:
+        release()
+
+
+def test_export_is_refused_when_every_slot_is_streaming(client):
+    releases = hold_every_slot()
+    try:
+        response = client.get("/export/webbing")
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        assert client.get("/webbing/").status_code == 200
+    finally:
+        for release in releases:
+            release()
+    assert client.get("/export/webbing", params={"format": "csv"}).status_code == 200
+
+
+def test_export_slot_is_released_when_the_client_disconnects(client):
+    messages = asyncio.run(disconnect_after_first_chunk("/export/webbing", "format=csv"))
+    assert messages[0]["status"] == 200
+    assert messages[-1]["more_body"] # The stream was cut off before its end
+
+    releases = hold_every_slot()
+    for release in releases:
+        release()
+    assert len(releases) == SETTINGS.export_pool_size
+    assert database.EXPORT_ENGINE.pool.checkedout() == 0
@@ -0,0 +1,12 @@
+import pytest
+
+from slack_data.models.filters import MAX_PAGE_SIZE
+
+LIST_PATHS = ("/brand/", "/webbing/", "/roller/", "/weblock/")
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+@pytest.mark.parametrize("limit", [-1, 0, MAX_PAGE_SIZE + 1])
+def test_limit_outside_the_page_size_is_rejected(client, path, limit):
+    # SQLite treats a negative LIMIT as no limit, which would return the whole table
+    assert client.get(path, params={"limit": limit}).status_code == 422
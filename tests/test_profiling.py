@@ -0,0 +1,24 @@
+import asyncio
+import cProfile
+import threading
+
+from slack_data.api.profiling import RequestProfile
+
+
+def query_catalog() -> int:
+    return threading.get_ident()
+
+
+def test_threadpool_call_is_profiled_in_its_worker_thread():
+    async def profiled_request() -> int:
+        profile = RequestProfile(cProfile.Profile())
+        profile.profiler.enable()
+        try:
+            worker = await profile.run_in_threadpool(query_catalog)
+        finally:
+            profile.profiler.disable()
+        functions = {function for _, _, function in profile.stats().stats}
+        assert "query_catalog" in functions
+        return worker
+
+    assert asyncio.run(profiled_request()) != threading.get_ident()
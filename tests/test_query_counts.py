@@ -0,0 +1,63 @@
+"""
+Guard against N+1 queries: every list and detail read runs a fixed number of statements,
+however many rows it returns.
+"""
+import pytest
+
+from slack_data.models.brands import Brand
+from slack_data.models.rollers import Roller
+from slack_data.models.webbing import Webbing
+from slack_data.models.weblocks import Weblock
+from tests.conftest import first_ids
+
+PAGE_SIZES = (1, 10, 50)
+
+
+def list_query_counts(client, count_queries, path: str) -> dict[int, int]:
+    counts = {}
+    for limit in PAGE_SIZES:
+        with count_queries() as counter:
+            response = client.get(path, params={"limit": limit})
+        assert response.status_code == 200, response.text
+        assert len(response.json()) > 1 or limit == 1
+        counts[limit] = counter.count
+    return counts
+
+
+def detail_query_count(client, count_queries, path: str) -> int:
+    with count_queries() as counter:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+
+@pytest.mark.parametrize(
+    ("path", "queries"),
+    [
+        # The brands, then the product names of the whole page in one UNION query
+        ("/brand/", 2),
+        # The webbings joined to their brands, then the stretch curves of the whole page
+        ("/webbing/", 2),
+        # The rollers or weblocks joined to their brands
+        ("/roller/", 1),
+        ("/weblock/", 1),
+    ],
+)
+def test_list_query_count_is_independent_of_page_size(client, count_queries, path, queries):
+    counts = list_query_counts(client, count_queries, path)
+    assert counts == {limit: queries for limit in PAGE_SIZES}
+
+
+@pytest.mark.parametrize(
+    ("model", "path", "queries"),
+    [
+        (Brand, "/brand/{}", 2),
+        # The webbing joined to its brand, then its stretch curve
+        (Webbing, "/webbing/{}", 2),
+        (Roller, "/roller/{}", 1),
+        (Weblock, "/weblock/{}", 1),
+    ],
+)
+def test_detail_query_count(client, count_queries, model, path, queries):
+    (row_id,) = first_ids(model, 1)
+    assert detail_query_count(client, count_queries, path.format(row_id)) == queries
@@ -0,0 +1,48 @@
+"""
+Writes made outside this process, like another worker or a command line loader, must change
+the ETags and bypass the response cache.
+"""
+import sqlite3
+
+from slack_data.models.rollers import Roller
+from slack_data.settings import SETTINGS
+from tests.conftest import first_ids
+
+
+def write_elsewhere(statement: str, *parameters) -> None:
+    connection = sqlite3.connect(SETTINGS.database_path)
+    with connection:
+        connection.execute(statement, parameters)
+    connection.close()
+
+
+def test_outside_write_changes_etag_and_skips_cache(client):
+    (roller_id,) = first_ids(Roller, 1)
+    path = f"/roller/{roller_id}"
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    write_elsewhere("UPDATE roller SET name = ? WHERE id = ?", "Renamed Elsewhere", roller_id)
+
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["name"] == "Renamed Elsewhere"
+
+
+def test_unchanged_tables_keep_their_etag(client):
+    first = client.get("/weblock/")
+    write_elsewhere("UPDATE webbing SET notes = 'elsewhere' WHERE id = (SELECT min(id) FROM webbing)")
+    assert client.get("/weblock/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_stats_answer_conditional_gets(client):
+    first = client.get("/stats/roller")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/stats/roller", headers={"If-None-Match": etag}).status_code == 304
+
+    write_elsewhere("UPDATE roller SET weight = weight + 1 WHERE id = (SELECT min(id) FROM roller)")
+    assert client.get("/stats/roller", headers={"If-None-Match": etag}).status_code == 200
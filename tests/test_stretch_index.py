@@ -0,0 +1,60 @@
+"""
+The stretch index must follow webbing writes from any process, including writes that commit
+while it's being loaded.
+"""
+import numpy as np
+from sqlmodel import Session, select
+
+from slack_data import database
+from slack_data.api.stretch_index import STRETCH_INDEX, StretchIndex
+from slack_data.models.webbing import WebbingStretch
+from tests.test_revisions import write_elsewhere
+
+
+def measured_point() -> tuple[int, float, float]:
+    with Session(database.READ_ENGINE) as session:
+        return session.exec(
+            select(WebbingStretch.webbing_id, WebbingStretch.kn, WebbingStretch.percent)
+            .order_by(WebbingStretch.webbing_id, WebbingStretch.kn)
+            .limit(1)
+        ).one()
+
+
+def stretch_at(client, webbing_id: int, kn: float) -> float:
+    response = client.get("/webbing/stretch", params={"kn": kn, "ids": webbing_id})
+    assert response.status_code == 200, response.text
+    (row,) = response.json()
+    return row["percent"]
+
+
+def test_outside_write_reaches_the_index(client):
+    webbing_id, kn, percent = measured_point()
+    assert stretch_at(client, webbing_id, kn) == round(percent, 3)
+
+    write_elsewhere(
+        "UPDATE webbing_stretch SET percent = percent + 1 WHERE webbing_id = ? AND kn = ?", webbing_id, kn
+    )
+
+    assert stretch_at(client, webbing_id, kn) == round(percent + 1, 3)
+    assert STRETCH_INDEX.loaded
+
+
+def test_write_during_first_load_is_applied_next(client, monkeypatch):
+    webbing_id, _, _ = measured_point()
+    index = StretchIndex()
+    read = index._read
+
+    def read_then_write(session, webbing_ids=None):
+        rows = read(session, webbing_ids)
+        if webbing_ids is None: # The write commits after the rows were read, before the load ends
+            write_elsewhere("UPDATE webbing_stretch SET percent = percent + 1 WHERE webbing_id = ?", webbing_id)
+        return rows
+
+    monkeypatch.setattr(index, "_read", read_then_write)
+    with Session(database.READ_ENGINE) as session:
+        index.ensure_loaded(session)
+        loaded = index.curve(webbing_id)
+        index.ensure_loaded(session)
+        updated = index.curve(webbing_id)
+
+    np.testing.assert_allclose(updated, loaded + 1)
@@ -0,0 +1,44 @@
+import json
+from dataclasses import replace
+
+from sqlmodel import Session, select
+
+from slack_data import database
+from slack_data.load_data.load_rollers import ROLLER_FILE
+from slack_data.load_data.stream_json import iter_json_array
+from slack_data.load_data.sync import SEED_SOURCES, sync_source
+from slack_data.models.rollers import Roller
+
+
+def roller_entry(name: str, weight: float) -> dict:
+    return {"name": name, "manufacturer": "Sync Test Brand", "weight": weight, "mbs": 12}
+
+
+def sync_rollers(tmp_path, entries: list[dict], **options):
+    path = tmp_path / "rollers.json"
+    path.write_text(json.dumps(entries))
+    (roller_source,) = [source for source in SEED_SOURCES if source.model is Roller]
+    source = replace(roller_source, path=path, iter_items=lambda: iter_json_array(path))
+    with Session(database.DATABASE_ENGINE) as session:
+        return sync_source(session, source, force=True, **options)
+
+
+def synced_weights() -> dict[str, float]:
+    with Session(database.READ_ENGINE) as session:
+        statement = select(Roller.name, Roller.weight).where(Roller.name.startswith("Sync Test"))
+        return dict(session.exec(statement).all())
+
+
+def test_sync_compares_batch_by_batch(client, tmp_path):
+    # The seed rollers stay in the file, or retiring would delete them
+    seed = json.loads(ROLLER_FILE.read_text())
+    entries = [roller_entry(f"Sync Test {index}", 100 + index) for index in range(5)]
+    sync_rollers(tmp_path, [*seed, *entries], batch_size=4, retire=True) # Rows other tests changed are reset
+    result = sync_rollers(tmp_path, [*seed, *entries], batch_size=4)
+    assert (result.inserted, result.updated, result.unchanged) == (0, 0, len(seed) + 5)
+
+    entries[3] = roller_entry("Sync Test 3", 999)
+    duplicate = roller_entry("Sync Test 1", 555) # In a later batch than the first one
+    result = sync_rollers(tmp_path, [*seed, *entries[1:], duplicate], batch_size=4, retire=True)
+    assert (result.inserted, result.updated, result.unchanged, result.retired) == (0, 1, len(seed) + 3, 1)
+    assert synced_weights() == {"Sync Test 1": 101, "Sync Test 2": 102, "Sync Test 3": 999, "Sync Test 4": 104}